@@ -5,16 +5,33 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 # Imports for Dashboard 1
-import json
 import folium
 from streamlit_folium import st_folium
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from io import StringIO
-# Import the bucket functions from utils.py in dashboard1_graphs
-from dashboard1_graphs.utils import bucket_1, bucket_2, bucket_3, bucket_4, bucket_5
+from types import SimpleNamespace
+# Import the bucket and KPI table functions from utils.py in dashboard1_graphs
+from dashboard1_graphs.utils import bucket_5, build_rent_matrix, compute_kpi_table, kpi_value
+# Shared, process-wide cached data loading
+from dashboard1_graphs.data_loader import PRICES_PATH, YOUTH_SALARY_PATH, file_key, load_color_scale, load_district_geometry, load_prices, load_price_aggregates, load_kpi_table, load_rent_index, load_youth_salary
+from dashboard1_graphs.rent_index import build_rent_index, default_kpi_window, window_kpi_table
+from dashboard1_graphs.data_watcher import refresh_on_data_change
+from dashboard1_graphs.choropleth import MAP_ZOOM, cached_choropleth, clicked_district, st_choropleth
+from dashboard1_graphs.colormap import build_color_scale, legend_html as colormap_legend_html, map_colors
+from dashboard1_graphs.figure_tasks import FigureTask, run_tasks
+from dashboard3.simulation import PAYBACK_BINS, simulate
+from dashboard3.bootstrap import bootstrap_regression, trend_band
+from dashboard3.allocation import PROGRAMS_PATH, load_programs, optimize_allocation, program_impact
+from dashboard3.survey import SURVEY_PATH, bin_means, fit_line, line_band, load_survey, survey_version
+from dashboard3.finance import CURRENT_PROPERTY_TAX, PAYBACK_HORIZON, RENT_REDUCTION, budget_split, revenue_projection, scenario, scenario_cache_info, sensitivity_cube
 
 # --- Page Configuration ---
 st.set_page_config(layout="wide", page_title="Madrid Housing Analysis")
 
+# Rerun when a file in data/ changes (cached data is invalidated by the watcher)
+refresh_on_data_change()
+
 # --- Initialize Session State ---
 if 'page' not in st.session_state:
     st.session_state.page = 'dashboard1' # Start on Dashboard 1
@@ -145,148 +162,213 @@ div[data-baseweb="select"] { margin-bottom: 10px; }
 """
 
 # --- Data Definitions & Loading ---
+# Each page's data is built by its provider the first time the page is shown and reused
+# afterwards, so a page only pays for its own data. Providers are looked up by
+# st.session_state.page in PAGE_DATA_PROVIDERS.
+
+def build_dashboard1_data():
+    """
+    Data of Dashboard 1, without any Streamlit call, so it can also be built off the script
+    thread (page prefetch). Loading errors are collected in d1.errors for the page to show.
+
+    Returns:
+    SimpleNamespace: geojson_data, df_prices, df_avg, overall_df, district_avgs, min_rent,
+    max_rent, kpi_table, rent_index, df_youth and df_radar, plus data_key / youth_key (file
+    versions keying the cached figures) and errors (messages, empty if everything loaded).
+    """
+    d1 = SimpleNamespace(errors=[])
+    try:
+        # Boundaries simplified for the map's zoom level (see dashboard1_graphs/geometry.py)
+        d1.geojson_data = load_district_geometry(MAP_ZOOM).geojson
+    except FileNotFoundError:
+        d1.errors.append("GeoJSON file 'data/DistritosMadrid.geojson' not found.")
+        d1.geojson_data = None
+    except Exception as e:
+        d1.errors.append(f"Error loading GeoJSON: {e}")
+        d1.geojson_data = None
+
+    try:
+        d1.df_prices = load_prices()
+        # Version of prices.csv, part of the cache key of the figures built from it
+        d1.data_key = file_key(PRICES_PATH)
+        aggregates = load_price_aggregates()
+        d1.df_avg = aggregates.df_avg
+        d1.overall_df = aggregates.overall_df
+        d1.district_avgs = aggregates.district_avgs
+        d1.min_rent = aggregates.min_rent
+        d1.max_rent = aggregates.max_rent
+        # KPIs of every district in one precomputed table (KPI row and required income)
+        d1.kpi_table = load_kpi_table()
+        # Prefix-sum index for KPIs over an arbitrary date window
+        d1.rent_index = load_rent_index()
+    except Exception as e:
+        if isinstance(e, FileNotFoundError):
+            d1.errors.append("CSV file 'data/prices.csv' not found.")
+        else:
+            d1.errors.append(f"Error loading or processing 'prices.csv': {e}")
+        d1.df_prices = pd.DataFrame(columns=['Date', 'District', 'Rent_Price'])
+        d1.df_avg = pd.DataFrame(columns=['Date', 'District', 'Rent_Price'])
+        d1.overall_df = pd.DataFrame(columns=['Date', 'Rent_Price'])
+        d1.district_avgs = {}
+        d1.data_key = None
+        d1.min_rent, d1.max_rent = 0, 1
+        d1.kpi_table = compute_kpi_table(build_rent_matrix(d1.df_prices))
+        d1.rent_index = build_rent_index(build_rent_matrix(d1.df_prices))
 
-# Data Loading for Dashboard 1
-try:
-    with open('data/DistritosMadrid.geojson', 'r', encoding='utf-8') as f:
-        geojson_data_d1 = json.load(f)
-except FileNotFoundError:
-    st.error("GeoJSON file 'data/DistritosMadrid.geojson' not found.")
-    geojson_data_d1 = None
-except Exception as e:
-    st.error(f"Error loading GeoJSON: {e}")
-    geojson_data_d1 = None
-
-try:
-    df_prices_d1 = pd.read_csv('data/prices.csv')
-    df_prices_d1['Date'] = pd.to_datetime(df_prices_d1['Date'])
-    df_avg_d1 = df_prices_d1.groupby(['Date', 'District'])['Rent_Price'].mean().reset_index()
-    overall_df_d1 = df_prices_d1.groupby('Date')['Rent_Price'].mean().reset_index()
-    district_avgs_d1 = df_prices_d1.groupby('District')['Rent_Price'].mean().to_dict()
-    min_rent_d1 = min(district_avgs_d1.values()) if district_avgs_d1 else 0
-    max_rent_d1 = max(district_avgs_d1.values()) if district_avgs_d1 else 1
-except FileNotFoundError:
-    st.error("CSV file 'data/prices.csv' not found.")
-    df_prices_d1 = pd.DataFrame(columns=['Date', 'District', 'Rent_Price'])
-    df_avg_d1 = pd.DataFrame(columns=['Date', 'District', 'Rent_Price'])
-    overall_df_d1 = pd.DataFrame(columns=['Date', 'Rent_Price'])
-    district_avgs_d1 = {}
-    min_rent_d1, max_rent_d1 = 0, 1
-except Exception as e:
-    st.error(f"Error loading or processing 'prices.csv': {e}")
-    df_prices_d1 = pd.DataFrame(columns=['Date', 'District', 'Rent_Price'])
-    df_avg_d1 = pd.DataFrame(columns=['Date', 'District', 'Rent_Price'])
-    overall_df_d1 = pd.DataFrame(columns=['Date', 'Rent_Price'])
-    district_avgs_d1 = {}
-    min_rent_d1, max_rent_d1 = 0, 1
-
-try:
-    df_youth_d1 = pd.read_csv("data/Youth_Salary_vs_Rent_Prices.csv")
-except FileNotFoundError:
-    st.error("CSV file 'data/Youth_Salary_vs_Rent_Prices.csv' not found.")
-    df_youth_d1 = pd.DataFrame(columns=['Year', 'Average_Youth_Salary', 'Average_Monthly_Rent'])
-except Exception as e:
-    st.error(f"Error loading 'Youth_Salary_vs_Rent_Prices.csv': {e}")
-    df_youth_d1 = pd.DataFrame(columns=['Year', 'Average_Youth_Salary', 'Average_Monthly_Rent'])
-
-data_radar_d1 = """Year;Access to Housing;Unemployment;Political Issues;Job Quality;Immigration;Economic Crisis
+    d1.youth_key = None
+    try:
+        d1.df_youth = load_youth_salary()
+        d1.youth_key = file_key(YOUTH_SALARY_PATH)
+    except FileNotFoundError:
+        d1.errors.append("CSV file 'data/Youth_Salary_vs_Rent_Prices.csv' not found.")
+        d1.df_youth = pd.DataFrame(columns=['Year', 'Average_Youth_Salary', 'Average_Monthly_Rent'])
+    except Exception as e:
+        d1.errors.append(f"Error loading 'Youth_Salary_vs_Rent_Prices.csv': {e}")
+        d1.df_youth = pd.DataFrame(columns=['Year', 'Average_Youth_Salary', 'Average_Monthly_Rent'])
+
+    d1.df_radar = radar_frame_d1()
+    if d1.df_radar.empty:
+        d1.errors.append("Error processing radar chart data.")
+    return d1
+
+def load_dashboard1_data():
+    """
+    Data of Dashboard 1 for the page, showing its loading errors. Not cached by Streamlit:
+    data_loader already keeps one parsed copy per file version, so edits to data/ are picked
+    up on the next rerun.
+
+    Returns:
+    SimpleNamespace: See build_dashboard1_data.
+    """
+    d1 = build_dashboard1_data()
+    for message in d1.errors:
+        st.error(message)
+    return d1
+
+@st.cache_resource(show_spinner=False)
+def radar_frame_d1():
+    data_radar = """Year;Access to Housing;Unemployment;Political Issues;Job Quality;Immigration;Economic Crisis
 2014;5;8;6;7;4;7
 2024;9;7;6;7;5;6"""
-try:
-    df_radar_d1 = pd.read_csv(StringIO(data_radar_d1), delimiter=';')
-except Exception as e:
-    st.error(f"Error processing radar chart data: {e}")
-    df_radar_d1 = pd.DataFrame(columns=['Year', 'Access to Housing', 'Unemployment', 'Political Issues', 'Job Quality', 'Immigration', 'Economic Crisis'])
-
-# Data for Dashboard 2
-districts_d2 = [
-    "Salamanca", "Centro", "Chamberí", "Chamartín", "Arganzuela",
-    "Tetuán", "Retiro", "Moncloa-Aravaca", "Fuencarral-El Pardo", "Usera"
-]
-before_control_d2 = np.array([25, 24, 23, 22, 20, 18, 21, 19, 17, 16])
-after_control_d2 = np.array([21, 20, 20, 19, 18, 16, 18, 17, 15, 14])
-reduction_percent_d2 = ((before_control_d2 - after_control_d2) / before_control_d2) * 100
-scenario_data_d2 = pd.DataFrame({
-    "District": districts_d2,
-    "Before Control (€/m²)": before_control_d2,
-    "After Control (€/m²)": after_control_d2,
-    "Reduction (%)": reduction_percent_d2
-})
-incentive_levels_d2 = ['No Incentives', 'Partial Incentives', 'Full Incentives']
-participation_rates_d2 = [10, 40, 70]
-rent_increase_d2 = [5.0, 3.0, 1.5]
-net_benefit_d2 = [0, 3000, 5873]
-tenant_categories_d2 = ["Low-Income Renters", "Middle-Income Renters", "Young Professionals"]
-before_burden_d2 = [51.7, 35.4, 41.2]
-after_burden_d2 = [39.4, 25.9, 30.9]
-improvement_d2 = [(b-a)/b*100 for b, a in zip(before_burden_d2, after_burden_d2)]
-operational_data_d2 = {
-    "District": districts_d2,
-    "Current Rent (€/m²)": before_control_d2,
-    "Priority Score": [9, 8, 8, 7, 6, 5, 7, 6, 5, 4],
-    "Implementation Timeline (months)": [1, 1, 1.5, 2, 3, 3, 2.5, 2, 4, 4],
-    "Incentive Level": ["High", "High", "High", "Medium", "Medium", "Low", "Medium", "Medium", "Low", "Low"]
-}
-ops_df_d2 = pd.DataFrame(operational_data_d2)
-districts_subset_d2 = ["Salamanca", "Centro", "Chamberí", "Retiro", "Arganzuela"]
-youth_before_d2 = [42.5, 39.3, 39.9, 44.4, 41.2]
-youth_after_d2 = [29.7, 29.0, 30.3, 31.6, 30.0]
-low_income_before_d2 = [54.9, 52.8, 54.6, 52.0, 46.0]
-low_income_after_d2 = [44.9, 41.4, 41.8, 40.2, 33.6]
-
-# Data for Dashboard 3
-sankey_data_d3 = {
-    'node_labels': ["Total Housing Budget", "Tax Incentives", "Remaining Budget",
-                    "Affordable Housing Programs", "Rental Assistance", "Other Housing Initiatives"],
-    'node_colors': ["#3498db", "#e74c3c", "#2980b9", "#27ae60", "#8e44ad", "#f39c12"],
-    'link_sources': [0, 0, 2, 2, 2],
-    'link_targets': [1, 2, 3, 4, 5],
-    'link_values': [27.8, 72.2, 24, 28.2, 20],
-    'link_colors': ["rgba(231, 76, 60, 0.4)", "rgba(41, 128, 185, 0.4)",
-                    "rgba(39, 174, 96, 0.4)", "rgba(142, 68, 173, 0.4)", "rgba(243, 156, 18, 0.4)"]
-}
-waterfall_data_d3 = {
-    'measures': ['relative', 'relative', 'total'],
-    'labels': ['Tax Savings', 'Rent Reduction', 'Net Gain'],
-    'text_values': ['€7,313', '−€1,440', '€5,873'],
-    'values': [7312.68, -1440, None]
+    try:
+        return pd.read_csv(StringIO(data_radar), delimiter=';')
+    except Exception:
+        # Reported by build_dashboard1_data (this also runs on figure worker threads)
+        return pd.DataFrame(columns=['Year', 'Access to Housing', 'Unemployment', 'Political Issues', 'Job Quality', 'Immigration', 'Economic Crisis'])
+
+@st.cache_resource(show_spinner=False)
+def load_dashboard2_data():
+    """
+    Data of Dashboard 2, built once per process and shared by all sessions (do not modify).
+
+    Returns:
+    SimpleNamespace: Scenario, incentive, affordability and operational data.
+    """
+    d2 = SimpleNamespace()
+    d2.districts = [
+        "Salamanca", "Centro", "Chamberí", "Chamartín", "Arganzuela",
+        "Tetuán", "Retiro", "Moncloa-Aravaca", "Fuencarral-El Pardo", "Usera"
+    ]
+    d2.before_control = np.array([25, 24, 23, 22, 20, 18, 21, 19, 17, 16])
+    d2.after_control = np.array([21, 20, 20, 19, 18, 16, 18, 17, 15, 14])
+    d2.reduction_percent = ((d2.before_control - d2.after_control) / d2.before_control) * 100
+    d2.scenario_data = pd.DataFrame({
+        "District": d2.districts,
+        "Before Control (€/m²)": d2.before_control,
+        "After Control (€/m²)": d2.after_control,
+        "Reduction (%)": d2.reduction_percent
+    })
+    d2.incentive_levels = ['No Incentives', 'Partial Incentives', 'Full Incentives']
+    d2.participation_rates = [10, 40, 70]
+    d2.rent_increase = [5.0, 3.0, 1.5]
+    d2.net_benefit = [0, 3000, 5873]
+    d2.tenant_categories = ["Low-Income Renters", "Middle-Income Renters", "Young Professionals"]
+    d2.before_burden = [51.7, 35.4, 41.2]
+    d2.after_burden = [39.4, 25.9, 30.9]
+    d2.improvement = [(b-a)/b*100 for b, a in zip(d2.before_burden, d2.after_burden)]
+    d2.operational_data = {
+        "District": d2.districts,
+        "Current Rent (€/m²)": d2.before_control,
+        "Priority Score": [9, 8, 8, 7, 6, 5, 7, 6, 5, 4],
+        "Implementation Timeline (months)": [1, 1, 1.5, 2, 3, 3, 2.5, 2, 4, 4],
+        "Incentive Level": ["High", "High", "High", "Medium", "Medium", "Low", "Medium", "Medium", "Low", "Low"]
+    }
+    d2.ops_df = pd.DataFrame(d2.operational_data)
+    d2.districts_subset = ["Salamanca", "Centro", "Chamberí", "Retiro", "Arganzuela"]
+    d2.youth_before = [42.5, 39.3, 39.9, 44.4, 41.2]
+    d2.youth_after = [29.7, 29.0, 30.3, 31.6, 30.0]
+    d2.low_income_before = [54.9, 52.8, 54.6, 52.0, 46.0]
+    d2.low_income_after = [44.9, 41.4, 41.8, 40.2, 33.6]
+    return d2
+
+@st.cache_resource(show_spinner=False)
+def load_dashboard3_data():
+    """
+    Data of Dashboard 3, built once per process and shared by all sessions (do not modify).
+
+    Returns:
+    SimpleNamespace: Budget flows, waterfall, revenue, correlation and district analysis data.
+    """
+    d3 = SimpleNamespace()
+    d3.sankey_data = {
+        'node_labels': ["Total Housing Budget", "Tax Incentives", "Remaining Budget",
+                        "Affordable Housing Programs", "Rental Assistance", "Other Housing Initiatives"],
+        'node_colors': ["#3498db", "#e74c3c", "#2980b9", "#27ae60", "#8e44ad", "#f39c12"],
+        'link_sources': [0, 0, 2, 2, 2],
+        'link_targets': [1, 2, 3, 4, 5],
+        'link_values': [27.8, 72.2, 24, 28.2, 20],
+        'link_colors': ["rgba(231, 76, 60, 0.4)", "rgba(41, 128, 185, 0.4)",
+                        "rgba(39, 174, 96, 0.4)", "rgba(142, 68, 173, 0.4)", "rgba(243, 156, 18, 0.4)"]
+    }
+    d3.waterfall_data = {
+        'measures': ['relative', 'relative', 'total'],
+        'labels': ['Tax Savings', 'Rent Reduction', 'Net Gain'],
+        'text_values': ['€7,313', '−€1,440', '€5,873'],
+        'values': [7312.68, -1440, None]
+    }
+    d3.years = list(range(2025, 2035))
+    d3.current_property_tax = CURRENT_PROPERTY_TAX
+    d3.social_impact = 25.2
+    # Same draws as np.random.seed(42), without touching the global random state
+    rng = np.random.RandomState(42)
+    d3.incentive_amounts = np.linspace(0, 10000, 20)
+    d3.base_participation = 5
+    d3.noise = rng.normal(0, 5, 20)
+    d3.participation_rates = np.clip(d3.base_participation + d3.incentive_amounts * 0.006 + d3.noise, 0, 100)
+    d3.correlation = np.corrcoef(d3.incentive_amounts, d3.participation_rates)[0, 1]
+    d3.r_squared = d3.correlation ** 2
+    # Percentile intervals of the correlation, R² and trendline (RESAMPLES bootstrap resamples)
+    d3.bootstrap = bootstrap_regression(d3.incentive_amounts, d3.participation_rates)
+    d3.districts = [
+        "Salamanca", "Centro", "Chamberí", "Chamartín", "Arganzuela",
+        "Tetuán", "Retiro", "Moncloa-Aravaca", "Fuencarral-El Pardo", "Usera"
+    ]
+    d3.affordability_improvement = [30.1, 26.5, 24.3, 23.7, 20.5, 19.8, 22.1, 21.5, 18.7, 17.2]
+    d3.incentive_cost = [235, 220, 210, 190, 160, 150, 180, 175, 140, 125]
+    d3.implementation_complexity = [4, 4, 3, 3, 2, 2, 3, 3, 2, 1]
+    d3.roi_ratio = [a/c * 100 for a, c in zip(d3.affordability_improvement, np.array(d3.incentive_cost)/100)]
+    d3.district_analysis = pd.DataFrame({
+        'District': d3.districts,
+        'Affordability Improvement (%)': d3.affordability_improvement,
+        'Incentive Cost (€/unit)': d3.incentive_cost,
+        'Implementation Complexity': d3.implementation_complexity,
+        'ROI Ratio': d3.roi_ratio
+    })
+    return d3
+
+PAGE_DATA_PROVIDERS = {
+    'dashboard1': load_dashboard1_data,
+    'dashboard2': load_dashboard2_data,
+    'dashboard3': load_dashboard3_data,
 }
-years_d3 = list(range(2025, 2035))
-current_property_tax_d3 = 500
-social_impact_d3 = 25.2
-np.random.seed(42)
-incentive_amounts_d3 = np.linspace(0, 10000, 20)
-base_participation_d3 = 5
-noise_d3 = np.random.normal(0, 5, 20)
-participation_rates_d3 = np.clip(base_participation_d3 + incentive_amounts_d3 * 0.006 + noise_d3, 0, 100)
-correlation_d3 = np.corrcoef(incentive_amounts_d3, participation_rates_d3)[0, 1]
-r_squared_d3 = correlation_d3 ** 2
-districts_d3 = [
-    "Salamanca", "Centro", "Chamberí", "Chamartín", "Arganzuela",
-    "Tetuán", "Retiro", "Moncloa-Aravaca", "Fuencarral-El Pardo", "Usera"
-]
-affordability_improvement_d3 = [30.1, 26.5, 24.3, 23.7, 20.5, 19.8, 22.1, 21.5, 18.7, 17.2]
-incentive_cost_d3 = [235, 220, 210, 190, 160, 150, 180, 175, 140, 125]
-implementation_complexity_d3 = [4, 4, 3, 3, 2, 2, 3, 3, 2, 1]
-roi_ratio_d3 = [a/c * 100 for a, c in zip(affordability_improvement_d3, np.array(incentive_cost_d3)/100)]
-district_analysis_d3 = pd.DataFrame({
-    'District': districts_d3,
-    'Affordability Improvement (%)': affordability_improvement_d3,
-    'Incentive Cost (€/unit)': incentive_cost_d3,
-    'Implementation Complexity': implementation_complexity_d3,
-    'ROI Ratio': roi_ratio_d3
-})
 
 # --- Helper Functions ---
-# Helper for Dashboard 1 Map
-def get_color_d1(val, min_val, max_val):
-    """Compute a hex color (red scale) based on the normalized value."""
-    if max_val > min_val:
-        norm = (val - min_val) / (max_val - min_val)
-    else:
-        norm = 0
-    red_level = int(norm * 255)
-    return f"#{red_level:02x}0000"
+# Classification of the Dashboard 1 map colors (label -> colormap method)
+MAP_COLOR_METHODS_D1 = {"Continuous": "linear", "Quantiles": "quantile", "Natural Breaks": "jenks"}
+
+def sync_selected_districts_d1():
+    """Copy the sidebar multiselect into the selection shared with the map."""
+    st.session_state.selected_districts = list(st.session_state.d1_districts_multiselect)
 
 def toggle_district_d1(district):
     """Toggle a district in the session state for D1 map interaction."""
@@ -301,20 +383,111 @@ def reset_filters_d2(): pass
 def reset_filters_d3(): pass
 
 # --- Dashboard 1: Strategic Overview ---
-def display_dashboard1_sidebar():
+# Figure builders, run as FigureTasks (see figure_tasks_d1): built concurrently, memoized by
+# their inputs and shared by all sessions. Do not modify the figures they return.
+def line_figure_d1(d1, data_key, selected_districts):
+    """Rent by date of the selected districts (all if none) and the overall mean."""
+    df_line_d1 = d1.df_avg.copy()
+    if selected_districts:
+        df_line_d1 = d1.df_avg[d1.df_avg['District'].isin(selected_districts)]
+        line_title = "Average Rent Price by Date - " + ", ".join(selected_districts)
+        overall_opacity = 0.2
+    else:
+        line_title = "Average Rent Price by Date (All Districts)"
+        overall_opacity = 1
+
+    fig_line = px.line(df_line_d1, x="Date", y="Rent_Price", color="District", title=line_title)
+    if not d1.overall_df.empty:
+        fig_line.add_trace(
+            go.Scatter(
+                x=d1.overall_df['Date'], y=d1.overall_df['Rent_Price'], mode='lines',
+                name='Overall Mean', line=dict(dash='dash', color='black'), opacity=overall_opacity
+            )
+        )
+    fig_line.update_layout(
+        yaxis_title="Rent Price (€ per M²)",
+        yaxis_range=[7, 26],
+        xaxis_range=[pd.to_datetime('2008-08-01'), d1.df_prices['Date'].max() if not d1.df_prices.empty else pd.to_datetime('today')],
+        margin=dict(l=40, r=20, t=50, b=10), height=250, legend=dict(font=dict(size=10))
+    )
+    return fig_line
+
+def map_colors_d1(d1, colors_label):
+    """Fill color of each district and the map legend for a "Map Colors" option."""
+    # Breaks computed once per data version; all districts colored in one call
+    method = MAP_COLOR_METHODS_D1[colors_label]
+    scale = load_color_scale(method) if d1.district_avgs else build_color_scale([], method)
+    district_names = [feature['properties'].get('NOMBRE', 'Unknown') for feature in d1.geojson_data['features']]
+    avg_rents = [d1.district_avgs.get(name, d1.min_rent) for name in district_names]
+    fill_colors = dict(zip(district_names, map_colors(avg_rents, scale).tolist()))
+    legend_html = colormap_legend_html(
+        scale, "Avg Rent (€/m²)",
+        "position: absolute; bottom: 10px; left: 10px; width: 150px; z-index:9999; font-size:12px; background-color:white; border:1px solid grey; padding:5px;"
+    )
+    return fill_colors, legend_html
+
+def youth_figure_d1(d1, youth_key):
+    fig1 = go.Figure()
+    if not d1.df_youth.empty:
+        fig1.add_trace(go.Bar(x=d1.df_youth["Year"], y=d1.df_youth["Average_Youth_Salary"], name="Avg Youth Salary", marker_color="lightgray"))
+        fig1.add_trace(go.Bar(x=d1.df_youth["Year"], y=d1.df_youth["Average_Monthly_Rent"], name="Avg Monthly Rent", marker_color="#dcef6e"))
+        fig1.add_trace(go.Scatter(x=d1.df_youth["Year"], y=d1.df_youth["Average_Youth_Salary"], mode="lines+markers", name="Salary Trend", line=dict(color="darkgray")))
+        fig1.add_trace(go.Scatter(x=d1.df_youth["Year"], y=d1.df_youth["Average_Monthly_Rent"], mode="lines+markers", name="Rent Trend", line=dict(color="#b0c74a")))
+    fig1.update_layout(
+        barmode="group", xaxis_title="Year", yaxis_title="Amount in €", title="Average Youth Salary vs Average Monthly Rent Prices",
+        xaxis_tickangle=-45, yaxis_range=[600, 1200] if not d1.df_youth.empty else [0,1], margin=dict(l=40, r=20, t=50, b=40), height=250,
+        legend=dict(font=dict(size=10))
+    )
+    return fig1
+
+def burden_figure_d1():
+    df_bar_d1 = pd.DataFrame({"Region": ["Madrid", "Europe"], "Percentage": [63, 40]})
+    fig2 = px.bar(df_bar_d1, x="Percentage", y="Region", orientation="h", text="Percentage", title="Rent Burden: Madrid vs Europe")
+    fig2.update_traces(texttemplate='%{text}%', textposition='outside')
+    fig2.update_layout(xaxis_range=[0, 100], yaxis={'categoryorder':'total ascending'}, margin=dict(l=40, r=20, t=50, b=40), height=150, legend=dict(font=dict(size=10)))
+    return fig2
+
+def radar_figure_d1():
+    df_radar = radar_frame_d1()
+    fig3 = go.Figure()
+    if not df_radar.empty:
+        categories = list(df_radar.columns[1:])
+        for index, row in df_radar.iterrows():
+            values = row[categories].tolist()
+            values += values[:1]
+            cats = categories + [categories[0]]
+            fig3.add_trace(go.Scatterpolar(r=values, theta=cats, fill='toself', name=str(row['Year'])))
+    fig3.update_layout(
+        polar=dict(radialaxis=dict(visible=True, range=[0, 10])),
+        showlegend=True, margin=dict(l=40, r=20, t=50, b=40), height=250, legend=dict(font=dict(size=10))
+    )
+    return fig3
+
+def figure_tasks_d1(d1, selected_districts):
+    """Figures of Dashboard 1 for the districts selected on the map."""
+    return [
+        FigureTask('line', line_figure_d1, d1, (d1.data_key, selected_districts)),
+        FigureTask('youth', youth_figure_d1, d1, (d1.youth_key,)),
+        FigureTask('burden', burden_figure_d1, None, ()),
+        FigureTask('radar', radar_figure_d1, None, ()),
+    ]
+
+def display_dashboard1_sidebar(d1):
     with st.sidebar:
         st.markdown("<div style='margin-top: 30px;'></div>", unsafe_allow_html=True)
         st.header("Filters", anchor="d1_filters")
-        district_list = sorted(df_prices_d1['District'].unique())
-        selected_districts = st.multiselect(
+        district_list = sorted(d1.df_prices['District'].unique())
+        # The map toggles districts too: the widget starts from the shared selection (a keyed
+        # widget would otherwise keep its own value and undo the clicks)
+        st.session_state.d1_districts_multiselect = list(st.session_state.selected_districts)
+        st.multiselect(
             "Select Districts (Map/Line)",
             options=district_list,
-            default=st.session_state.selected_districts,
             help="Select districts to filter the line chart and highlight on the map.",
-            key="d1_districts_multiselect"
+            key="d1_districts_multiselect",
+            on_change=sync_selected_districts_d1
         )
-        # Update session state based on multiselect interaction
-        st.session_state.selected_districts = selected_districts
+        st.radio("Map Colors", options=list(MAP_COLOR_METHODS_D1), horizontal=True, key="d1_map_colors")
 
         st.markdown("<hr>", unsafe_allow_html=True)
         st.subheader("KPI Filter")
@@ -324,84 +497,60 @@ def display_dashboard1_sidebar():
             index=0,
             key="d1_kpi_district_selectbox"
         )
+        # Date window for the KPIs, the full history by default; answered in constant time by the rent index
+        kpi_window = None
+        if len(d1.rent_index.months):
+            month_options = list(pd.to_datetime(d1.rent_index.months).date)
+            kpi_window = st.select_slider(
+                "KPI Date Window",
+                options=month_options,
+                value=default_kpi_window(d1.rent_index),
+                format_func=lambda d: d.strftime('%b %Y'),
+                key="d1_kpi_window_slider"
+            )
         # Note: required_income_district filter is moved to main content area in d1
-        return kpi_district
+        return kpi_district, kpi_window
 
-def display_dashboard1_content(kpi_district):
+def kpi_table_for_window_d1(d1, kpi_window):
+    """KPI table for the selected window (the default table when there is no data to window)."""
+    if not kpi_window:
+        return d1.kpi_table
+    return window_kpi_table(d1.rent_index, *kpi_window)
+
+def display_dashboard1_content(d1, kpi_district, kpi_window=None):
+    kpi_table = kpi_table_for_window_d1(d1, kpi_window)
+    figures = run_tasks(figure_tasks_d1(d1, tuple(st.session_state.selected_districts)))
     col1, col2 = st.columns(2)
 
     with col1:
         # --- Container 1: Line Chart ---
         with st.container():
-            df_line_d1 = df_avg_d1.copy()
-            if st.session_state.selected_districts:
-                df_line_d1 = df_avg_d1[df_avg_d1['District'].isin(st.session_state.selected_districts)]
-                line_title = "Average Rent Price by Date - " + ", ".join(st.session_state.selected_districts)
-                default_opacity = 1
-                overall_opacity = 0.2
-            else:
-                line_title = "Average Rent Price by Date (All Districts)"
-                default_opacity = 0.5
-                overall_opacity = 1
-
-            fig_line = px.line(df_line_d1, x="Date", y="Rent_Price", color="District", title=line_title)
-            if not overall_df_d1.empty:
-                fig_line.add_trace(
-                    go.Scatter(
-                        x=overall_df_d1['Date'], y=overall_df_d1['Rent_Price'], mode='lines',
-                        name='Overall Mean', line=dict(dash='dash', color='black'), opacity=overall_opacity
-                    )
-                )
-            fig_line.update_layout(
-                yaxis_title="Rent Price (€ per M²)",
-                yaxis_range=[7, 26],
-                xaxis_range=[pd.to_datetime('2008-08-01'), df_prices_d1['Date'].max() if not df_prices_d1.empty else pd.to_datetime('today')],
-                margin=dict(l=40, r=20, t=50, b=10), height=250, legend=dict(font=dict(size=10))
-            )
+            fig_line = figures['line']
             st.plotly_chart(fig_line, use_container_width=True, config={'displayModeBar': False})
 
         # --- Container 2: Map ---
         with st.container():
-            m = folium.Map(location=[40.417101, -3.695899], zoom_start=10, tiles="cartodbpositron")
-            if geojson_data_d1:
-                for feature in geojson_data_d1['features']:
-                    district_name = feature['properties'].get('NOMBRE', 'Unknown')
-                    avg_rent = district_avgs_d1.get(district_name, min_rent_d1)
-                    fill_color = get_color_d1(avg_rent, min_rent_d1, max_rent_d1)
-                    folium.GeoJson(
-                        feature,
-                        style_function=lambda x, fill_color=fill_color: {
-                            'fillColor': fill_color,
-                            'color': 'gray', 'weight': 1, 'fillOpacity': 0.6,
-                        },
-                        popup=district_name,
-                        tooltip=folium.GeoJsonTooltip(fields=["NOMBRE"], aliases=["District:"]),
-                        highlight_function=lambda x: {'weight': 3, 'fillOpacity': 0.9},
-                    ).add_to(m)
-                legend_html = """
-                <div style="position: absolute; bottom: 10px; left: 10px; width: 150px; z-index:9999; font-size:12px; background-color:white; border:1px solid grey; padding:5px;">
-                <div style="text-align:center; margin-bottom: 5px;"><b>Avg Rent (€/m²)</b></div>
-                <div style="width:100%; height:10px; background: linear-gradient(to right, #000000, #ff0000); margin-bottom: 3px;"></div>
-                <div style="font-size:10px;">{min_rent_d1:.1f}<span style="float:right;">{max_rent_d1:.1f}</span></div>
-                </div>
-                """.format(min_rent_d1=min_rent_d1, max_rent_d1=max_rent_d1)
-                m.get_root().html.add_child(folium.Element(legend_html))
-
-            # Use a unique key for the map
-            map_result = st_folium(m, key="d1_map", width=700, height=250)
-            if map_result and map_result.get("last_object_clicked") is not None:
-                clicked = map_result["last_object_clicked"]
-                district_clicked = clicked.get("popup")
-                if district_clicked:
-                    toggle_district_d1(district_clicked)
-                    st.rerun() # Use rerun instead of experimental_rerun
+            if d1.geojson_data:
+                fill_colors, legend_html = map_colors_d1(d1, st.session_state.get("d1_map_colors", "Continuous"))
+                # One styled layer, rendered once per (colors, selection) and reused across reruns
+                map_result = st_choropleth(
+                    d1.geojson_data, fill_colors, selected=st.session_state.selected_districts,
+                    legend_html=legend_html, key="d1_map", width=700, height=250
+                )
+            else:
+                m = folium.Map(location=[40.417101, -3.695899], zoom_start=10, tiles="cartodbpositron")
+                # Use a unique key for the map
+                map_result = st_folium(m, key="d1_map", width=700, height=250)
+            district_clicked = clicked_district(map_result, st.session_state, "d1_map_last_click")
+            if district_clicked:
+                toggle_district_d1(district_clicked)
+                st.rerun() # Use rerun instead of experimental_rerun
 
         # --- Container 3: Buckets (4 Metrics) ---
         with st.container():
             bucket1_col, bucket2_col, bucket3_col, bucket4_col = st.columns(4)
             with bucket1_col:
-                # Pass kpi_district directly
-                cagr_value = bucket_1(df_prices_d1, kpi_district)
+                cagr_value = kpi_value(kpi_table, kpi_district, 'CAGR')
                 # Format the CAGR value with % sign if it's a number
                 if cagr_value != "N/A":
                     value1 = f"{cagr_value:.1f}%"
@@ -410,8 +559,7 @@ def display_dashboard1_content(kpi_district):
                 st.metric(label="CAGR", value=value1)
                 st.caption("Annual growth rate (%)")
             with bucket2_col:
-                # Pass kpi_district directly
-                max_price = bucket_2(df_prices_d1, kpi_district)
+                max_price = kpi_value(kpi_table, kpi_district, 'Max_Rent')
                 # Format the max price with € sign
                 if max_price != "N/A":
                     value2 = f"€{max_price:.1f}"
@@ -420,8 +568,7 @@ def display_dashboard1_content(kpi_district):
                 st.metric(label="Max Rental", value=value2)
                 st.caption("Max Rent recorded (€/m²)")
             with bucket3_col:
-                # Pass kpi_district directly
-                rank = bucket_3(df_prices_d1, kpi_district)
+                rank = kpi_value(kpi_table, kpi_district, 'Rank')
                 # Format the rank with # sign
                 if rank != "N/A":
                     value3 = f"#{rank}"
@@ -430,8 +577,7 @@ def display_dashboard1_content(kpi_district):
                 st.metric(label="Ranking", value=value3)
                 st.caption("Rank by Avg Rent Price")
             with bucket4_col:
-                # Pass kpi_district directly
-                avg_price = bucket_4(df_prices_d1, kpi_district)
+                avg_price = kpi_value(kpi_table, kpi_district, 'Avg_Rent')
                 # Format the avg price with € sign
                 if avg_price != "N/A":
                     value4 = f"€{avg_price:.1f}"
@@ -442,32 +588,22 @@ def display_dashboard1_content(kpi_district):
 
     with col2:
         # --- Graph 1: Youth Salary vs Rent Prices ---
-        fig1 = go.Figure()
-        if not df_youth_d1.empty:
-            fig1.add_trace(go.Bar(x=df_youth_d1["Year"], y=df_youth_d1["Average_Youth_Salary"], name="Avg Youth Salary", marker_color="lightgray"))
-            fig1.add_trace(go.Bar(x=df_youth_d1["Year"], y=df_youth_d1["Average_Monthly_Rent"], name="Avg Monthly Rent", marker_color="#dcef6e"))
-            fig1.add_trace(go.Scatter(x=df_youth_d1["Year"], y=df_youth_d1["Average_Youth_Salary"], mode="lines+markers", name="Salary Trend", line=dict(color="darkgray")))
-            fig1.add_trace(go.Scatter(x=df_youth_d1["Year"], y=df_youth_d1["Average_Monthly_Rent"], mode="lines+markers", name="Rent Trend", line=dict(color="#b0c74a")))
-        fig1.update_layout(
-            barmode="group", xaxis_title="Year", yaxis_title="Amount in €", title="Average Youth Salary vs Average Monthly Rent Prices",
-            xaxis_tickangle=-45, yaxis_range=[600, 1200] if not df_youth_d1.empty else [0,1], margin=dict(l=40, r=20, t=50, b=40), height=250,
-            legend=dict(font=dict(size=10))
-        )
+        fig1 = figures['youth']
         st.plotly_chart(fig1, use_container_width=True, config={'displayModeBar': False})
 
         col4, col5 = st.columns([1,2])
         with col4:
             # --- New Filter and Bucket: Required Income --- Moved from sidebar
             with st.container():
-                district_list_req = sorted(df_prices_d1['District'].unique())
+                district_list_req = sorted(d1.df_prices['District'].unique())
                 required_income_district = st.selectbox(
                     "District for Req. Income",
                     options=["All"] + district_list_req,
                     index=0,
                     key="d1_required_income_district_selectbox"
                 )
-                # Pass required_income_district directly to bucket_4 for calculation
-                avg_rent_price = bucket_4(df_prices_d1, required_income_district)
+                # Average rent of the selected district from the precomputed KPI table
+                avg_rent_price = kpi_value(d1.kpi_table, required_income_district, 'Avg_Rent')
                 # Check if avg_rent_price is a valid number
                 if avg_rent_price != "N/A":
                     # Calculate required income
@@ -480,26 +616,12 @@ def display_dashboard1_content(kpi_district):
                 st.caption("Net income (40% rent)")
         with col5:
             # --- Graph 2: Comparison: Madrid vs Europe --- Moved from d1
-            df_bar_d1 = pd.DataFrame({"Region": ["Madrid", "Europe"], "Percentage": [63, 40]})
-            fig2 = px.bar(df_bar_d1, x="Percentage", y="Region", orientation="h", text="Percentage", title="Rent Burden: Madrid vs Europe")
-            fig2.update_traces(texttemplate='%{text}%', textposition='outside')
-            fig2.update_layout(xaxis_range=[0, 100], yaxis={'categoryorder':'total ascending'}, margin=dict(l=40, r=20, t=50, b=40), height=150, legend=dict(font=dict(size=10)))
+            fig2 = figures['burden']
             st.plotly_chart(fig2, use_container_width=True, config={'displayModeBar': False})
 
         # --- Graph 3: Concerns Comparison Radar Chart ---
         st.markdown("<h6>Concerns Comparison (2014 vs 2024)</h6>", unsafe_allow_html=True)
-        fig3 = go.Figure()
-        if not df_radar_d1.empty:
-            categories = list(df_radar_d1.columns[1:])
-            for index, row in df_radar_d1.iterrows():
-                values = row[categories].tolist()
-                values += values[:1]
-                cats = categories + [categories[0]]
-                fig3.add_trace(go.Scatterpolar(r=values, theta=cats, fill='toself', name=str(row['Year'])))
-        fig3.update_layout(
-            polar=dict(radialaxis=dict(visible=True, range=[0, 10])),
-            showlegend=True, margin=dict(l=40, r=20, t=50, b=40), height=250, legend=dict(font=dict(size=10))
-        )
+        fig3 = figures['radar']
         st.plotly_chart(fig3, use_container_width=True, config={'displayModeBar': False})
 
     # Footer for Dashboard 1 (optional, can be standardized)
@@ -510,55 +632,183 @@ def display_dashboard1_content(kpi_district):
     """, unsafe_allow_html=True)
 
 # --- Dashboard 2: Tactical Decisions ---
-def display_dashboard2_sidebar():
-    with st.sidebar:
-        st.header("Implementation Controls")
-        selected_districts = st.multiselect("Select districts to analyze:", districts_d2, default=[], key="d2_districts")
-        incentive_level = st.select_slider("Incentive level for landlords:", options=incentive_levels_d2, value="Full Incentives", key="d2_incentive_level")
-        implementation_timeline = st.slider("Timeline (months):", min_value=1, max_value=12, value=4, step=1, key="d2_timeline")
-        st.subheader("Additional Filters")
-        tenant_category = st.multiselect("Tenant categories to analyze:", tenant_categories_d2, default=["Low-Income Renters", "Young Professionals"], key="d2_tenant_category")
-        st.button("Reset All Filters", on_click=reset_filters_d2, key="d2_reset")
-        return selected_districts, incentive_level, implementation_timeline, tenant_category
+# Sidebar values of a fresh visit (widget state is dropped when the user leaves the page)
+DEFAULTS_D2 = {
+    "selected_districts": [],
+    "incentive_level": "Full Incentives",
+    "implementation_timeline": 4,
+    "tenant_category": ["Low-Income Renters", "Young Professionals"],
+}
 
-def display_dashboard2_content(selected_districts, incentive_level, implementation_timeline, tenant_category):
-    # Update data based on selections
-    incentive_index = incentive_levels_d2.index(incentive_level)
-    selected_participation = participation_rates_d2[incentive_index]
-    selected_rent_increase = rent_increase_d2[incentive_index]
-    selected_benefit = net_benefit_d2[incentive_index]
+# Figure builders, run as FigureTasks like the Dashboard 1 ones (see figure_tasks_d2)
+def comparison_figure_d2(d2, selected_districts):
+    scenario_data_filtered = d2.scenario_data[d2.scenario_data['District'].isin(selected_districts)] if selected_districts else d2.scenario_data
+    fig_comparison = go.Figure()
+    if not scenario_data_filtered.empty:
+        fig_comparison.add_trace(go.Bar(
+            x=scenario_data_filtered["District"], y=scenario_data_filtered["Before Control (€/m²)"],
+            name="Before Control", marker_color='#ff7f0e'
+        ))
+        fig_comparison.add_trace(go.Bar(
+            x=scenario_data_filtered["District"], y=scenario_data_filtered["After Control (€/m²)"],
+            name="After Control", marker_color='#2ca02c'
+        ))
+        fig_comparison.add_trace(go.Scatter(
+            x=scenario_data_filtered["District"], y=scenario_data_filtered["Reduction (%)"],
+            mode='lines+markers', name='Reduction (%)', yaxis='y2',
+            line=dict(color='red', width=2), marker=dict(size=6)
+        ))
+    fig_comparison.update_layout(
+        title=dict(text="Rent Price Impact by District", y=1, x=0.5, xanchor='center', yanchor='top', pad=dict(t=15, b=10)),
+        xaxis_title=None, yaxis_title="Rent Price (€/m²)",
+        yaxis2=dict(title="Reduction (%)", overlaying="y", side="right", range=[0, max(d2.reduction_percent) * 1.2]),
+        barmode='group',
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        height=250, margin=dict(l=30, r=30, t=60, b=40), font=dict(size=10)
+    )
+    return fig_comparison
 
-    if selected_districts:
-        scenario_data_filtered = scenario_data_d2[scenario_data_d2['District'].isin(selected_districts)]
-        ops_df_filtered = ops_df_d2[ops_df_d2['District'].isin(selected_districts)]
-    else:
-        scenario_data_filtered = scenario_data_d2
-        ops_df_filtered = ops_df_d2
+def incentives_figure_d2(d2, incentive_level):
+    fig_incentives = make_subplots(specs=[[{"secondary_y": True}]])
+    fig_incentives.add_trace(go.Bar(
+        x=d2.incentive_levels, y=d2.participation_rates, name="Landlord Participation",
+        marker_color='#1f77b4', text=[f"{rate}%" for rate in d2.participation_rates],
+        textposition='auto', textfont=dict(size=9)
+    ), secondary_y=False)
+    fig_incentives.add_trace(go.Scatter(
+        x=d2.incentive_levels, y=d2.rent_increase, name="Rent Increase", mode='lines+markers',
+        line=dict(color='red', width=2), marker=dict(size=8)
+    ), secondary_y=True)
+    fig_incentives.add_shape(
+        type="rect", x0=d2.incentive_levels.index(incentive_level) - 0.4, x1=d2.incentive_levels.index(incentive_level) + 0.4,
+        y0=0, y1=d2.participation_rates[d2.incentive_levels.index(incentive_level)] + 5,
+        line=dict(color="blue", width=2), fillcolor="rgba(0, 123, 255, 0.3)"
+    )
+    for i, level in enumerate(d2.incentive_levels):
+        if d2.net_benefit[i] > 0:
+            font_size = 12 if level == incentive_level else 10
+            font_color = "black" if level == incentive_level else "white"
+            bg_color = "rgba(255, 255, 0, 0.7)" if level == incentive_level else None
+            fig_incentives.add_annotation(
+                x=level, y=d2.participation_rates[i]/2, text=f"€{d2.net_benefit[i]:,}", showarrow=False,
+                font=dict(size=font_size, color=font_color, family="Arial"), bgcolor=bg_color,
+                borderpad=2 if level == incentive_level else 0
+            )
+    fig_incentives.update_layout(
+        title=dict(text="Landlord Participation & Incentives", y=1, x=0.5, xanchor='center', yanchor='top', pad=dict(t=15, b=10)),
+        xaxis_title=None,
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1, font=dict(size=9)),
+        height=250, margin=dict(l=30, r=30, t=60, b=30), font=dict(size=10)
+    )
+    fig_incentives.update_yaxes(title_text="Participation Rate (%)", secondary_y=False)
+    fig_incentives.update_yaxes(title_text="Rent Increase (%)", secondary_y=True, range=[0, 6])
+    return fig_incentives
+
+def operations_figure_d2(d2, selected_districts, implementation_timeline):
+    ops_df_filtered = d2.ops_df[d2.ops_df['District'].isin(selected_districts)] if selected_districts else d2.ops_df
+    fig_ops = px.scatter(
+        ops_df_filtered, x="Implementation Timeline (months)", y="Priority Score",
+        size="Current Rent (€/m²)", color="Incentive Level", hover_name="District", text="District",
+        size_max=30, color_discrete_map={"High": "red", "Medium": "orange", "Low": "green"}
+    ) if not ops_df_filtered.empty else go.Figure()
+    if not ops_df_filtered.empty:
+        fig_ops.add_shape(type="line", x0=implementation_timeline, y0=0, x1=implementation_timeline, y1=10, line=dict(color="blue", width=2, dash="dot"))
+        fig_ops.add_annotation(x=implementation_timeline, y=9.5, text=f"Target: {implementation_timeline} mo", showarrow=True, arrowhead=1, ax=20, ay=-20, font=dict(size=10))
+        fig_ops.update_traces(textposition='top center', marker=dict(opacity=0.8, line=dict(width=1, color='black')), textfont=dict(size=8))
+    fig_ops.update_layout(title="Implementation Strategy by District", xaxis_title=None, yaxis_title="Priority Score", legend_title="Incentive Level", height=250, margin=dict(l=30, r=30, t=40, b=30), font=dict(size=10), legend=dict(font=dict(size=9)))
+    return fig_ops
+
+def affordability_figure_d2(d2, tenant_category):
+    affordability_data = pd.DataFrame({"Tenant Category": d2.tenant_categories, "Before Control (%)": d2.before_burden, "After Control (%)": d2.after_burden, "Improvement (%)": d2.improvement})
+    affordability_data_filtered = affordability_data[affordability_data["Tenant Category"].isin(tenant_category)] if tenant_category else affordability_data
+    fig_afford = go.Figure()
+    if not affordability_data_filtered.empty:
+        fig_afford.add_trace(go.Bar(x=affordability_data_filtered["Tenant Category"], y=affordability_data_filtered["Before Control (%)"], name="Before", marker_color="#d62728", text=affordability_data_filtered["Before Control (%)"].apply(lambda x: f"{x:.1f}%"), textposition="auto", textfont=dict(size=9)))
+        fig_afford.add_trace(go.Bar(x=affordability_data_filtered["Tenant Category"], y=affordability_data_filtered["After Control (%)"], name="After", marker_color="#2ca02c", text=affordability_data_filtered["After Control (%)"].apply(lambda x: f"{x:.1f}%"), textposition="auto", textfont=dict(size=9)))
+        for i, cat in enumerate(affordability_data_filtered["Tenant Category"]):
+            idx = affordability_data[affordability_data["Tenant Category"] == cat].index[0]
+            fig_afford.add_annotation(x=cat, y=d2.after_burden[idx] - 3, text=f"↓{d2.improvement[idx]:.1f}%", showarrow=False, font=dict(size=9, color="black"))
+    fig_afford.update_layout(title="Impact on Housing Affordability", xaxis_title=None, yaxis_title="% Income on Rent", barmode="group", yaxis=dict(range=[0, max(d2.before_burden) * 1.1]), height=250, margin=dict(l=30, r=30, t=40, b=30), font=dict(size=10), legend=dict(orientation="h", y=1.02, x=1, font=dict(size=9)))
+    return fig_afford
 
+def district_affordability_figure_d2(d2, selected_districts, tenant_category):
     # Filter to only include selected districts that are also in the subset for district-specific impact
-    available_districts = [d for d in selected_districts if d in districts_subset_d2]
+    available_districts = [d for d in selected_districts if d in d2.districts_subset]
     if not available_districts and selected_districts: # Only filter if selection is made
         district_impact = pd.DataFrame(columns=["District", "Youth Before", "Youth After", "Low-Income Before", "Low-Income After"]) # Empty DF
     elif not selected_districts: # Show all if no selection
-         available_districts = districts_subset_d2
-         district_indices = [districts_subset_d2.index(d) for d in available_districts]
+         available_districts = d2.districts_subset
+         district_indices = [d2.districts_subset.index(d) for d in available_districts]
          district_impact = pd.DataFrame({
-            "District": [districts_subset_d2[i] for i in district_indices],
-            "Youth Before": [youth_before_d2[i] for i in district_indices],
-            "Youth After": [youth_after_d2[i] for i in district_indices],
-            "Low-Income Before": [low_income_before_d2[i] for i in district_indices],
-            "Low-Income After": [low_income_after_d2[i] for i in district_indices]
+            "District": [d2.districts_subset[i] for i in district_indices],
+            "Youth Before": [d2.youth_before[i] for i in district_indices],
+            "Youth After": [d2.youth_after[i] for i in district_indices],
+            "Low-Income Before": [d2.low_income_before[i] for i in district_indices],
+            "Low-Income After": [d2.low_income_after[i] for i in district_indices]
          })
     else: # Filter based on selection
-        district_indices = [districts_subset_d2.index(d) for d in available_districts]
+        district_indices = [d2.districts_subset.index(d) for d in available_districts]
         district_impact = pd.DataFrame({
-            "District": [districts_subset_d2[i] for i in district_indices],
-            "Youth Before": [youth_before_d2[i] for i in district_indices],
-            "Youth After": [youth_after_d2[i] for i in district_indices],
-            "Low-Income Before": [low_income_before_d2[i] for i in district_indices],
-            "Low-Income After": [low_income_after_d2[i] for i in district_indices]
+            "District": [d2.districts_subset[i] for i in district_indices],
+            "Youth Before": [d2.youth_before[i] for i in district_indices],
+            "Youth After": [d2.youth_after[i] for i in district_indices],
+            "Low-Income Before": [d2.low_income_before[i] for i in district_indices],
+            "Low-Income After": [d2.low_income_after[i] for i in district_indices]
         })
+    categories_to_show = []
+    if "Young Professionals" in tenant_category: categories_to_show.extend([("Youth Before", "#ff9999"), ("Youth After", "#99ff99")])
+    if "Low-Income Renters" in tenant_category: categories_to_show.extend([("Low-Income Before", "#ffcc99"), ("Low-Income After", "#99ccff")])
+    if not categories_to_show: categories_to_show = [("Youth Before", "#ff9999"), ("Youth After", "#99ff99"), ("Low-Income Before", "#ffcc99"), ("Low-Income After", "#99ccff")]
+    fig_district = go.Figure()
+    if not district_impact.empty:
+        for cat, color in categories_to_show:
+            if cat in district_impact.columns:
+                 fig_district.add_trace(go.Bar(x=district_impact["District"], y=district_impact[cat], name=cat, marker_color=color, text=district_impact[cat].apply(lambda x: f"{x:.1f}%"), textposition="auto", textfont=dict(size=9)))
+    fig_district.update_layout(title="District-Specific Affordability Impact", xaxis_title=None, yaxis_title="% Income on Rent", barmode="group", height=250, margin=dict(l=30, r=30, t=40, b=30), font=dict(size=10), legend=dict(orientation="h", y=1.02, x=1, font=dict(size=9)))
+    return fig_district
 
+# Views of the bottom right chart -> their figure task
+VIEW_TASKS_D2 = {
+    "Implementation Strategy": 'ops',
+    "General Affordability": 'afford',
+    "District Affordability": 'district',
+}
+
+def figure_tasks_d2(d2, selected_districts, incentive_level, implementation_timeline, tenant_category, names=None):
+    """Figures of Dashboard 2 for the sidebar values; names: tasks to include (None: every view, as the prefetch does)."""
+    selected_districts, tenant_category = tuple(selected_districts), tuple(tenant_category)
+    tasks = [
+        FigureTask('comparison', comparison_figure_d2, d2, (selected_districts,)),
+        FigureTask('incentives', incentives_figure_d2, d2, (incentive_level,)),
+        FigureTask('ops', operations_figure_d2, d2, (selected_districts, implementation_timeline)),
+        FigureTask('afford', affordability_figure_d2, d2, (tenant_category,)),
+        FigureTask('district', district_affordability_figure_d2, d2, (selected_districts, tenant_category)),
+    ]
+    return [task for task in tasks if names is None or task.name in names]
+
+def display_dashboard2_sidebar(d2):
+    with st.sidebar:
+        st.header("Implementation Controls")
+        selected_districts = st.multiselect("Select districts to analyze:", d2.districts, default=DEFAULTS_D2["selected_districts"], key="d2_districts")
+        incentive_level = st.select_slider("Incentive level for landlords:", options=d2.incentive_levels, value=DEFAULTS_D2["incentive_level"], key="d2_incentive_level")
+        implementation_timeline = st.slider("Timeline (months):", min_value=1, max_value=12, value=DEFAULTS_D2["implementation_timeline"], step=1, key="d2_timeline")
+        st.subheader("Additional Filters")
+        tenant_category = st.multiselect("Tenant categories to analyze:", d2.tenant_categories, default=DEFAULTS_D2["tenant_category"], key="d2_tenant_category")
+        st.button("Reset All Filters", on_click=reset_filters_d2, key="d2_reset")
+        return selected_districts, incentive_level, implementation_timeline, tenant_category
+
+def display_dashboard2_content(d2, selected_districts, incentive_level, implementation_timeline, tenant_category):
+    # Update data based on selections
+    incentive_index = d2.incentive_levels.index(incentive_level)
+    selected_participation = d2.participation_rates[incentive_index]
+    selected_rent_increase = d2.rent_increase[incentive_index]
+    selected_benefit = d2.net_benefit[incentive_index]
+
+    ops_df_filtered = d2.ops_df[d2.ops_df['District'].isin(selected_districts)] if selected_districts else d2.ops_df
+    # Only the view picked in the radio below is built (its value is known before it is drawn)
+    selected_tab = st.session_state.get("d2_tab_select", next(iter(VIEW_TASKS_D2)))
+    figures = run_tasks(figure_tasks_d2(d2, selected_districts, incentive_level, implementation_timeline, tenant_category,
+                                        names=('comparison', 'incentives', VIEW_TASKS_D2[selected_tab])))
 
     # Main dashboard layout
     row1_col1, row1_col2 = st.columns(2)
@@ -567,10 +817,10 @@ def display_dashboard2_content(selected_districts, incentive_level, implementati
     # Top left: KPIs
     with row1_col1:
         st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-        avg_before = np.mean(before_control_d2)
-        avg_after = np.mean(after_control_d2)
-        avg_burden_before = np.mean(before_burden_d2)
-        avg_burden_after = np.mean(after_burden_d2)
+        avg_before = np.mean(d2.before_control)
+        avg_after = np.mean(d2.after_control)
+        avg_burden_before = np.mean(d2.before_burden)
+        avg_burden_after = np.mean(d2.after_burden)
         priority_districts = len([d for d in ops_df_filtered['Priority Score'] if d >= 8]) if not ops_df_filtered.empty else 0
 
         st.markdown(f"""
@@ -608,111 +858,22 @@ def display_dashboard2_content(selected_districts, incentive_level, implementati
     # Top right: Rent Price Impact Chart
     with row1_col2:
         st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-        fig_comparison = go.Figure()
-        if not scenario_data_filtered.empty:
-            fig_comparison.add_trace(go.Bar(
-                x=scenario_data_filtered["District"], y=scenario_data_filtered["Before Control (€/m²)"],
-                name="Before Control", marker_color='#ff7f0e'
-            ))
-            fig_comparison.add_trace(go.Bar(
-                x=scenario_data_filtered["District"], y=scenario_data_filtered["After Control (€/m²)"],
-                name="After Control", marker_color='#2ca02c'
-            ))
-            fig_comparison.add_trace(go.Scatter(
-                x=scenario_data_filtered["District"], y=scenario_data_filtered["Reduction (%)"],
-                mode='lines+markers', name='Reduction (%)', yaxis='y2',
-                line=dict(color='red', width=2), marker=dict(size=6)
-            ))
-        fig_comparison.update_layout(
-            title=dict(text="Rent Price Impact by District", y=1, x=0.5, xanchor='center', yanchor='top', pad=dict(t=15, b=10)),
-            xaxis_title=None, yaxis_title="Rent Price (€/m²)",
-            yaxis2=dict(title="Reduction (%)", overlaying="y", side="right", range=[0, max(reduction_percent_d2) * 1.2]),
-            barmode='group',
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-            height=250, margin=dict(l=30, r=30, t=60, b=40), font=dict(size=10)
-        )
+        fig_comparison = figures['comparison']
         st.plotly_chart(fig_comparison, use_container_width=True, config={'displayModeBar': False})
         st.markdown('</div>', unsafe_allow_html=True)
 
     # Bottom Left: Landlord Incentives Chart
     with row2_col1:
         st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-        fig_incentives = make_subplots(specs=[[{"secondary_y": True}]])
-        fig_incentives.add_trace(go.Bar(
-            x=incentive_levels_d2, y=participation_rates_d2, name="Landlord Participation",
-            marker_color='#1f77b4', text=[f"{rate}%" for rate in participation_rates_d2],
-            textposition='auto', textfont=dict(size=9)
-        ), secondary_y=False)
-        fig_incentives.add_trace(go.Scatter(
-            x=incentive_levels_d2, y=rent_increase_d2, name="Rent Increase", mode='lines+markers',
-            line=dict(color='red', width=2), marker=dict(size=8)
-        ), secondary_y=True)
-        fig_incentives.add_shape(
-            type="rect", x0=incentive_levels_d2.index(incentive_level) - 0.4, x1=incentive_levels_d2.index(incentive_level) + 0.4,
-            y0=0, y1=participation_rates_d2[incentive_levels_d2.index(incentive_level)] + 5,
-            line=dict(color="blue", width=2), fillcolor="rgba(0, 123, 255, 0.3)"
-        )
-        for i, level in enumerate(incentive_levels_d2):
-            if net_benefit_d2[i] > 0:
-                font_size = 12 if level == incentive_level else 10
-                font_color = "black" if level == incentive_level else "white"
-                bg_color = "rgba(255, 255, 0, 0.7)" if level == incentive_level else None
-                fig_incentives.add_annotation(
-                    x=level, y=participation_rates_d2[i]/2, text=f"€{net_benefit_d2[i]:,}", showarrow=False,
-                    font=dict(size=font_size, color=font_color, family="Arial"), bgcolor=bg_color,
-                    borderpad=2 if level == incentive_level else 0
-                )
-        fig_incentives.update_layout(
-            title=dict(text="Landlord Participation & Incentives", y=1, x=0.5, xanchor='center', yanchor='top', pad=dict(t=15, b=10)),
-            xaxis_title=None,
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1, font=dict(size=9)),
-            height=250, margin=dict(l=30, r=30, t=60, b=30), font=dict(size=10)
-        )
-        fig_incentives.update_yaxes(title_text="Participation Rate (%)", secondary_y=False)
-        fig_incentives.update_yaxes(title_text="Rent Increase (%)", secondary_y=True, range=[0, 6])
+        fig_incentives = figures['incentives']
         st.plotly_chart(fig_incentives, use_container_width=True, config={'displayModeBar': False})
         st.markdown('</div>', unsafe_allow_html=True)
 
     # Bottom Right: Implementation Strategy / Affordability Impact
     with row2_col2:
         st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-        selected_tab = st.radio("Select View:", ["Implementation Strategy", "General Affordability", "District Affordability"], horizontal=True, key="d2_tab_select")
-        if selected_tab == "Implementation Strategy":
-            fig_ops = px.scatter(
-                ops_df_filtered, x="Implementation Timeline (months)", y="Priority Score",
-                size="Current Rent (€/m²)", color="Incentive Level", hover_name="District", text="District",
-                size_max=30, color_discrete_map={"High": "red", "Medium": "orange", "Low": "green"}
-            ) if not ops_df_filtered.empty else go.Figure()
-            if not ops_df_filtered.empty:
-                fig_ops.add_shape(type="line", x0=implementation_timeline, y0=0, x1=implementation_timeline, y1=10, line=dict(color="blue", width=2, dash="dot"))
-                fig_ops.add_annotation(x=implementation_timeline, y=9.5, text=f"Target: {implementation_timeline} mo", showarrow=True, arrowhead=1, ax=20, ay=-20, font=dict(size=10))
-                fig_ops.update_traces(textposition='top center', marker=dict(opacity=0.8, line=dict(width=1, color='black')), textfont=dict(size=8))
-            fig_ops.update_layout(title="Implementation Strategy by District", xaxis_title=None, yaxis_title="Priority Score", legend_title="Incentive Level", height=250, margin=dict(l=30, r=30, t=40, b=30), font=dict(size=10), legend=dict(font=dict(size=9)))
-            st.plotly_chart(fig_ops, use_container_width=True, config={'displayModeBar': False})
-        elif selected_tab == "General Affordability":
-            affordability_data = pd.DataFrame({"Tenant Category": tenant_categories_d2, "Before Control (%)": before_burden_d2, "After Control (%)": after_burden_d2, "Improvement (%)": improvement_d2})
-            affordability_data_filtered = affordability_data[affordability_data["Tenant Category"].isin(tenant_category)] if tenant_category else affordability_data
-            fig_afford = go.Figure()
-            if not affordability_data_filtered.empty:
-                fig_afford.add_trace(go.Bar(x=affordability_data_filtered["Tenant Category"], y=affordability_data_filtered["Before Control (%)"], name="Before", marker_color="#d62728", text=affordability_data_filtered["Before Control (%)"].apply(lambda x: f"{x:.1f}%"), textposition="auto", textfont=dict(size=9)))
-                fig_afford.add_trace(go.Bar(x=affordability_data_filtered["Tenant Category"], y=affordability_data_filtered["After Control (%)"], name="After", marker_color="#2ca02c", text=affordability_data_filtered["After Control (%)"].apply(lambda x: f"{x:.1f}%"), textposition="auto", textfont=dict(size=9)))
-                for i, cat in enumerate(affordability_data_filtered["Tenant Category"]):
-                    idx = affordability_data[affordability_data["Tenant Category"] == cat].index[0]
-                    fig_afford.add_annotation(x=cat, y=after_burden_d2[idx] - 3, text=f"↓{improvement_d2[idx]:.1f}%", showarrow=False, font=dict(size=9, color="black"))
-            fig_afford.update_layout(title="Impact on Housing Affordability", xaxis_title=None, yaxis_title="% Income on Rent", barmode="group", yaxis=dict(range=[0, max(before_burden_d2) * 1.1]), height=250, margin=dict(l=30, r=30, t=40, b=30), font=dict(size=10), legend=dict(orientation="h", y=1.02, x=1, font=dict(size=9)))
-            st.plotly_chart(fig_afford, use_container_width=True, config={'displayModeBar': False})
-        else:
-            categories_to_show = []
-            if "Young Professionals" in tenant_category: categories_to_show.extend([("Youth Before", "#ff9999"), ("Youth After", "#99ff99")])
-            if "Low-Income Renters" in tenant_category: categories_to_show.extend([("Low-Income Before", "#ffcc99"), ("Low-Income After", "#99ccff")])
-            if not categories_to_show: categories_to_show = [("Youth Before", "#ff9999"), ("Youth After", "#99ff99"), ("Low-Income Before", "#ffcc99"), ("Low-Income After", "#99ccff")]
-            fig_district = go.Figure()
-            if not district_impact.empty:
-                for cat, color in categories_to_show:
-                    if cat in district_impact.columns:
-                         fig_district.add_trace(go.Bar(x=district_impact["District"], y=district_impact[cat], name=cat, marker_color=color, text=district_impact[cat].apply(lambda x: f"{x:.1f}%"), textposition="auto", textfont=dict(size=9)))
-            fig_district.update_layout(title="District-Specific Affordability Impact", xaxis_title=None, yaxis_title="% Income on Rent", barmode="group", height=250, margin=dict(l=30, r=30, t=40, b=30), font=dict(size=10), legend=dict(orientation="h", y=1.02, x=1, font=dict(size=9)))
-            st.plotly_chart(fig_district, use_container_width=True, config={'displayModeBar': False})
+        selected_tab = st.radio("Select View:", list(VIEW_TASKS_D2), horizontal=True, key="d2_tab_select")
+        st.plotly_chart(figures[VIEW_TASKS_D2[selected_tab]], use_container_width=True, config={'displayModeBar': False})
         st.markdown('</div>', unsafe_allow_html=True)
 
     # Footer for Dashboard 2
@@ -723,100 +884,337 @@ def display_dashboard2_content(selected_districts, incentive_level, implementati
     """, unsafe_allow_html=True)
 
 # --- Dashboard 3: Analytical Insights ---
-def display_dashboard3_sidebar():
-    with st.sidebar:
-        st.header("Analysis Controls")
-        incentive_budget = st.slider("Incentive Budget (% of total)", min_value=20.0, max_value=40.0, value=27.8, step=0.1, help="Percentage of total housing budget allocated to incentives", key="d3_incentive_budget")
-        tax_savings = st.slider("Tax Savings per Landlord (€)", min_value=5000, max_value=9000, value=7313, step=100, help="Average tax savings per participating landlord", key="d3_tax_savings")
-        growth_rate_without = st.slider("Base Growth Rate (%)", min_value=1.0, max_value=3.0, value=2.0, step=0.1, help="Annual growth rate without program", key="d3_growth_without") / 100
-        growth_rate_with = st.slider("Enhanced Growth Rate (%)", min_value=growth_rate_without*100 + 0.1, max_value=5.0, value=3.0, step=0.1, help="Annual growth rate with program", key="d3_growth_with") / 100
-        selected_districts = st.multiselect("Select Districts for Analysis", districts_d3, default=[], help="Select specific districts to focus the analysis on", key="d3_districts")
-        analysis_view = st.radio("District Analysis View", ["Quadrant Analysis", "Heatmap Analysis"], index=0, key="d3_analysis_view")
-        st.button("Reset Filters", on_click=reset_filters_d3, key="d3_reset")
-        return incentive_budget, tax_savings, growth_rate_without, growth_rate_with, selected_districts, analysis_view
+# Sidebar values of a fresh visit; growth rates as fractions
+DEFAULTS_D3 = {
+    "incentive_budget": 27.8,
+    "tax_savings": 7313,
+    "growth_rate_without": 0.02,
+    "growth_rate_with": 0.03,
+    "selected_districts": [],
+    "analysis_view": "Quadrant Analysis",
+    "allocation_mode": "Optimized",
+}
+
+def remaining_allocation_d3(incentive_budget, allocation_mode, programs, start=None):
+    """
+    Split of the budget left after incentives between the housing programs.
+
+    Parameters:
+    incentive_budget (float): Share of the housing budget spent on incentives (%).
+    allocation_mode (str): "Optimized" (best split for affordability, see allocation.py) or
+    "Fixed Ratios" (24 / 28.2 / 20).
+    programs (tuple): Program curves from load_programs (None: fixed ratios only).
+    start (float): Multiplier of the previous optimized split, to warm-start the solve.
+
+    Returns:
+    tuple: (affordable housing, rental assistance and other initiatives (% of the total),
+    multiplier of the optimized split or None).
+    """
+    remaining_budget, fixed_values = budget_split(incentive_budget)
+    if allocation_mode == "Optimized" and programs is not None:
+        allocation = optimize_allocation(remaining_budget, programs, start=start)
+        return allocation.amounts, allocation.multiplier
+    return fixed_values, None
 
-def display_dashboard3_content(incentive_budget, tax_savings, growth_rate_without, growth_rate_with, selected_districts, analysis_view):
-    # --- Recalculation of Values based on Sidebar ---
+# Figure builders, run as FigureTasks like the Dashboard 1 ones (see figure_tasks_d3)
+
+def sankey_figure_d3(d3, incentive_budget, updated_remaining_values):
     remaining_budget = 100 - incentive_budget
-    updated_remaining_values = [
-        remaining_budget * 24/72.2 if remaining_budget > 0 else 0,
-        remaining_budget * 28.2/72.2 if remaining_budget > 0 else 0,
-        remaining_budget * 20/72.2 if remaining_budget > 0 else 0
-    ]
-    rent_reduction = -1440
-    updated_net_gain = tax_savings + rent_reduction
-    updated_revenue_without = [current_property_tax_d3 * (1 + growth_rate_without)**t for t in range(10)]
-    updated_revenue_with = [current_property_tax_d3 * (1 + growth_rate_with)**t for t in range(10)]
+    fig_sankey = go.Figure(data=[go.Sankey(
+        arrangement='snap',
+        node=dict(pad=15, thickness=20, line=dict(color="black", width=1.5), label=d3.sankey_data['node_labels'], color=d3.sankey_data['node_colors'], hoverlabel=dict(bgcolor="white", bordercolor="black", font=dict(size=14, family="Arial", color="black"))),
+        link=dict(source=d3.sankey_data['link_sources'], target=d3.sankey_data['link_targets'], value=[incentive_budget, remaining_budget, *updated_remaining_values], color=d3.sankey_data['link_colors'], hovertemplate='%{value:.1f}% from %{source.label}<br>to %{target.label}<extra></extra>')
+    )])
+    fig_sankey.update_layout(
+        title=dict(text='Housing Budget Flow Analysis (€100M Total)', x=0.5, font=dict(size=16), xanchor='center', yanchor='top'),
+        font=dict(size=14), height=310, margin=dict(l=20, r=20, t=40, b=60), paper_bgcolor='white'
+    )
+    fig_sankey.add_annotation(
+        x=0.5, y=-0.15, xref='paper', yref='paper', text=f'<b>{incentive_budget:.1f}%</b> of total budget allocated', showarrow=False, font=dict(size=14, color='black'), align='center', bgcolor='rgba(220, 239, 110, 0.8)', bordercolor='#3498db', borderwidth=1, borderpad=8, opacity=0.9
+    )
+    return fig_sankey
+
+def waterfall_figure_d3(d3, tax_savings, rent_reduction):
+    fig_waterfall = go.Figure(go.Waterfall(
+        name='Waterfall', orientation='v', measure=d3.waterfall_data['measures'], x=d3.waterfall_data['labels'],
+        textposition='auto', text=[f'€{tax_savings:,.0f}', f'−€{abs(rent_reduction):,.0f}', f'€{tax_savings + rent_reduction:,.0f}'],
+        y=[tax_savings, rent_reduction, None], connector={'line': {'color': 'grey'}},
+        decreasing={'marker': {'color': '#d62728'}}, increasing={'marker': {'color': '#2ca02c'}}, totals={'marker': {'color': '#1f77b4'}}
+    ))
+    fig_waterfall.update_layout(
+        title=dict(text='Landlord Financial Impact (Per Property)', x=0.5, font=dict(size=16), xanchor='center', yanchor='top'),
+        xaxis_title='Financial Components', yaxis_title='Amount (€)', height=310, margin=dict(l=30, r=30, t=40, b=30),
+        showlegend=False, plot_bgcolor='white', xaxis=dict(showgrid=False), yaxis=dict(showgrid=True, gridcolor='lightgrey')
+    )
+    fig_waterfall.add_annotation(x=0, y=tax_savings * 1.05, text='Tax incentive benefit', showarrow=False, font=dict(size=11), yshift=10)
+    fig_waterfall.add_annotation(x=1, y=rent_reduction * 0.5, text='Controlled rent impact', showarrow=False, font=dict(size=11), yshift=-10)
+    return fig_waterfall
+
+def projection_figure_d3(d3, growth_rate_without, growth_rate_with):
+    updated_revenue_without = revenue_projection(growth_rate_without, d3.current_property_tax)
+    updated_revenue_with = revenue_projection(growth_rate_with, d3.current_property_tax)
     updated_revenue_diff = [with_ - without_ for with_, without_ in zip(updated_revenue_with, updated_revenue_without)]
     updated_cumulative_diff = sum(updated_revenue_diff)
-    safe_incentive_budget = incentive_budget if incentive_budget > 0 else 1
-    updated_roi = (updated_cumulative_diff / safe_incentive_budget) * 100
-    updated_cumulative_revenue_diff = np.cumsum(updated_revenue_diff)
-    years_to_payback = np.searchsorted(updated_cumulative_revenue_diff, safe_incentive_budget)
-    if years_to_payback >= len(updated_cumulative_revenue_diff):
-        updated_payback_period = 10.0 + (safe_incentive_budget - updated_cumulative_revenue_diff[-1]) / (updated_revenue_diff[-1] if updated_revenue_diff[-1] != 0 else 1) if len(updated_cumulative_revenue_diff)>0 else 10.0
-        updated_payback_period = max(10.0, updated_payback_period)
+    fig_combined = make_subplots(specs=[[{"secondary_y": True}]])
+    fig_combined.add_trace(go.Scatter(x=d3.years, y=updated_revenue_without, name='Without Program', line=dict(color='steelblue', width=3), hovertemplate='%{y:.1f}M €'), secondary_y=False)
+    fig_combined.add_trace(go.Scatter(x=d3.years, y=updated_revenue_with, name='With Program', line=dict(color='green', width=3), fill='tonexty', fillcolor='rgba(0,128,0,0.1)', hovertemplate='%{y:.1f}M €'), secondary_y=False)
+    fig_combined.add_trace(go.Bar(x=d3.years, y=updated_revenue_diff, name='Annual Gain', marker_color='orange', text=[f"€{val:.1f}M" for val in updated_revenue_diff], textposition='outside', textfont=dict(size=9), hovertemplate='+%{y:.1f}M €'), secondary_y=True)
+    fig_combined.update_layout(
+        title=dict(text='Long-term Property Tax Revenue (2025–2034)', x=0.5, y=0.98, font=dict(size=16), xanchor='center', yanchor='top'),
+        xaxis_title='Year', height=310, margin=dict(l=40, r=40, t=60, b=40), plot_bgcolor='white',
+        legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='center', x=0.5, font=dict(size=10), bgcolor='rgba(255,255,255,0.8)')
+    )
+    fig_combined.update_yaxes(title_text='Tax Revenue (M €)', secondary_y=False, showgrid=True, gridcolor='lightgray')
+    fig_combined.update_yaxes(title_text='Extra Gain (M €)', secondary_y=True, range=[0, max(updated_revenue_diff or [0]) * 1.6])
+    fig_combined.add_annotation(
+        x=2030, y=max(updated_revenue_diff or [0]) * 1.3, text=f"<b>Cumulative 10Y Gain:</b><br>+€{updated_cumulative_diff:.1f}M", showarrow=False, font=dict(size=11, color='orange'), bgcolor='white', bordercolor='orange', borderwidth=1, borderpad=5
+    )
+    return fig_combined
+
+def correlation_figure_d3(d3, survey_key):
+    # survey_key: version of the landlord survey file (None: synthetic data), part of the memo key
+    survey = load_survey(SURVEY_PATH) if survey_key is not None else None
+    if survey is not None and survey.moments.count >= 3:
+        # Streaming fit of the survey: points are the mean participation per incentive bin
+        points_x, points_y, _ = bin_means(survey)
+        fit = fit_line(survey.moments)
+        band_low, band_high = line_band(survey.moments, points_x)
+        trend_y = fit.intercept + fit.slope * points_x
+        correlation, r_squared = fit.correlation, fit.r_squared
+        correlation_low, correlation_high = fit.correlation_low, fit.correlation_high
+        r_squared_low, r_squared_high = fit.r_squared_low, fit.r_squared_high
+        band_name = f"{fit.confidence:.0%} CI"
+        points_name, note = 'Survey (bin means)', f"{band_name}, {fit.count:,} responses"
     else:
-        if years_to_payback == 0:
-            updated_payback_period = safe_incentive_budget / updated_cumulative_revenue_diff[0] if updated_cumulative_revenue_diff[0] != 0 else float('inf')
-        else:
-            prev_cumulative = updated_cumulative_revenue_diff[years_to_payback-1] if years_to_payback > 0 else 0
-            remaining = safe_incentive_budget - prev_cumulative
-            year_diff = updated_cumulative_revenue_diff[years_to_payback] - prev_cumulative
-            updated_payback_period = years_to_payback + (remaining / year_diff) if year_diff != 0 else float('inf')
-    updated_payback_period = min(updated_payback_period, 50)
+        points_x, points_y = d3.incentive_amounts, d3.participation_rates
+        band_low, band_high = trend_band(d3.bootstrap, points_x)
+        trend_y = np.poly1d(np.polyfit(points_x, points_y, 1))(points_x)
+        correlation, r_squared = d3.correlation, d3.r_squared
+        correlation_low, correlation_high = d3.bootstrap.correlation.low, d3.bootstrap.correlation.high
+        r_squared_low, r_squared_high = d3.bootstrap.r_squared.low, d3.bootstrap.r_squared.high
+        band_name = f"{d3.bootstrap.confidence:.0%} CI"
+        points_name, note = 'Data Points', f"{band_name}, {d3.bootstrap.resamples:,} resamples"
+    fig_combined = go.Figure()
+    fig_combined.add_trace(go.Scatter(x=points_x, y=points_y, mode='markers', name=points_name, marker=dict(size=8, color='royalblue', line=dict(width=1, color='black'))))
+    fig_combined.add_trace(go.Scatter(x=points_x, y=band_high, mode='lines', line=dict(width=0), showlegend=False, hoverinfo='skip'))
+    fig_combined.add_trace(go.Scatter(x=points_x, y=band_low, mode='lines', line=dict(width=0), fill='tonexty', fillcolor='rgba(255, 0, 0, 0.15)', name=band_name, hoverinfo='skip'))
+    fig_combined.add_trace(go.Scatter(x=points_x, y=trend_y, mode='lines', name='Trendline', line=dict(color='red', width=2)))
+    fig_combined.add_annotation(x=1000, y=90, text=f"<b>Correlation:</b> {correlation:.2f} [{correlation_low:.2f}, {correlation_high:.2f}]<br><b>R²:</b> {r_squared:.2f} [{r_squared_low:.2f}, {r_squared_high:.2f}]<br><i>{note}</i>", showarrow=False, bgcolor='white', bordercolor='black', borderwidth=1, font=dict(size=11), align='left')
+    annotations = {0: 'No Incentives', 3000: 'Partial Incentives', 7000: 'Full Incentives'}
+    for x_val, label in annotations.items():
+        idx = np.abs(points_x - x_val).argmin()
+        y_val = points_y[idx]
+        fig_combined.add_annotation(x=x_val, y=y_val, text=label, showarrow=True, arrowhead=2, arrowsize=1, arrowwidth=1.5, arrowcolor='gray', ax=-30, ay=-30, font=dict(size=10))
+    fig_combined.update_layout(
+        title=dict(text='Incentives vs. Landlord Participation', x=0.5, font=dict(size=16), xanchor='center', yanchor='top'),
+        xaxis_title='Tax Incentive (€)', yaxis_title='Participation Rate (%)', height=310, margin=dict(l=40, r=20, t=40, b=40), plot_bgcolor='white',
+        xaxis=dict(showgrid=True, gridcolor='lightgrey', tickformat=',.0f'), yaxis=dict(showgrid=True, gridcolor='lightgrey'),
+        legend=dict(x=0.02, y=0.98, bgcolor='rgba(255,255,255,0.6)', font=dict(size=10))
+    )
+    return fig_combined
+
+def sensitivity_figure_d3(incentive_budget, growth_rate_without, growth_rate_with):
+    # Payback over both growth rates at the selected budget, straight from the sensitivity cube
+    cube = sensitivity_cube()
+    budget_index = int(np.abs(cube.budgets - incentive_budget).argmin())
+    fig_sensitivity = go.Figure(go.Contour(
+        z=cube.payback_period[budget_index], x=cube.growth_with * 100, y=cube.growth_without * 100,
+        colorscale='RdYlGn_r', contours=dict(showlabels=True, labelfont=dict(size=9, color='white')),
+        colorbar=dict(title='Years', thickness=15, len=0.8),
+        hovertemplate='Base: %{y:.1f}%<br>Enhanced: %{x:.1f}%<br>Payback: %{z:.1f} years<extra></extra>'
+    ))
+    fig_sensitivity.add_trace(go.Scatter(
+        x=[growth_rate_with * 100], y=[growth_rate_without * 100], mode='markers', name='Current Scenario',
+        marker=dict(size=12, color='white', symbol='x', line=dict(width=2, color='black')), hoverinfo='skip'
+    ))
+    fig_sensitivity.update_layout(
+        title=dict(text=f'Payback Sensitivity to Growth Rates ({cube.budgets[budget_index]:.1f}% Budget)', x=0.5, font=dict(size=16), xanchor='center', yanchor='top'),
+        xaxis_title='Enhanced Growth Rate (%)', yaxis_title='Base Growth Rate (%)', height=310,
+        margin=dict(l=40, r=20, t=40, b=40), plot_bgcolor='white', showlegend=False
+    )
+    return fig_sensitivity
 
-    safe_revenue_without_last = updated_revenue_without[-1] if updated_revenue_without[-1] != 0 else 1
-    updated_revenue_growth = ((updated_revenue_with[-1] / safe_revenue_without_last) - 1) * 100
+def uncertainty_figure_d3(d3, incentive_budget, growth_rate_without, growth_rate_with):
+    # Monte Carlo around the sidebar values: cumulative gain bands and payback distribution
+    result = simulate(incentive_budget, growth_rate_without, growth_rate_with)
+    low, q1, median, q3, high = result.cumulative_gain
+    fig_uncertainty = make_subplots(rows=1, cols=2, column_widths=[0.6, 0.4], horizontal_spacing=0.12)
+    fig_uncertainty.add_trace(go.Scatter(x=d3.years, y=high, line=dict(width=0), hoverinfo='skip', showlegend=False), row=1, col=1)
+    fig_uncertainty.add_trace(go.Scatter(x=d3.years, y=low, fill='tonexty', fillcolor='rgba(0,128,0,0.15)', line=dict(width=0), name='P5–P95', hovertemplate='P5: %{y:.1f}M €'), row=1, col=1)
+    fig_uncertainty.add_trace(go.Scatter(x=d3.years, y=q3, line=dict(width=0), hoverinfo='skip', showlegend=False), row=1, col=1)
+    fig_uncertainty.add_trace(go.Scatter(x=d3.years, y=q1, fill='tonexty', fillcolor='rgba(0,128,0,0.3)', line=dict(width=0), name='P25–P75', hovertemplate='P25: %{y:.1f}M €'), row=1, col=1)
+    fig_uncertainty.add_trace(go.Scatter(x=d3.years, y=median, line=dict(color='green', width=3), name='Median', hovertemplate='%{y:.1f}M €'), row=1, col=1)
+    fig_uncertainty.add_hline(y=incentive_budget, line=dict(color='gray', width=1, dash='dash'), row=1, col=1)
+    fig_uncertainty.add_trace(go.Bar(
+        x=PAYBACK_BINS[:-1] + 0.5, y=result.payback_histogram * 100, width=1, marker_color='orange', name='Paths',
+        showlegend=False, hovertemplate='%{x:.1f} years: %{y:.1f}% of paths<extra></extra>'
+    ), row=1, col=2)
+    fig_uncertainty.add_annotation(
+        x=0.98, y=0.95, xref='paper', yref='paper', xanchor='right', showarrow=False, bgcolor='white', bordercolor='orange', borderwidth=1, font=dict(size=11),
+        text=f"<b>P(payback ≤ 10y):</b> {result.prob_payback * 100:.1f}%<br>Median: " + (f"{result.payback[2]:.1f} years" if np.isfinite(result.payback[2]) else "beyond 10 years")
+    )
+    fig_uncertainty.update_layout(
+        title=dict(text=f'Uncertainty: {result.paths:,} Simulated Paths', x=0.5, font=dict(size=16), xanchor='center', yanchor='top'),
+        height=310, margin=dict(l=40, r=20, t=40, b=40), plot_bgcolor='white',
+        legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='left', x=0, font=dict(size=9))
+    )
+    fig_uncertainty.update_yaxes(title_text='Cumulative Gain (M €)', gridcolor='lightgrey', row=1, col=1)
+    fig_uncertainty.update_xaxes(title_text='Payback (years)', row=1, col=2)
+    fig_uncertainty.update_yaxes(title_text='% of Paths', gridcolor='lightgrey', row=1, col=2)
+    return fig_uncertainty
 
+def district_figure_d3(d3, selected_districts, analysis_view):
     if selected_districts:
-        filtered_district_analysis = district_analysis_d3[district_analysis_d3['District'].isin(selected_districts)]
+        filtered_district_analysis = d3.district_analysis[d3.district_analysis['District'].isin(selected_districts)]
+    else:
+        filtered_district_analysis = d3.district_analysis
+
+    if analysis_view == "Quadrant Analysis":
+        if not filtered_district_analysis.empty:
+            avg_cost = filtered_district_analysis['Incentive Cost (€/unit)'].mean()
+            avg_improvement = filtered_district_analysis['Affordability Improvement (%)'].mean()
+            x_max = filtered_district_analysis['Incentive Cost (€/unit)'].max() * 1.15
+            y_max = filtered_district_analysis['Affordability Improvement (%)'].max() * 1.15
+            sizeref = 2.*max(filtered_district_analysis['ROI Ratio'])/(30**2) if max(filtered_district_analysis['ROI Ratio']) > 0 else 1
+        else:
+            avg_cost, avg_improvement, x_max, y_max, sizeref = 0, 0, 100, 30, 1
+
+        fig_combined = px.scatter(
+            filtered_district_analysis, x='Incentive Cost (€/unit)', y='Affordability Improvement (%)', size='ROI Ratio', color='Implementation Complexity',
+            hover_name='District', text='District', color_continuous_scale='Viridis',
+            labels={'Incentive Cost (€/unit)': 'Cost (€/unit)', 'Affordability Improvement (%)': 'Affordability Improvement (%)', 'Implementation Complexity': 'Complexity'}
+        ) if not filtered_district_analysis.empty else go.Figure()
+
+        if not filtered_district_analysis.empty:
+            fig_combined.add_shape(type="line", x0=avg_cost, y0=0, x1=avg_cost, y1=y_max, line=dict(color="gray", width=1, dash="dash"))
+            fig_combined.add_shape(type="line", x0=0, y0=avg_improvement, x1=x_max, y1=avg_improvement, line=dict(color="gray", width=1, dash="dash"))
+            fig_combined.add_annotation(x=avg_cost / 2, y=avg_improvement * 1.1, text="<b>High Impact<br>Low Cost</b>", showarrow=False, font=dict(size=10, color="green"))
+            fig_combined.add_annotation(x=avg_cost * 1.25, y=avg_improvement * 1.1, text="<b>High Impact<br>High Cost</b>", showarrow=False, font=dict(size=10, color="blue"))
+            fig_combined.add_annotation(x=avg_cost / 2, y=avg_improvement * 0.4, text="<b>Low Impact<br>Low Cost</b>", showarrow=False, font=dict(size=10, color="orange"))
+            fig_combined.add_annotation(x=avg_cost * 1.25, y=avg_improvement * 0.4, text="<b>Low Impact<br>High Cost</b>", showarrow=False, font=dict(size=10, color="red"))
+            fig_combined.update_traces(
+                textposition='top center', marker=dict(line=dict(width=1, color='DarkSlateGrey'), sizemode='area', sizeref=sizeref, sizemin=5),
+                textfont=dict(size=9, color='black')
+            )
+
+        fig_combined.update_layout(
+            title=dict(text='District Cost-Effectiveness Analysis', x=0.5, font=dict(size=16), xanchor='center', yanchor='top'),
+            height=310, margin=dict(l=40, r=20, t=40, b=40), plot_bgcolor='white',
+            xaxis=dict(title='Cost (€/unit)', gridcolor='lightgrey', zeroline=False, range=[0, x_max]),
+            yaxis=dict(title='Affordability Improvement (%)', gridcolor='lightgrey', zeroline=False, range=[0, y_max]),
+            coloraxis_colorbar=dict(title="Complexity", tickvals=[1, 2, 3, 4], ticktext=["Low", "Medium", "High", "Very High"], lenmode="fraction", len=0.75)
+        )
+    else:
+        if not filtered_district_analysis.empty:
+            df_sorted = filtered_district_analysis.sort_values(by='ROI Ratio', ascending=False)
+            z_data = [df_sorted['ROI Ratio'].values, df_sorted['Incentive Cost (€/unit)'].values, df_sorted['Affordability Improvement (%)'].values]
+            y_labels = ['ROI Ratio', 'Cost (€)', 'Affordability (%)']
+            x_labels = df_sorted['District'].tolist()
+            text_data = [
+                [f"{val:.2f}" for val in df_sorted['ROI Ratio']], [f"€{val:.0f}" for val in df_sorted['Incentive Cost (€/unit)']],
+                [f"{val:.1f}%" for val in df_sorted['Affordability Improvement (%)']]
+            ]
+            fig_combined = go.Figure(data=go.Heatmap(
+                z=z_data, x=x_labels, y=y_labels, text=text_data, texttemplate="%{text}",
+                textfont=dict(size=10), colorscale='RdBu_r', reversescale=False, colorbar=dict(title='Value', thickness=15, len=0.7)
+            ))
+        else:
+            fig_combined = go.Figure()
+
+        fig_combined.update_layout(
+            title=dict(text='District Affordability vs. Costs Heatmap', x=0.5, font=dict(size=16), xanchor='center', yanchor='top'),
+            xaxis=dict(title='District', tickangle=-30), yaxis=dict(title='Metric', autorange='reversed'),
+            height=310, margin=dict(l=40, r=20, t=40, b=50)
+        )
+    return fig_combined
+
+# Charts of the "Select Chart" box -> their figure task
+CHART_TASKS_D3 = {
+    "Long-term Projection": 'projection',
+    "Correlation Analysis": 'correlation',
+    "Payback Sensitivity": 'sensitivity',
+    "Uncertainty (Monte Carlo)": 'uncertainty',
+    "District Analysis": 'district',
+}
+
+def figure_tasks_d3(d3, incentive_budget, tax_savings, growth_rate_without, growth_rate_with, selected_districts, analysis_view, remaining_values, names=None):
+    """Figures of Dashboard 3 for the sidebar values and the split of remaining_allocation_d3; names: tasks to include (None: every chart, as the prefetch does)."""
+    tasks = [
+        FigureTask('sankey', sankey_figure_d3, d3, (incentive_budget, tuple(remaining_values))),
+        FigureTask('waterfall', waterfall_figure_d3, d3, (tax_savings, RENT_REDUCTION)),
+        FigureTask('projection', projection_figure_d3, d3, (growth_rate_without, growth_rate_with)),
+        FigureTask('correlation', correlation_figure_d3, d3, (survey_version(SURVEY_PATH),)),
+        FigureTask('sensitivity', sensitivity_figure_d3, None, (incentive_budget, growth_rate_without, growth_rate_with)),
+        FigureTask('uncertainty', uncertainty_figure_d3, d3, (incentive_budget, growth_rate_without, growth_rate_with)),
+        FigureTask('district', district_figure_d3, d3, (tuple(selected_districts), analysis_view)),
+    ]
+    return [task for task in tasks if names is None or task.name in names]
+
+def display_dashboard3_sidebar(d3):
+    with st.sidebar:
+        st.header("Analysis Controls")
+        incentive_budget = st.slider("Incentive Budget (% of total)", min_value=20.0, max_value=40.0, value=DEFAULTS_D3["incentive_budget"], step=0.1, help="Percentage of total housing budget allocated to incentives", key="d3_incentive_budget")
+        tax_savings = st.slider("Tax Savings per Landlord (€)", min_value=5000, max_value=9000, value=DEFAULTS_D3["tax_savings"], step=100, help="Average tax savings per participating landlord", key="d3_tax_savings")
+        growth_rate_without = st.slider("Base Growth Rate (%)", min_value=1.0, max_value=3.0, value=DEFAULTS_D3["growth_rate_without"] * 100, step=0.1, help="Annual growth rate without program", key="d3_growth_without") / 100
+        growth_rate_with = st.slider("Enhanced Growth Rate (%)", min_value=growth_rate_without*100 + 0.1, max_value=5.0, value=DEFAULTS_D3["growth_rate_with"] * 100, step=0.1, help="Annual growth rate with program", key="d3_growth_with") / 100
+        selected_districts = st.multiselect("Select Districts for Analysis", d3.districts, default=DEFAULTS_D3["selected_districts"], help="Select specific districts to focus the analysis on", key="d3_districts")
+        analysis_view = st.radio("District Analysis View", ["Quadrant Analysis", "Heatmap Analysis"], index=0, key="d3_analysis_view")
+        # Optimized split only when data/program_curves.csv gives the programs' impact curves
+        if load_programs(PROGRAMS_PATH) is not None:
+            allocation_mode = st.radio("Budget Allocation", ["Optimized", "Fixed Ratios"], index=0, help="Split the remaining budget between the housing programs for the largest affordability improvement, or with the fixed 24 / 28.2 / 20 ratios", key="d3_allocation_mode")
+        else:
+            allocation_mode = "Fixed Ratios"
+        st.button("Reset Filters", on_click=reset_filters_d3, key="d3_reset")
+        return incentive_budget, tax_savings, growth_rate_without, growth_rate_with, selected_districts, analysis_view, allocation_mode
+
+def display_dashboard3_content(d3, incentive_budget, tax_savings, growth_rate_without, growth_rate_with, selected_districts, analysis_view, allocation_mode):
+    # --- Scenario for the sidebar values (cached across reruns and sessions) ---
+    scenario_d3 = scenario(incentive_budget, tax_savings, growth_rate_without, growth_rate_with)
+    updated_net_gain = scenario_d3.net_gain
+    updated_cumulative_diff = scenario_d3.cumulative_diff
+    updated_roi = scenario_d3.roi
+    updated_payback_period = scenario_d3.payback_period
+    # The scenario reports programs that never pay back (within PAYBACK_HORIZON years) as inf
+    if updated_payback_period != float('inf'):
+        payback_insight = f"Pays for itself in <b>{updated_payback_period:.1f} years</b>"
     else:
-        filtered_district_analysis = district_analysis_d3
+        payback_insight = f"Does not pay back within <b>{PAYBACK_HORIZON} years</b>"
+    updated_revenue_growth = scenario_d3.revenue_growth
+
+    # Split shown in the Sankey, warm-started from this session's previous optimized split, and
+    # its affordability improvement (the fixed 25.2% without program curves)
+    programs = load_programs(PROGRAMS_PATH)
+    remaining_values, multiplier = remaining_allocation_d3(incentive_budget, allocation_mode, programs,
+                                                           start=st.session_state.get("d3_allocation_multiplier"))
+    if multiplier is not None:
+        st.session_state.d3_allocation_multiplier = multiplier
+    affordability_improvement = program_impact(remaining_values, programs) if programs is not None else d3.social_impact
+
+    # Only the chart picked in the "Select Chart" box is built (its value is known before it is drawn)
+    chart_type = st.session_state.get("d3_chart_select", next(iter(CHART_TASKS_D3)))
+    figures = run_tasks(figure_tasks_d3(d3, incentive_budget, tax_savings, growth_rate_without, growth_rate_with, selected_districts, analysis_view, remaining_values,
+                                        names=('sankey', 'waterfall', CHART_TASKS_D3[chart_type])))
 
     # --- KPIs Display ---
     kpi_placeholder = st.empty()
     with kpi_placeholder.container():
         kpi_cols = st.columns(4)
         with kpi_cols[0]: st.metric(label="10-Year ROI", value=f"{updated_roi:.1f}%", delta=f"{updated_roi - 100:.1f}% vs Initial" if updated_roi is not None else "N/A")
-        with kpi_cols[1]: st.metric(label="Payback Period", value=f"{updated_payback_period:.1f} years" if updated_payback_period != float('inf') else ">50 years", delta=f"{5 - updated_payback_period:.1f} vs Target" if updated_payback_period != float('inf') else None, delta_color="inverse")
+        with kpi_cols[1]: st.metric(label="Payback Period", value=f"{updated_payback_period:.1f} years" if updated_payback_period != float('inf') else f">{PAYBACK_HORIZON} years", delta=f"{5 - updated_payback_period:.1f} vs Target" if updated_payback_period != float('inf') else None, delta_color="inverse")
         with kpi_cols[2]: st.metric(label="Revenue Growth", value=f"{updated_revenue_growth:.1f}%", delta=f"{updated_revenue_growth:.1f}% Boost")
-        with kpi_cols[3]: st.metric(label="Affordability Improvement", value=f"{social_impact_d3:.1f}%", delta=f"{social_impact_d3 - 20:.1f}% vs Baseline")
+        with kpi_cols[3]: st.metric(label="Affordability Improvement", value=f"{affordability_improvement:.1f}%", delta=f"{affordability_improvement - 20:.1f}% vs Baseline")
 
     # --- Layout: Row 1 ---
     row1_col1, row1_col2 = st.columns(2)
     with row1_col1:
         st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-        fig_sankey = go.Figure(data=[go.Sankey(
-            arrangement='snap',
-            node=dict(pad=15, thickness=20, line=dict(color="black", width=1.5), label=sankey_data_d3['node_labels'], color=sankey_data_d3['node_colors'], hoverlabel=dict(bgcolor="white", bordercolor="black", font=dict(size=14, family="Arial", color="black"))),
-            link=dict(source=sankey_data_d3['link_sources'], target=sankey_data_d3['link_targets'], value=[incentive_budget, remaining_budget, *updated_remaining_values], color=sankey_data_d3['link_colors'], hovertemplate='%{value:.1f}% from %{source.label}<br>to %{target.label}<extra></extra>')
-        )])
-        fig_sankey.update_layout(
-            title=dict(text='Housing Budget Flow Analysis (€100M Total)', x=0.5, font=dict(size=16), xanchor='center', yanchor='top'),
-            font=dict(size=14), height=310, margin=dict(l=20, r=20, t=40, b=60), paper_bgcolor='white'
-        )
-        fig_sankey.add_annotation(
-            x=0.5, y=-0.15, xref='paper', yref='paper', text=f'<b>{incentive_budget:.1f}%</b> of total budget allocated', showarrow=False, font=dict(size=14, color='black'), align='center', bgcolor='rgba(220, 239, 110, 0.8)', bordercolor='#3498db', borderwidth=1, borderpad=8, opacity=0.9
-        )
+        fig_sankey = figures['sankey']
         st.plotly_chart(fig_sankey, use_container_width=True, config={'displayModeBar': False})
         st.markdown('</div>', unsafe_allow_html=True)
 
     with row1_col2:
         st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-        fig_waterfall = go.Figure(go.Waterfall(
-            name='Waterfall', orientation='v', measure=waterfall_data_d3['measures'], x=waterfall_data_d3['labels'],
-            textposition='auto', text=[f'€{tax_savings:,.0f}', f'−€{abs(rent_reduction):,.0f}', f'€{tax_savings + rent_reduction:,.0f}'],
-            y=[tax_savings, rent_reduction, None], connector={'line': {'color': 'grey'}},
-            decreasing={'marker': {'color': '#d62728'}}, increasing={'marker': {'color': '#2ca02c'}}, totals={'marker': {'color': '#1f77b4'}}
-        ))
-        fig_waterfall.update_layout(
-            title=dict(text='Landlord Financial Impact (Per Property)', x=0.5, font=dict(size=16), xanchor='center', yanchor='top'),
-            xaxis_title='Financial Components', yaxis_title='Amount (€)', height=310, margin=dict(l=30, r=30, t=40, b=30),
-            showlegend=False, plot_bgcolor='white', xaxis=dict(showgrid=False), yaxis=dict(showgrid=True, gridcolor='lightgrey')
-        )
-        fig_waterfall.add_annotation(x=0, y=tax_savings * 1.05, text='Tax incentive benefit', showarrow=False, font=dict(size=11), yshift=10)
-        fig_waterfall.add_annotation(x=1, y=rent_reduction * 0.5, text='Controlled rent impact', showarrow=False, font=dict(size=11), yshift=-10)
+        fig_waterfall = figures['waterfall']
         st.plotly_chart(fig_waterfall, use_container_width=True, config={'displayModeBar': False})
         st.markdown('</div>', unsafe_allow_html=True)
 
@@ -824,97 +1222,8 @@ def display_dashboard3_content(incentive_budget, tax_savings, growth_rate_withou
     row2_col1, row2_col2 = st.columns([0.7, 0.3])
     with row2_col1:
         st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-        chart_type = st.selectbox("Select Chart", ["Long-term Projection", "Correlation Analysis", "District Analysis"], index=0, key="d3_chart_select")
-        if chart_type == "Long-term Projection":
-            fig_combined = make_subplots(specs=[[{"secondary_y": True}]])
-            fig_combined.add_trace(go.Scatter(x=years_d3, y=updated_revenue_without, name='Without Program', line=dict(color='steelblue', width=3), hovertemplate='%{y:.1f}M €'), secondary_y=False)
-            fig_combined.add_trace(go.Scatter(x=years_d3, y=updated_revenue_with, name='With Program', line=dict(color='green', width=3), fill='tonexty', fillcolor='rgba(0,128,0,0.1)', hovertemplate='%{y:.1f}M €'), secondary_y=False)
-            fig_combined.add_trace(go.Bar(x=years_d3, y=updated_revenue_diff, name='Annual Gain', marker_color='orange', text=[f"€{val:.1f}M" for val in updated_revenue_diff], textposition='outside', textfont=dict(size=9), hovertemplate='+%{y:.1f}M €'), secondary_y=True)
-            fig_combined.update_layout(
-                title=dict(text='Long-term Property Tax Revenue (2025–2034)', x=0.5, y=0.98, font=dict(size=16), xanchor='center', yanchor='top'),
-                xaxis_title='Year', height=310, margin=dict(l=40, r=40, t=60, b=40), plot_bgcolor='white',
-                legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='center', x=0.5, font=dict(size=10), bgcolor='rgba(255,255,255,0.8)')
-            )
-            fig_combined.update_yaxes(title_text='Tax Revenue (M €)', secondary_y=False, showgrid=True, gridcolor='lightgray')
-            fig_combined.update_yaxes(title_text='Extra Gain (M €)', secondary_y=True, range=[0, max(updated_revenue_diff or [0]) * 1.6])
-            fig_combined.add_annotation(
-                x=2030, y=max(updated_revenue_diff or [0]) * 1.3, text=f"<b>Cumulative 10Y Gain:</b><br>+€{updated_cumulative_diff:.1f}M", showarrow=False, font=dict(size=11, color='orange'), bgcolor='white', bordercolor='orange', borderwidth=1, borderpad=5
-            )
-        elif chart_type == "Correlation Analysis":
-            fig_combined = go.Figure()
-            fig_combined.add_trace(go.Scatter(x=incentive_amounts_d3, y=participation_rates_d3, mode='markers', name='Data Points', marker=dict(size=8, color='royalblue', line=dict(width=1, color='black'))))
-            trendline = np.poly1d(np.polyfit(incentive_amounts_d3, participation_rates_d3, 1))
-            fig_combined.add_trace(go.Scatter(x=incentive_amounts_d3, y=trendline(incentive_amounts_d3), mode='lines', name='Trendline', line=dict(color='red', width=2)))
-            fig_combined.add_annotation(x=1000, y=90, text=f"<b>Correlation:</b> {correlation_d3:.2f}<br><b>R²:</b> {r_squared_d3:.2f}", showarrow=False, bgcolor='white', bordercolor='black', borderwidth=1, font=dict(size=11), align='left')
-            annotations = {0: 'No Incentives', 3000: 'Partial Incentives', 7000: 'Full Incentives'}
-            for x_val, label in annotations.items():
-                idx = np.abs(incentive_amounts_d3 - x_val).argmin()
-                y_val = participation_rates_d3[idx]
-                fig_combined.add_annotation(x=x_val, y=y_val, text=label, showarrow=True, arrowhead=2, arrowsize=1, arrowwidth=1.5, arrowcolor='gray', ax=-30, ay=-30, font=dict(size=10))
-            fig_combined.update_layout(
-                title=dict(text='Incentives vs. Landlord Participation', x=0.5, font=dict(size=16), xanchor='center', yanchor='top'),
-                xaxis_title='Tax Incentive (€)', yaxis_title='Participation Rate (%)', height=310, margin=dict(l=40, r=20, t=40, b=40), plot_bgcolor='white',
-                xaxis=dict(showgrid=True, gridcolor='lightgrey', tickformat=',.0f'), yaxis=dict(showgrid=True, gridcolor='lightgrey'),
-                legend=dict(x=0.02, y=0.98, bgcolor='rgba(255,255,255,0.6)', font=dict(size=10))
-            )
-        else:
-            if analysis_view == "Quadrant Analysis":
-                if not filtered_district_analysis.empty:
-                    avg_cost = filtered_district_analysis['Incentive Cost (€/unit)'].mean()
-                    avg_improvement = filtered_district_analysis['Affordability Improvement (%)'].mean()
-                    x_max = filtered_district_analysis['Incentive Cost (€/unit)'].max() * 1.15
-                    y_max = filtered_district_analysis['Affordability Improvement (%)'].max() * 1.15
-                    sizeref = 2.*max(filtered_district_analysis['ROI Ratio'])/(30**2) if max(filtered_district_analysis['ROI Ratio']) > 0 else 1
-                else:
-                    avg_cost, avg_improvement, x_max, y_max, sizeref = 0, 0, 100, 30, 1
-
-                fig_combined = px.scatter(
-                    filtered_district_analysis, x='Incentive Cost (€/unit)', y='Affordability Improvement (%)', size='ROI Ratio', color='Implementation Complexity',
-                    hover_name='District', text='District', color_continuous_scale='Viridis',
-                    labels={'Incentive Cost (€/unit)': 'Cost (€/unit)', 'Affordability Improvement (%)': 'Affordability Improvement (%)', 'Implementation Complexity': 'Complexity'}
-                ) if not filtered_district_analysis.empty else go.Figure()
-
-                if not filtered_district_analysis.empty:
-                    fig_combined.add_shape(type="line", x0=avg_cost, y0=0, x1=avg_cost, y1=y_max, line=dict(color="gray", width=1, dash="dash"))
-                    fig_combined.add_shape(type="line", x0=0, y0=avg_improvement, x1=x_max, y1=avg_improvement, line=dict(color="gray", width=1, dash="dash"))
-                    fig_combined.add_annotation(x=avg_cost / 2, y=avg_improvement * 1.1, text="<b>High Impact<br>Low Cost</b>", showarrow=False, font=dict(size=10, color="green"))
-                    fig_combined.add_annotation(x=avg_cost * 1.25, y=avg_improvement * 1.1, text="<b>High Impact<br>High Cost</b>", showarrow=False, font=dict(size=10, color="blue"))
-                    fig_combined.add_annotation(x=avg_cost / 2, y=avg_improvement * 0.4, text="<b>Low Impact<br>Low Cost</b>", showarrow=False, font=dict(size=10, color="orange"))
-                    fig_combined.add_annotation(x=avg_cost * 1.25, y=avg_improvement * 0.4, text="<b>Low Impact<br>High Cost</b>", showarrow=False, font=dict(size=10, color="red"))
-                    fig_combined.update_traces(
-                        textposition='top center', marker=dict(line=dict(width=1, color='DarkSlateGrey'), sizemode='area', sizeref=sizeref, sizemin=5),
-                        textfont=dict(size=9, color='black')
-                    )
-
-                fig_combined.update_layout(
-                    title=dict(text='District Cost-Effectiveness Analysis', x=0.5, font=dict(size=16), xanchor='center', yanchor='top'),
-                    height=310, margin=dict(l=40, r=20, t=40, b=40), plot_bgcolor='white',
-                    xaxis=dict(title='Cost (€/unit)', gridcolor='lightgrey', zeroline=False, range=[0, x_max]),
-                    yaxis=dict(title='Affordability Improvement (%)', gridcolor='lightgrey', zeroline=False, range=[0, y_max]),
-                    coloraxis_colorbar=dict(title="Complexity", tickvals=[1, 2, 3, 4], ticktext=["Low", "Medium", "High", "Very High"], lenmode="fraction", len=0.75)
-                )
-            else:
-                if not filtered_district_analysis.empty:
-                    df_sorted = filtered_district_analysis.sort_values(by='ROI Ratio', ascending=False)
-                    z_data = [df_sorted['ROI Ratio'].values, df_sorted['Incentive Cost (€/unit)'].values, df_sorted['Affordability Improvement (%)'].values]
-                    y_labels = ['ROI Ratio', 'Cost (€)', 'Affordability (%)']
-                    x_labels = df_sorted['District'].tolist()
-                    text_data = [
-                        [f"{val:.2f}" for val in df_sorted['ROI Ratio']], [f"€{val:.0f}" for val in df_sorted['Incentive Cost (€/unit)']],
-                        [f"{val:.1f}%" for val in df_sorted['Affordability Improvement (%)']]
-                    ]
-                    fig_combined = go.Figure(data=go.Heatmap(
-                        z=z_data, x=x_labels, y=y_labels, text=text_data, texttemplate="%{text}",
-                        textfont=dict(size=10), colorscale='RdBu_r', reversescale=False, colorbar=dict(title='Value', thickness=15, len=0.7)
-                    ))
-                else:
-                    fig_combined = go.Figure()
-
-                fig_combined.update_layout(
-                    title=dict(text='District Affordability vs. Costs Heatmap', x=0.5, font=dict(size=16), xanchor='center', yanchor='top'),
-                    xaxis=dict(title='District', tickangle=-30), yaxis=dict(title='Metric', autorange='reversed'),
-                    height=310, margin=dict(l=40, r=20, t=40, b=50)
-                )
+        chart_type = st.selectbox("Select Chart", list(CHART_TASKS_D3), index=0, key="d3_chart_select")
+        fig_combined = figures[CHART_TASKS_D3[chart_type]]
 
         st.plotly_chart(fig_combined, use_container_width=True, config={'displayModeBar': False})
         st.markdown('</div>', unsafe_allow_html=True)
@@ -924,7 +1233,7 @@ def display_dashboard3_content(incentive_budget, tax_savings, growth_rate_withou
         <div style="background-color:#f8f9fa; padding:15px; border-radius:8px; font-size:0.95em; height: 100%; display:flex; flex-direction:column; justify-content:center; box-shadow: 0 4px 6px rgba(0,0,0,0.1); border: 1px solid #eee;">
         <h3 style="text-align: center; color:#333; margin-bottom:15px; border-bottom: 2px solid #dcef6e; padding-bottom:8px; margin-top:0;">Analysis Insights</h3>
         <div style="display: flex; flex-direction: column; justify-content: space-around; flex-grow: 1;">
-            <div style="padding: 8px; background-color: rgba(255,255,255,0.6); border-radius: 5px;"><span style="font-weight: bold; color:#2c3e50;">Program Payback:</span><br><span style="font-size: 1.1em; color:#333;">Pays for itself in <b>{updated_payback_period:.1f} years</b></span></div>
+            <div style="padding: 8px; background-color: rgba(255,255,255,0.6); border-radius: 5px;"><span style="font-weight: bold; color:#2c3e50;">Program Payback:</span><br><span style="font-size: 1.1em; color:#333;">{payback_insight}</span></div>
             <div style="padding: 8px; background-color: rgba(255,255,255,0.6); border-radius: 5px;"><span style="font-weight: bold; color:#2c3e50;">Revenue Impact:</span><br><span style="font-size: 1.1em; color:#333;">Generates <b>€{updated_cumulative_diff:.1f}M</b> over 10 years</span></div>
             <div style="padding: 8px; background-color: rgba(255,255,255,0.6); border-radius: 5px;"><span style="font-weight: bold; color:#2c3e50;">Budget Allocation:</span><br><span style="font-size: 1.1em; color:#333;">Tax incentives are <b>{incentive_budget:.1f}%</b> of budget</span></div>
             <div style="padding: 8px; background-color: rgba(255,255,255,0.6); border-radius: 5px;"><span style="font-weight: bold; color:#2c3e50;">Landlord Benefit:</span><br><span style="font-size: 1.1em; color:#333;">Average gain of <b>€{updated_net_gain:,.0f}</b> annually</span></div>
@@ -937,33 +1246,122 @@ def display_dashboard3_content(incentive_budget, tax_savings, growth_rate_withou
         ), unsafe_allow_html=True)
 
     # Footer for Dashboard 3
+    scenario_cache = scenario_cache_info()
     st.markdown(f"""
     <div style="background-color:#f0f0f0; padding:5px; border-radius:3px; margin-top:15px; font-size:0.6em; text-align:center;">
-    Sources: Madrid Tax Revenue Reports, Landlord Survey 2023 | Budget: {incentive_budget:.1f}% | Growth: {growth_rate_with*100:.1f}%
+    Sources: Madrid Tax Revenue Reports, Landlord Survey 2023 | Budget: {incentive_budget:.1f}% | Growth: {growth_rate_with*100:.1f}% | Scenario cache: {scenario_cache.hits} hits, {scenario_cache.misses} misses
     </div>
     """, unsafe_allow_html=True)
 
+# --- Adjacent Page Prefetch ---
+# While a page is shown, the data and figures of the previous and next pages are built in a
+# background thread pool. They land in the same process-wide caches the pages read from
+# (figure_tasks, data_loader, the rendered choropleth), so the navigation buttons switch
+# to ready-made objects. Pages are prefetched with their sidebar defaults, which is what a
+# page switch shows.
+PAGE_ORDER = ['dashboard1', 'dashboard2', 'dashboard3']
+
+def prefetch_dashboard1(selected_districts):
+    # No st.error off the script thread: the page reports the loading errors when shown
+    d1 = build_dashboard1_data()
+    run_tasks(figure_tasks_d1(d1, selected_districts))
+    if d1.geojson_data:
+        fill_colors, legend_html = map_colors_d1(d1, "Continuous")
+        cached_choropleth(d1.geojson_data, fill_colors, selected=selected_districts, legend_html=legend_html)
+
+def prefetch_dashboard2():
+    run_tasks(figure_tasks_d2(load_dashboard2_data(), **DEFAULTS_D2))
+
+def prefetch_dashboard3():
+    defaults = dict(DEFAULTS_D3)
+    remaining_values, _ = remaining_allocation_d3(defaults["incentive_budget"], defaults.pop("allocation_mode"), load_programs(PROGRAMS_PATH))
+    run_tasks(figure_tasks_d3(load_dashboard3_data(), remaining_values=remaining_values, **defaults))
+
+# Page -> function building its data and default figures
+PAGE_PREFETCHERS = {
+    'dashboard1': prefetch_dashboard1,
+    'dashboard2': prefetch_dashboard2,
+    'dashboard3': prefetch_dashboard3,
+}
+
+def prefetch_inputs(page, selected_districts):
+    """
+    Arguments of a page's prefetcher, also part of its de-duplication key.
+
+    Parameters:
+    page (str): A key of PAGE_PREFETCHERS.
+    selected_districts (tuple): Districts selected on the Dashboard 1 map, the only filter kept
+    across page switches (only Dashboard 1 uses it).
+
+    Returns:
+    tuple: Arguments of PAGE_PREFETCHERS[page].
+    """
+    return (selected_districts,) if page == 'dashboard1' else ()
+
+@st.cache_resource(show_spinner=False)
+def page_prefetcher():
+    """
+    Thread pool shared by all sessions, with the prefetches still running.
+
+    Returns:
+    SimpleNamespace: executor, pending ((page, *prefetch inputs) -> Future) and its lock.
+    """
+    return SimpleNamespace(
+        executor=ThreadPoolExecutor(max_workers=2, thread_name_prefix="page-prefetch"),
+        pending={},
+        lock=threading.Lock(),
+    )
+
+def prefetch_adjacent_pages(page, selected_districts):
+    """
+    Start building the pages next to the current one, unless already in progress.
+
+    Parameters:
+    page (str): Current page (a key of PAGE_PREFETCHERS).
+    selected_districts (tuple): Districts selected on the Dashboard 1 map.
+    """
+    prefetcher = page_prefetcher()
+    index = PAGE_ORDER.index(page)
+    neighbours = [PAGE_ORDER[i] for i in (index - 1, index + 1) if 0 <= i < len(PAGE_ORDER)]
+    with prefetcher.lock:
+        for neighbour in neighbours:
+            inputs = prefetch_inputs(neighbour, selected_districts)
+            key = (neighbour,) + inputs
+            if key in prefetcher.pending and not prefetcher.pending[key].done():
+                continue
+            future = prefetcher.executor.submit(PAGE_PREFETCHERS[neighbour], *inputs)
+            prefetcher.pending[key] = future
+        # Forget finished prefetches (failures are left to the page itself to report)
+        for key in [key for key, future in prefetcher.pending.items() if future.done()]:
+            del prefetcher.pending[key]
+
 # --- Main App Logic ---
 
 # Apply CSS, Title, Sidebar and Content based on the current page
+# Only the data of the page being shown is built (and cached by its provider)
+page_data = PAGE_DATA_PROVIDERS[st.session_state.page]()
+
 if st.session_state.page == 'dashboard1':
     st.markdown(css_dashboard1, unsafe_allow_html=True)
     st.markdown('<div class="title-bar">Strategic Overview: <b> Rent Prices in Madrid represent a serious problem for the youth population.</b></div>', unsafe_allow_html=True)
-    kpi_district_d1 = display_dashboard1_sidebar()
-    display_dashboard1_content(kpi_district_d1)
+    kpi_district_d1, kpi_window_d1 = display_dashboard1_sidebar(page_data)
+    display_dashboard1_content(page_data, kpi_district_d1, kpi_window_d1)
 
 elif st.session_state.page == 'dashboard2':
     st.markdown(css_dashboard2, unsafe_allow_html=True)
     # Ensure space after colon in the title string
     st.markdown('<div class="title-bar"><b>Tactical Decisions: </b> Smart Rent Control Implementation</div>', unsafe_allow_html=True)
-    selected_districts_d2, incentive_level_d2, implementation_timeline_d2, tenant_category_d2 = display_dashboard2_sidebar()
-    display_dashboard2_content(selected_districts_d2, incentive_level_d2, implementation_timeline_d2, tenant_category_d2)
+    selected_districts_d2, incentive_level_d2, implementation_timeline_d2, tenant_category_d2 = display_dashboard2_sidebar(page_data)
+    display_dashboard2_content(page_data, selected_districts_d2, incentive_level_d2, implementation_timeline_d2, tenant_category_d2)
 
 elif st.session_state.page == 'dashboard3':
     st.markdown(css_dashboard3, unsafe_allow_html=True)
     st.markdown('<div class="title-bar"><b>Analytical Insights:</b> Deep-Dive Financial Analysis</div>', unsafe_allow_html=True)
-    incentive_budget_d3, tax_savings_d3, growth_rate_without_d3, growth_rate_with_d3, selected_districts_d3, analysis_view_d3 = display_dashboard3_sidebar()
-    display_dashboard3_content(incentive_budget_d3, tax_savings_d3, growth_rate_without_d3, growth_rate_with_d3, selected_districts_d3, analysis_view_d3)
+    incentive_budget_d3, tax_savings_d3, growth_rate_without_d3, growth_rate_with_d3, selected_districts_d3, analysis_view_d3, allocation_mode_d3 = display_dashboard3_sidebar(page_data)
+    display_dashboard3_content(page_data, incentive_budget_d3, tax_savings_d3, growth_rate_without_d3, growth_rate_with_d3, selected_districts_d3, analysis_view_d3, allocation_mode_d3)
+
+# Build the previous and next pages in the background while this one is being looked at
+prefetch_adjacent_pages(st.session_state.page, tuple(st.session_state.selected_districts))
 
 # --- Navigation Buttons ---
 st.divider()
@@ -0,0 +1,176 @@
+"""
+District choropleth for the Streamlit pages, built once and reused across reruns.
+
+The map is a single folium.GeoJson layer. Each feature carries its precomputed style in its
+properties, so there is one style lookup instead of one layer, tooltip and style callback per
+district. The folium.Map is cached by its inputs: the geometry, the fill color of every
+district (which reflects both the data version and the color scale), the selected districts
+and the legend. Reruns triggered by unrelated widgets reuse it and only hand it to st_folium.
+"""
+import threading
+from collections import OrderedDict
+
+import folium
+from streamlit_folium import st_folium
+
+MAP_LOCATION = [40.417101, -3.695899]
+MAP_ZOOM = 10
+MAP_TILES = "cartodbpositron"
+
+BASE_STYLE = {'color': 'gray', 'weight': 1, 'fillOpacity': 0.6}
+# Outline of the districts selected in the sidebar
+SELECTED_STYLE = {'color': 'black', 'weight': 3, 'fillOpacity': 0.8}
+HIGHLIGHT_STYLE = {'weight': 3, 'fillOpacity': 0.9}
+
+# Number of maps kept in memory (process wide)
+CACHE_SIZE = 32
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _feature_style(feature):
+    return feature['properties']['style']
+
+
+def _highlight_style(feature):
+    return HIGHLIGHT_STYLE
+
+
+def styled_features(geojson, fill_colors, selected=()):
+    """
+    Copy of the district GeoJSON with each feature's style stored in its properties.
+
+    Geometries are shared with the input, which is not modified.
+
+    Parameters:
+    geojson (dict): District boundaries with a 'NOMBRE' property.
+    fill_colors (dict): District name -> fill color. Districts without one keep Leaflet's default.
+    selected (iterable): Districts to outline.
+
+    Returns:
+    dict: FeatureCollection ready for a single folium.GeoJson layer.
+    """
+    selected = set(selected)
+    features = []
+    for feature in geojson['features']:
+        name = feature['properties'].get('NOMBRE', 'Unknown')
+        style = dict(BASE_STYLE, fillColor=fill_colors.get(name))
+        if name in selected:
+            style.update(SELECTED_STYLE)
+        features.append({
+            'type': 'Feature',
+            'properties': dict(feature['properties'], NOMBRE=name, style=style),
+            'geometry': feature['geometry'],
+        })
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def build_choropleth(geojson, fill_colors, selected=(), legend_html=None, tooltip_sticky=True):
+    """
+    Build the district choropleth as a folium map with a single GeoJson layer.
+
+    Parameters:
+    geojson (dict): District boundaries with a 'NOMBRE' property.
+    fill_colors (dict): District name -> fill color.
+    selected (iterable): Districts to outline.
+    legend_html (str): Optional legend added to the map's HTML.
+    tooltip_sticky (bool): Whether the tooltip follows the mouse.
+
+    Returns:
+    folium.Map: The map.
+    """
+    m = folium.Map(location=MAP_LOCATION, zoom_start=MAP_ZOOM, tiles=MAP_TILES)
+    folium.GeoJson(
+        styled_features(geojson, fill_colors, selected),
+        style_function=_feature_style,
+        highlight_function=_highlight_style,
+        tooltip=folium.GeoJsonTooltip(fields=["NOMBRE"], aliases=["District:"], sticky=tooltip_sticky),
+        popup=folium.GeoJsonPopup(fields=["NOMBRE"], labels=False),
+    ).add_to(m)
+    if legend_html:
+        m.get_root().html.add_child(folium.Element(legend_html))
+    return m
+
+
+def _cached_entry(geojson, fill_colors, selected, legend_html, tooltip_sticky):
+    key = (id(geojson), tuple(sorted(fill_colors.items())), tuple(sorted(selected)), legend_html, tooltip_sticky)
+    with _cache_lock:
+        entry = _cache.get(key)
+        # The GeoJSON is kept in the entry, so a matching id always means the same object
+        if entry is not None and entry[0] is geojson:
+            _cache.move_to_end(key)
+            return entry
+    m = build_choropleth(geojson, fill_colors, selected, legend_html, tooltip_sticky)
+    with _cache_lock:
+        entry = _cache.setdefault(key, (geojson, m, threading.Lock()))
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return entry
+
+
+def cached_choropleth(geojson, fill_colors, selected=(), legend_html=None, tooltip_sticky=True):
+    """
+    The district choropleth from the cache, building it on a miss (also usable from a background
+    thread, so a later st_choropleth call with the same arguments finds it ready).
+
+    Parameters:
+    geojson (dict): District boundaries with a 'NOMBRE' property.
+    fill_colors (dict): District name -> fill color.
+    selected (iterable): Districts to outline.
+    legend_html (str): Optional legend added to the map's HTML.
+    tooltip_sticky (bool): Whether the tooltip follows the mouse.
+
+    Returns:
+    folium.Map: The shared map (do not modify).
+    """
+    return _cached_entry(geojson, fill_colors, tuple(selected), legend_html, tooltip_sticky)[1]
+
+
+def st_choropleth(geojson, fill_colors, selected=(), legend_html=None, tooltip_sticky=True,
+                  key=None, width=700, height=250):
+    """
+    Show the district choropleth with st_folium, reusing the cached map when nothing changed.
+
+    Parameters:
+    geojson (dict): District boundaries with a 'NOMBRE' property.
+    fill_colors (dict): District name -> fill color.
+    selected (iterable): Districts to outline.
+    legend_html (str): Optional legend added to the map's HTML.
+    tooltip_sticky (bool): Whether the tooltip follows the mouse.
+    key (str): Streamlit widget key.
+    width, height (int): Size of the map in pixels.
+
+    Returns:
+    dict: Interaction data returned by st_folium (last clicked object, bounds, zoom, ...).
+    """
+    _, m, lock = _cached_entry(geojson, fill_colors, tuple(selected), legend_html, tooltip_sticky)
+    # st_folium renders the map, which updates its elements: one session at a time per map
+    with lock:
+        return st_folium(m, key=key, width=width, height=height)
+
+
+def clicked_district(map_result, state, key):
+    """
+    District of a map click that has not been handled yet.
+
+    st_folium keeps returning the last click on every rerun, so the click last handled is
+    remembered in state[key]; the same click then returns None.
+
+    Parameters:
+    map_result (dict): Interaction data returned by st_choropleth / st_folium.
+    state (MutableMapping): Where to remember the last click (e.g. st.session_state).
+    key (str): Entry of state used for it.
+
+    Returns:
+    str: Name of the clicked district (the popup text), or None.
+    """
+    popup = (map_result or {}).get("last_object_clicked_popup")
+    if not popup or not popup.strip():
+        return None
+    click = (popup, str(map_result.get("last_object_clicked")), map_result.get("last_object_clicked_count"))
+    if state.get(key) == click:
+        return None
+    state[key] = click
+    return popup.strip()
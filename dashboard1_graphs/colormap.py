@@ -0,0 +1,248 @@
+"""
+Vectorized color scales for the district maps.
+
+A color scale is built once from the data (per dataset version, see
+data_loader.load_color_scale) and then maps a whole array of values to colors in one call:
+values are turned into indices of a precomputed lookup table of hex colors, with no
+per-value normalization or string formatting. The same scale gives the legend stops, so the
+legend always matches the colors on the map.
+
+Supported classifications:
+- 'linear': continuous ramp between the minimum and the maximum (the original black-to-red map),
+- 'quantile': classes with the same number of values,
+- 'jenks': natural breaks (Fisher-Jenks), minimizing the variance within each class.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+# Original map colors: black (lowest rent) to red (highest rent)
+RAMP = ('#000000', '#ff0000')
+LUT_SIZE = 256
+METHODS = ('linear', 'quantile', 'jenks')
+
+# Jenks is quadratic in the number of values; larger inputs are summarized by their quantiles
+JENKS_MAX_VALUES = 1000
+
+# breaks: class edges (minimum, ..., maximum); colors: one per class ('linear': the LUT)
+ColorScale = namedtuple('ColorScale', ['method', 'breaks', 'colors'])
+
+
+def _rgb(color):
+    color = color.lstrip('#')
+    return [int(color[i:i + 2], 16) for i in (0, 2, 4)]
+
+
+def build_lut(ramp=RAMP, size=LUT_SIZE):
+    """
+    Interpolate a color ramp into a lookup table.
+
+    Parameters:
+    ramp (sequence): Hex colors spread evenly from the low end to the high end.
+    size (int): Number of entries.
+
+    Returns:
+    np.ndarray: size hex color strings.
+    """
+    anchors = np.array([_rgb(color) for color in ramp], dtype=np.float64)
+    positions = np.linspace(0, 1, len(ramp))
+    steps = np.linspace(0, 1, size)
+    channels = np.column_stack([np.interp(steps, positions, anchors[:, c]) for c in range(3)])
+    channels = np.floor(channels + 1e-9).astype(np.int64)
+    return np.array(['#%02x%02x%02x' % tuple(rgb) for rgb in channels.tolist()])
+
+
+def _jenks_breaks(values, classes):
+    """Fisher-Jenks natural breaks of sorted values (dynamic programming on prefix sums)."""
+    n = len(values)
+    prefix = np.concatenate([[0.0], np.cumsum(values)])
+    prefix_sq = np.concatenate([[0.0], np.cumsum(values ** 2)])
+
+    def within(first, last):
+        # Sum of squared deviations of values[first:last + 1] (first may be an array)
+        count = last + 1 - first
+        total = prefix[last + 1] - prefix[first]
+        return prefix_sq[last + 1] - prefix_sq[first] - total ** 2 / count
+
+    # cost[c, j]: best cost of values[:j + 1] in c + 1 classes; start[c, j]: first index of the last class
+    cost = np.full((classes, n), np.inf)
+    start = np.zeros((classes, n), dtype=np.int64)
+    cost[0] = within(0, np.arange(n))
+    for c in range(1, classes):
+        for j in range(c, n):
+            firsts = np.arange(c, j + 1)
+            candidates = cost[c - 1, firsts - 1] + within(firsts, j)
+            best = int(np.argmin(candidates))
+            cost[c, j] = candidates[best]
+            start[c, j] = firsts[best]
+
+    edges = [values[-1]]
+    last = n - 1
+    for c in range(classes - 1, 0, -1):
+        first = start[c, last]
+        edges.append(values[first])
+        last = first - 1
+    edges.append(values[0])
+    return np.array(edges[::-1])
+
+
+def class_breaks(values, method='quantile', classes=5):
+    """
+    Class edges of a set of values.
+
+    Parameters:
+    values (array-like): Values to classify (NaN ignored).
+    method (str): 'linear' (equal intervals), 'quantile' or 'jenks'.
+    classes (int): Number of classes.
+
+    Returns:
+    np.ndarray: classes + 1 increasing edges, from the minimum to the maximum (fewer when there
+    are not enough distinct values).
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown classification method: {method}")
+    values = np.asarray(values, dtype=np.float64)
+    values = np.sort(values[np.isfinite(values)])
+    if len(values) == 0:
+        return np.array([0.0, 1.0])
+    classes = max(1, min(classes, len(np.unique(values))))
+
+    if method == 'linear':
+        breaks = np.linspace(values[0], values[-1], classes + 1)
+    elif method == 'quantile':
+        breaks = np.quantile(values, np.linspace(0, 1, classes + 1))
+    else:
+        if len(values) > JENKS_MAX_VALUES:
+            values = np.quantile(values, np.linspace(0, 1, JENKS_MAX_VALUES))
+        breaks = _jenks_breaks(values, classes)
+    breaks = np.unique(breaks)
+    return breaks if len(breaks) > 1 else np.array([breaks[0], breaks[0]])
+
+
+def build_color_scale(values, method='linear', classes=5, ramp=RAMP, lut_size=LUT_SIZE):
+    """
+    Color scale for a set of values.
+
+    Parameters:
+    values (array-like): Values the scale must cover (e.g. the all-time mean rent per district).
+    method (str): 'linear', 'quantile' or 'jenks'.
+    classes (int): Number of classes ('quantile' / 'jenks'); 'linear' is continuous.
+    ramp (sequence): Hex colors from the low end to the high end.
+    lut_size (int): Number of colors of the 'linear' lookup table.
+
+    Returns:
+    ColorScale: method, breaks and colors.
+    """
+    if method == 'linear':
+        breaks = class_breaks(values, 'linear', 1)
+        return ColorScale(method, breaks, build_lut(ramp, lut_size))
+    breaks = class_breaks(values, method, classes)
+    return ColorScale(method, breaks, build_lut(ramp, len(breaks) - 1))
+
+
+def color_indices(values, scale):
+    """
+    Index in scale.colors of each value.
+
+    Parameters:
+    values (array-like): Values to color.
+    scale (ColorScale): Scale from build_color_scale.
+
+    Returns:
+    np.ndarray: int64 indices, same shape as values (NaN maps to the lowest color).
+    """
+    values = np.nan_to_num(np.asarray(values, dtype=np.float64), nan=scale.breaks[0])
+    if scale.method == 'linear':
+        low, high = scale.breaks[0], scale.breaks[-1]
+        norm = (values - low) / (high - low) if high > low else np.zeros_like(values)
+        indices = (norm * (len(scale.colors) - 1)).astype(np.int64)
+    else:
+        indices = np.searchsorted(scale.breaks[1:-1], values, side='right')
+    return np.clip(indices, 0, len(scale.colors) - 1)
+
+
+def map_colors(values, scale):
+    """
+    Hex color of each value.
+
+    Parameters:
+    values (array-like): Values to color.
+    scale (ColorScale): Scale from build_color_scale.
+
+    Returns:
+    np.ndarray: Hex color strings, same shape as values.
+    """
+    return scale.colors[color_indices(values, scale)]
+
+
+def legend_stops(scale):
+    """
+    Stops of the legend.
+
+    Parameters:
+    scale (ColorScale): Scale from build_color_scale.
+
+    Returns:
+    list: (low, high, color) per class; a single (minimum, maximum, None) for 'linear'.
+    """
+    if scale.method == 'linear':
+        return [(float(scale.breaks[0]), float(scale.breaks[-1]), None)]
+    return [(float(low), float(high), color)
+            for low, high, color in zip(scale.breaks[:-1], scale.breaks[1:], scale.colors)]
+
+
+def legend_gradient(scale):
+    """
+    CSS background of the legend bar: a smooth gradient, or hard stops between classes.
+
+    Parameters:
+    scale (ColorScale): Scale from build_color_scale.
+
+    Returns:
+    str: CSS linear-gradient.
+    """
+    if scale.method == 'linear':
+        # A few samples of the LUT keep multi-color ramps (e.g. diverging) intact
+        samples = scale.colors[np.linspace(0, len(scale.colors) - 1, 5).round().astype(np.int64)]
+        return f"linear-gradient(to right, {', '.join(dict.fromkeys(samples.tolist()))})"
+    width = 100 / len(scale.colors)
+    stops = ', '.join(f"{color} {i * width:g}% {(i + 1) * width:g}%" for i, color in enumerate(scale.colors))
+    return f"linear-gradient(to right, {stops})"
+
+
+def legend_html(scale, title, box_style, labels=None, decimals=1):
+    """
+    HTML legend for a folium map, built from the scale's breaks.
+
+    Parameters:
+    scale (ColorScale): Scale from build_color_scale.
+    title (str): Legend title.
+    box_style (str): CSS of the legend box (position, size, border...).
+    labels (tuple): (low, high) labels shown instead of the values, e.g. ('Low', 'High').
+    decimals (int): Decimals of the values.
+
+    Returns:
+    str: The legend's HTML.
+    """
+    if labels is not None:
+        low, high = labels
+        values = f'<div style="font-size:12px;">{low}<span style="float:right;">{high}</span></div>'
+        bar_first = False
+    elif scale.method == 'linear':
+        values = (f'<div style="font-size:10px;">{scale.breaks[0]:.{decimals}f}'
+                  f'<span style="float:right;">{scale.breaks[-1]:.{decimals}f}</span></div>')
+        bar_first = True
+    else:
+        # One label per edge, spread under the class boundaries
+        width = 100 / (len(scale.breaks) - 1)
+        values = ''.join(
+            f'<span style="position:absolute; left:{i * width:g}%; transform:translateX(-{i * width:g}%);">'
+            f'{edge:.{decimals}f}</span>'
+            for i, edge in enumerate(scale.breaks))
+        values = f'<div style="position:relative; height:12px; font-size:10px;">{values}</div>'
+        bar_first = True
+    bar = f'<div style="width:100%; height:10px; background: {legend_gradient(scale)}; margin-bottom: 3px;"></div>'
+    body = bar + values if bar_first else values + bar
+    return (f'<div style="{box_style}">'
+            f'<div style="text-align:center; margin-bottom: 5px;"><b>{title}</b></div>'
+            f'{body}</div>')
@@ -1,7 +1,7 @@
+import os
+import sys
 import streamlit as st
-import json
-import folium
-from streamlit_folium import st_folium
+from streamlit.errors import StreamlitAPIException
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
@@ -10,37 +10,45 @@ import plotly.graph_objects as go
 import plotly.io as pio
 from io import StringIO
 
-from utils import bucket_1, bucket_2, bucket_3, bucket_4, bucket_5  # Assuming these have been updated as above
+# Make the repository root importable when run as `streamlit run dashboard1_graphs/dashboard1.py`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dashboard1_graphs.utils import bucket_5, kpi_value
+from dashboard1_graphs.data_loader import load_color_scale, load_district_geometry, load_prices, load_price_aggregates, load_kpi_table, load_rent_index, load_youth_salary
+from dashboard1_graphs.rent_index import default_kpi_window, window_kpi_table
+from dashboard1_graphs.data_watcher import refresh_on_data_change
+from dashboard1_graphs.choropleth import MAP_ZOOM, clicked_district, st_choropleth
+from dashboard1_graphs.colormap import legend_html as colormap_legend_html, map_colors
 
 # ------------------ Data Loading & Preparation ------------------
-# Load GeoJSON for Madrid districts
+# Data is parsed once per process by data_loader and shared across reruns and sessions
+# Load GeoJSON for Madrid districts, simplified for the map's zoom level
 try:
-    with open('data/DistritosMadrid.geojson', 'r', encoding='utf-8') as f:
-        geojson_data = json.load(f)
+    geojson_data = load_district_geometry(MAP_ZOOM).geojson
 except FileNotFoundError:
     st.error("GeoJSON file not found. Please check the file path.")
     st.stop()
 
 # Load rental prices data
-df_prices = pd.read_csv('data/prices.csv')
-df_prices['Date'] = pd.to_datetime(df_prices['Date'])
+df_prices = load_prices()
 
-# Calculate average rent per district over time for the line chart
-df_avg = df_prices.groupby(['Date', 'District'])['Rent_Price'].mean().reset_index()
+# Average rent per district over time (line chart), overall average (mean line)
+# and average rent per district (map)
+aggregates = load_price_aggregates()
+df_avg = aggregates.df_avg
+overall_df = aggregates.overall_df
+district_avgs = aggregates.district_avgs
+min_rent = aggregates.min_rent
+max_rent = aggregates.max_rent
 
-# Compute overall average rent (used to add an overall mean line)
-overall_df = df_prices.groupby('Date')['Rent_Price'].mean().reset_index()
+# KPIs (CAGR, max, rank, average) of every district and "All", computed in one pass
+kpi_table = load_kpi_table()
 
-# Calculate average rent per district for the map
-district_avgs = df_prices.groupby('District')['Rent_Price'].mean().to_dict()
-min_rent = min(district_avgs.values())
-max_rent = max(district_avgs.values())
+# Prefix-sum index answering the KPIs for any date window
+rent_index = load_rent_index()
 
-def get_color(val, min_val, max_val):
-    """Compute a hex color (red scale) based on the normalized value."""
-    norm = (val - min_val) / (max_val - min_val) if max_val > min_val else 0
-    red_level = int(norm * 255)
-    return f"#{red_level:02x}0000"
+# Classification of the map colors (label -> colormap method)
+MAP_COLOR_METHODS = {"Continuous": "linear", "Quantiles": "quantile", "Natural Breaks": "jenks"}
 
 # ------------------ Session State for Filters ------------------
 if 'selected_districts' not in st.session_state:
@@ -56,6 +64,9 @@ def toggle_district(district):
 # ------------------ Page Configuration & Custom CSS ------------------
 st.set_page_config(page_title="Dashboard 1", layout="wide")
 
+# Rerun when a file in data/ changes (cached data is invalidated by the watcher)
+refresh_on_data_change()
+
 hide_streamlit_style = """
     <style>
         #MainMenu {visibility: hidden;}
@@ -128,22 +139,18 @@ with st.sidebar:
         help="Select districts to filter the data."
     )
     st.session_state.selected_districts = selected_districts
+    st.radio("Map Colors", options=list(MAP_COLOR_METHODS), horizontal=True, key="map_colors")
 
-    # --- KPI Filter ---
-    st.markdown("<hr>", unsafe_allow_html=True)
-    st.subheader("KPI Filter")
-    kpi_district = st.selectbox(
-        "Select District for KPIs",
-        options=["All"] + district_list,
-        index=0
-    )
 
 # ------------------ Main Dashboard Content ------------------
 # Main Dashboard Content
 # st.markdown("<div style='height: 80px;'></div>", unsafe_allow_html=True)  # Removed this spacer
-col1, col2 = st.columns(2)
 
-with col1:
+# Each fragment reruns on its own: a map click or a KPI selection only recomputes its own
+# widgets instead of the whole page (CSS, data, other charts)
+@st.fragment
+def line_chart_and_map():
+    """Line chart and map; a click on a district toggles it in both."""
     # --- Container 1: Line Chart ---
     with st.container():
         if st.session_state.get("selected_districts"):
@@ -181,55 +188,61 @@ with col1:
     # --- Container 2: Map ---
     with st.container():
         # Removed the margin-top div
-        m = folium.Map(location=[40.417101, -3.695899], zoom_start=10, tiles="cartodbpositron")
-        for feature in geojson_data['features']:
-            district_name = feature['properties'].get('NOMBRE', 'Unknown')
-            avg_rent = district_avgs.get(district_name, min_rent)
-            fill_color = get_color(avg_rent, min_rent, max_rent)
-            folium.GeoJson(
-                feature,
-                style_function=lambda x, fill_color=fill_color: {
-                    'fillColor': fill_color,
-                    'color': 'gray',
-                    'weight': 1,
-                    'fillOpacity': 0.6,
-                },
-                popup=district_name,
-                tooltip=folium.GeoJsonTooltip(
-                    fields=["NOMBRE"],
-                    aliases=["District:"],
-                    sticky=False
-                ),
-                highlight_function=lambda x: {'weight': 3, 'fillOpacity': 0.9},
-            ).add_to(m)
-        legend_html = """
-            <div style="position: absolute;
-            bottom: 0px; left: 20px; width: 150px; height: 70px; 
-            z-index:9999; font-size:12px;
-            background-color:white;
-            border:1px solid grey;
-            padding:0px;">
-            <div style="text-align:center"><b>Rent Range</b></div>
-            <div style="font-size:12px;">Low   <span style="float:right;">High</span></div>
-            <div style="width:100%; height:10px; background: linear-gradient(to right, #000000, #ff0000);"></div>
-            </div>
-            """
-        m.get_root().html.add_child(folium.Element(legend_html))
-        map_result = st_folium(m, width=700, height=250)
-        if map_result and map_result.get("last_object_clicked") is not None:
-            clicked = map_result["last_object_clicked"]
-            district_clicked = clicked.get("popup")
-            if district_clicked:
-                toggle_district(district_clicked)
-                st.experimental_rerun()
-                
+        # Breaks computed once per data version; all districts colored in one call
+        scale = load_color_scale(MAP_COLOR_METHODS[st.session_state.get("map_colors", "Continuous")])
+        district_names = [feature['properties'].get('NOMBRE', 'Unknown') for feature in geojson_data['features']]
+        avg_rents = [district_avgs.get(name, min_rent) for name in district_names]
+        fill_colors = dict(zip(district_names, map_colors(avg_rents, scale).tolist()))
+        legend_html = colormap_legend_html(
+            scale, "Rent Range",
+            "position: absolute; bottom: 0px; left: 20px; width: 150px; height: 70px; z-index:9999; font-size:12px; background-color:white; border:1px solid grey; padding:0px;",
+            labels=("Low", "High") if scale.method == "linear" else None
+        )
+        # One styled layer, rendered once per (colors, selection) and reused across reruns
+        map_result = st_choropleth(
+            geojson_data, fill_colors, selected=st.session_state.selected_districts,
+            legend_html=legend_html, tooltip_sticky=False, width=700, height=250
+        )
+        district_clicked = clicked_district(map_result, st.session_state, "map_last_click")
+        if district_clicked:
+            toggle_district(district_clicked)
+            # Only the chart and the map need the new selection; the sidebar multiselect
+            # picks it up on the next full rerun
+            try:
+                st.rerun(scope="fragment")
+            except StreamlitAPIException:
+                # The click reached a full run of the script (e.g. together with another widget)
+                st.rerun()
+
+@st.fragment
+def kpi_row():
+    """KPI filters and the four KPI buckets."""
+    district_list = sorted(df_prices['District'].unique())
+    filter_col, window_col = st.columns([1, 2])
+    with filter_col:
+        kpi_district = st.selectbox(
+            "Select District for KPIs",
+            options=["All"] + district_list,
+            index=0
+        )
+    with window_col:
+        # Date window for the KPIs, the full history by default (see default_kpi_window)
+        month_options = list(pd.to_datetime(rent_index.months).date)
+        kpi_window = st.select_slider(
+            "KPI Date Window",
+            options=month_options,
+            value=default_kpi_window(rent_index),
+            format_func=lambda d: d.strftime('%b %Y')
+        )
+    kpi_window_table = window_kpi_table(rent_index, *kpi_window)
+
     # --- Container 3: Buckets (4 Metrics) ---
     with st.container():
         bucket1_col, bucket2_col, bucket3_col, bucket4_col = st.columns(4)
         
         with bucket1_col:
             try:
-                value1 = bucket_1(df_prices, kpi_district)
+                value1 = kpi_value(kpi_window_table, kpi_district, 'CAGR')
                 st.metric(label="CAGR", value=value1 if value1 != "N/A" else "N/A")
             except Exception as e:
                 st.metric(label="CAGR", value="Error")
@@ -238,7 +251,7 @@ with col1:
             
         with bucket2_col:
             try:
-                value2 = bucket_2(df_prices, kpi_district)
+                value2 = kpi_value(kpi_window_table, kpi_district, 'Max_Rent')
                 st.metric(label="Max Rental", value=value2)
                 st.caption("Max Rent recorded (€/m²)")
             except Exception as e:
@@ -247,7 +260,7 @@ with col1:
             
         with bucket3_col:
             try:
-                value3 = bucket_3(df_prices, kpi_district)
+                value3 = kpi_value(kpi_window_table, kpi_district, 'Rank')
                 st.metric(label="Ranking", value=value3 if value3 != "N/A" else "N/A")
             except Exception as e:
                 st.metric(label="Ranking", value="Error")
@@ -256,16 +269,46 @@ with col1:
             
         with bucket4_col:
             try:
-                value4 = bucket_4(df_prices, kpi_district)
+                value4 = kpi_value(kpi_window_table, kpi_district, 'Avg_Rent')
                 st.metric(label="Avg Rent Price", value=value4 if value4 != "N/A" else "N/A")
             except Exception as e:
                 st.metric(label="Avg Rent Price", value="Error")
                 st.caption(f"Error: {str(e)}")
             st.caption("Average Rent Price (€/m²)")
 
+@st.fragment
+def required_income_bucket():
+    """Required income for a 100m² apartment in the selected district."""
+    # --- New Filter and Bucket: Required Income for 100m² Apartment ---
+    with st.container():
+        # Add a filter for selecting the district for the Required Income metric
+        district_list = sorted(df_prices['District'].unique())
+        required_income_district = st.selectbox(
+            "Select District for Required Income",
+            options=["All"] + district_list,
+            index=0,
+            key="required_income_district_selectbox"
+        )
+
+        # Calculate the required income based on the selected district
+        avg_rent_price = kpi_value(kpi_table, required_income_district, 'Avg_Rent')
+        if avg_rent_price != "N/A":
+            required_income = bucket_5(avg_rent_price, surface=100)
+            st.metric(label=f"Required Income (100m²) - {required_income_district}", value=f"€{required_income}")
+            st.caption("Net income needed (40% to rent)")
+        else:
+            st.metric(label=f"Required Income (100m²) - {required_income_district}", value="N/A")
+            st.caption("Net income needed (40% to rent)")
+
+col1, col2 = st.columns(2)
+
+with col1:
+    line_chart_and_map()
+    kpi_row()
+
 with col2:
     # --- Graph 1: Youth Salary vs Rent Prices ---
-    df_youth = pd.read_csv("data/Youth_Salary_vs_Rent_Prices.csv")
+    df_youth = load_youth_salary()
     fig1 = go.Figure()
     fig1.add_trace(go.Bar(
         x=df_youth["Year"],
@@ -307,26 +350,7 @@ with col2:
     
     col4, col5 = st.columns([1,2])
     with col4:
-        # --- New Filter and Bucket: Required Income for 100m² Apartment ---
-        with st.container():
-            # Add a filter for selecting the district for the Required Income metric
-            district_list = sorted(df_prices['District'].unique())
-            required_income_district = st.selectbox(
-                "Select District for Required Income",
-                options=["All"] + district_list,
-                index=0,
-                key="required_income_district_selectbox"
-            )
-            
-            # Calculate the required income based on the selected district
-            avg_rent_price = bucket_4(df_prices, required_income_district)
-            if avg_rent_price != "N/A":
-                required_income = bucket_5(avg_rent_price, surface=100)
-                st.metric(label=f"Required Income (100m²) - {required_income_district}", value=f"€{required_income}")
-                st.caption("Net income needed (40% to rent)")
-            else:
-                st.metric(label=f"Required Income (100m²) - {required_income_district}", value="N/A")
-                st.caption("Net income needed (40% to rent)")
+        required_income_bucket()
     with col5:
     
         # --- Graph 2: Comparison: Madrid vs Europe (Horizontal Bar Chart) ---
@@ -0,0 +1,286 @@
+"""
+Shared data access for the dashboards.
+
+Every source file is parsed once per process and kept in memory, keyed on its absolute
+path, modification time and size. combined_dashboard.py, dashboard1.py and map_d1.py all
+load their data through this module, so Streamlit reruns (and Dash callbacks) reuse the
+same objects instead of re-reading the CSV / GeoJSON and re-running the aggregations.
+
+prices.csv is read through its columnar snapshot (see snapshot.py), so the numeric columns
+are memory-mapped rather than parsed.
+
+The returned DataFrames are shared between sessions and their underlying arrays are
+read-only: call .copy() before modifying one.
+"""
+import os
+import json
+import threading
+from collections import namedtuple
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+
+from dashboard1_graphs import colormap, frames, geometry, incremental, snapshot
+from dashboard1_graphs.rent_index import build_rent_index
+from dashboard1_graphs.utils import build_rent_matrix, compute_kpi_table
+
+PRICES_PATH = 'data/prices.csv'
+GEOJSON_PATH = 'data/DistritosMadrid.geojson'
+YOUTH_SALARY_PATH = 'data/Youth_Salary_vs_Rent_Prices.csv'
+
+# Aggregations of prices.csv used by the line chart (df_avg, overall_df) and the map colors
+PriceAggregates = namedtuple('PriceAggregates', ['df_avg', 'overall_df', 'district_avgs', 'min_rent', 'max_rent'])
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def file_key(path):
+    """
+    Identify the current version of a file.
+
+    Parameters:
+    path (str): Path to the file.
+
+    Returns:
+    tuple: (absolute path, modification time in ns, size in bytes).
+    """
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+def _cached(kind, path, builder):
+    """Return builder(path) from the process cache, rebuilding it when the file changed."""
+    key = (kind,) + file_key(path)
+    with _cache_lock:
+        if key in _cache:
+            return _cache[key]
+    value = builder(path)
+    with _cache_lock:
+        # Drop anything built from an older version of the same file
+        for stale in [k for k in _cache if k[:2] == key[:2] and k != key]:
+            del _cache[stale]
+        return _cache.setdefault(key, value)
+
+
+def invalidate(path=None):
+    """
+    Drop cached objects so they are rebuilt on the next load.
+
+    Parameters:
+    path (str): Only drop objects built from this file. Default None drops everything.
+    """
+    with _cache_lock:
+        if path is None:
+            _cache.clear()
+            return
+        abs_path = os.path.abspath(path)
+        for key in [k for k in _cache if k[1] == abs_path]:
+            del _cache[key]
+
+
+def _readonly(values):
+    values = np.asarray(values)
+    values.flags.writeable = False
+    return values
+
+
+def _frozen_frame(columns):
+    """Build a DataFrame directly on top of read-only arrays (no copy)."""
+    return pd.DataFrame({name: _readonly(values) for name, values in columns.items()}, copy=False)
+
+
+def _read_prices(path):
+    try:
+        # Memory-mapped columnar snapshot, rebuilt when the CSV is newer
+        columns = snapshot.load_snapshot(path)
+    except OSError:
+        # Snapshot directory not writable: fall back to parsing the CSV
+        columns = snapshot.read_prices_columns(path)
+    return _frozen_frame(columns)
+
+
+def _price_aggregates(path):
+    # Kept up to date by incremental.append_month; otherwise aggregated from the rows
+    running = incremental.load_running_aggregates(path)
+    if running is None:
+        df_prices = load_prices(path)
+        running = incremental.compute_running_aggregates({col: df_prices[col].to_numpy() for col in df_prices.columns})
+    df_avg, overall_df, district_avgs = incremental.aggregate_columns(running)
+    return PriceAggregates(
+        df_avg=_frozen_frame(df_avg),
+        overall_df=_frozen_frame(overall_df),
+        district_avgs=MappingProxyType(district_avgs),
+        min_rent=min(district_avgs.values()) if district_avgs else 0,
+        max_rent=max(district_avgs.values()) if district_avgs else 1,
+    )
+
+
+def _read_csv(path):
+    df = pd.read_csv(path)
+    return _frozen_frame({col: df[col].to_numpy() for col in df.columns})
+
+
+def _read_geojson(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _geometry_tiers(path):
+    return geometry.build_geometry_tiers(load_geojson(path))
+
+
+def load_prices(path=PRICES_PATH):
+    """
+    Load the long rent table (Date, District, COD_DIS, Rent_Price) with Date parsed.
+
+    Parameters:
+    path (str): Path to prices.csv.
+
+    Returns:
+    pd.DataFrame: Shared, read-only DataFrame.
+    """
+    return _cached('prices', path, _read_prices)
+
+
+def load_price_aggregates(path=PRICES_PATH):
+    """
+    Load the aggregations of prices.csv used by Dashboard 1.
+
+    Parameters:
+    path (str): Path to prices.csv.
+
+    Returns:
+    PriceAggregates: df_avg (mean rent per Date and District), overall_df (mean rent per Date),
+    district_avgs (read-only mapping District -> all-time mean rent), min_rent and max_rent.
+    """
+    return _cached('price_aggregates', path, _price_aggregates)
+
+
+def load_rent_matrix(path=PRICES_PATH):
+    """
+    Load the dense district x month matrix of prices.csv used by the KPI buckets.
+
+    Parameters:
+    path (str): Path to prices.csv.
+
+    Returns:
+    RentMatrix: See utils.build_rent_matrix.
+    """
+    return _cached('rent_matrix', path, lambda p: build_rent_matrix(load_prices(p)))
+
+
+def load_kpi_table(path=PRICES_PATH):
+    """
+    Load the KPIs of buckets 1-4 for every district and "All" (see utils.compute_kpi_table).
+
+    Parameters:
+    path (str): Path to prices.csv.
+
+    Returns:
+    pd.DataFrame: KPI table indexed by District; read it with utils.kpi_value.
+    """
+    return _cached('kpi_table', path, lambda p: compute_kpi_table(load_rent_matrix(p)))
+
+
+def load_rent_index(path=PRICES_PATH):
+    """
+    Load the window index answering arbitrary date-window KPIs (see rent_index.py).
+
+    Parameters:
+    path (str): Path to prices.csv.
+
+    Returns:
+    RentWindowIndex: Prefix sums, sparse max table and valid-month lookups of the rent matrix.
+    """
+    return _cached('rent_index', path, lambda p: build_rent_index(load_rent_matrix(p)))
+
+
+def load_youth_salary(path=YOUTH_SALARY_PATH):
+    """
+    Load the yearly average youth salary and monthly rent.
+
+    Parameters:
+    path (str): Path to Youth_Salary_vs_Rent_Prices.csv.
+
+    Returns:
+    pd.DataFrame: Shared, read-only DataFrame (Year, Average_Youth_Salary, Average_Monthly_Rent).
+    """
+    return _cached('youth_salary', path, _read_csv)
+
+
+def load_geojson(path=GEOJSON_PATH):
+    """
+    Load the Madrid district boundaries.
+
+    Parameters:
+    path (str): Path to DistritosMadrid.geojson.
+
+    Returns:
+    dict: Parsed GeoJSON, shared between callers - do not modify it in place.
+    """
+    return _cached('geojson', path, _read_geojson)
+
+
+def load_geometry_tiers(path=GEOJSON_PATH):
+    """
+    Load the district boundaries simplified at every zoom tier (see geometry.TIERS).
+
+    Parameters:
+    path (str): Path to DistritosMadrid.geojson.
+
+    Returns:
+    dict: Tier name -> geometry.GeometryTier, shared between callers - do not modify them in place.
+    """
+    return _cached('geometry_tiers', path, _geometry_tiers)
+
+
+def load_district_geometry(zoom, path=GEOJSON_PATH):
+    """
+    District boundaries simplified for a map at the given zoom level.
+
+    Parameters:
+    zoom (float): Leaflet zoom level.
+    path (str): Path to DistritosMadrid.geojson.
+
+    Returns:
+    geometry.GeometryTier: The tier picked by geometry.tier_for_zoom.
+    """
+    return load_geometry_tiers(path)[geometry.tier_for_zoom(zoom)]
+
+
+def load_color_scale(method='linear', classes=5, path=PRICES_PATH):
+    """
+    Load the map color scale of the all-time mean rent per district.
+
+    The breaks are computed once per version of prices.csv.
+
+    Parameters:
+    method (str): 'linear', 'quantile' or 'jenks' (see colormap.build_color_scale).
+    classes (int): Number of classes for 'quantile' and 'jenks'.
+    path (str): Path to prices.csv.
+
+    Returns:
+    colormap.ColorScale: Shared scale.
+    """
+    def build(p):
+        return colormap.build_color_scale(list(load_price_aggregates(p).district_avgs.values()), method, classes)
+    return _cached(f'color_scale:{method}:{classes}', path, build)
+
+
+def load_choropleth_frames(kind='rent', method='linear', path=PRICES_PATH):
+    """
+    Load the per-month palette indices of the animated map (see frames.py).
+
+    Parameters:
+    kind (str): 'rent' (monthly rent) or 'yoy' (year-over-year change).
+    method (str): Classification of the rent frames ('linear', 'quantile' or 'jenks').
+    path (str): Path to prices.csv.
+
+    Returns:
+    frames.ChoroplethFrames: Shared frames, built once per version of prices.csv.
+    """
+    if kind == 'yoy':
+        return _cached('frames:yoy', path, lambda p: frames.build_yoy_frames(load_rent_matrix(p)))
+    return _cached(f'frames:rent:{method}', path, lambda p: frames.build_rent_frames(load_rent_matrix(p), method))
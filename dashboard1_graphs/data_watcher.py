@@ -0,0 +1,193 @@
+"""
+Watch the data/ directory and invalidate cached data when a file actually changes.
+
+A watchdog observer reports file system events under data/. Each changed file is hashed once
+its writes have settled, and only if its content differs from the last version seen:
+
+- the dataset version (and the file's own version) is bumped,
+- data_loader drops the objects built from that file (other files stay cached).
+
+Streamlit pages call refresh_on_data_change(), a small fragment that compares the session's
+dataset version with the current one and reruns the app only when it changed. This replaces
+the <meta http-equiv='refresh'> full page reload.
+"""
+import os
+import hashlib
+import threading
+
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+
+from dashboard1_graphs import data_loader
+
+DATA_DIR = 'data'
+
+# Seconds to wait after the last event on a file before hashing it (writes come in bursts)
+SETTLE_DELAY = 0.5
+
+_lock = threading.Lock()
+_observers = {}
+_digests = {}
+_versions = {}
+_pending = {}
+_version = 0
+
+
+def _digest(path):
+    """Content hash of a file, or None if it does not exist (anymore)."""
+    h = hashlib.blake2b(digest_size=16)
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+    except (FileNotFoundError, IsADirectoryError):
+        return None
+    return h.hexdigest()
+
+
+def _is_data_file(path, directory):
+    """Skip temporary files and hidden directories such as the snapshots in data/.snapshots."""
+    relative = os.path.relpath(path, directory)
+    if any(part.startswith('.') for part in relative.split(os.sep)):
+        return False
+    return not path.endswith(('.tmp', '~', '.swp'))
+
+
+def dataset_version(path=None):
+    """
+    Current version of the data.
+
+    Parameters:
+    path (str): Only consider this file. Default None gives the version of the whole dataset.
+
+    Returns:
+    int: Counter bumped each time a (matching) file changes content; 0 if it never changed.
+    """
+    with _lock:
+        if path is None:
+            return _version
+        return _versions.get(os.path.abspath(path), 0)
+
+
+def notify_change(path):
+    """
+    Check a file for changes and, if its content differs, bump the versions and invalidate its caches.
+
+    Parameters:
+    path (str): Path of the file that may have changed.
+
+    Returns:
+    bool: True if the content changed.
+    """
+    global _version
+    path = os.path.abspath(path)
+    digest = _digest(path)
+    with _lock:
+        if _digests.get(path) == digest:
+            return False
+        _digests[path] = digest
+        _version += 1
+        _versions[path] = _version
+    data_loader.invalidate(path)
+    return True
+
+
+def _schedule(path):
+    """Check path once no new events arrived for SETTLE_DELAY seconds."""
+    def run():
+        with _lock:
+            _pending.pop(path, None)
+        notify_change(path)
+
+    with _lock:
+        timer = _pending.pop(path, None)
+        if timer is not None:
+            timer.cancel()
+        timer = _pending[path] = threading.Timer(SETTLE_DELAY, run)
+        timer.daemon = True
+    timer.start()
+
+
+class _DataEventHandler(FileSystemEventHandler):
+    """Forwards created / modified / moved / deleted data files to _schedule."""
+
+    def __init__(self, directory):
+        super().__init__()
+        self.directory = directory
+
+    def on_any_event(self, event):
+        if event.is_directory or event.event_type not in ('created', 'modified', 'moved', 'deleted', 'closed'):
+            return
+        for path in (event.src_path, getattr(event, 'dest_path', '')):
+            path = os.fsdecode(path)
+            if path and _is_data_file(path, self.directory):
+                _schedule(path)
+
+
+def start_watching(directory=DATA_DIR):
+    """
+    Start watching a data directory in a background thread (once per process).
+
+    Parameters:
+    directory (str): Directory to watch recursively. Default 'data'.
+
+    Returns:
+    bool: True if the directory is being watched, False if watching is not possible here.
+    """
+    directory = os.path.abspath(directory)
+    with _lock:
+        if directory in _observers:
+            return True
+
+    # Remember the current content so that events without actual changes are ignored
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [d for d in dirs if not d.startswith('.')]
+        for name in files:
+            path = os.path.join(root, name)
+            if _is_data_file(path, directory):
+                digest = _digest(path)
+                with _lock:
+                    _digests.setdefault(path, digest)
+
+    observer = Observer()
+    observer.daemon = True
+    try:
+        observer.schedule(_DataEventHandler(directory), directory, recursive=True)
+        observer.start()
+    except OSError:
+        # Missing directory or no watch handles left (e.g. inotify limits)
+        return False
+    with _lock:
+        if directory in _observers:
+            observer.stop()
+        else:
+            _observers[directory] = observer
+    return True
+
+
+def refresh_on_data_change(interval=5, directory=DATA_DIR):
+    """
+    Rerun the Streamlit app when the data changes.
+
+    Renders a fragment that reruns on its own every interval seconds. It only compares the
+    session's dataset version with the current one, so an idle page does not rerun the script;
+    the whole app reruns once after a change.
+
+    Parameters:
+    interval (float): Seconds between version checks.
+    directory (str): Data directory to watch.
+    """
+    # Imported here so the Dash app (map_d1.py) can use the watcher without Streamlit
+    import streamlit as st
+
+    if not start_watching(directory):
+        return
+
+    @st.fragment(run_every=interval)
+    def _check_data_version():
+        version = dataset_version()
+        if st.session_state.setdefault('data_version', version) != version:
+            st.session_state['data_version'] = version
+            st.rerun()
+
+    _check_data_version()
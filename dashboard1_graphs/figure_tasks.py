@@ -0,0 +1,74 @@
+"""
+Concurrent construction of the figures of a dashboard page.
+
+Each chart is declared as a FigureTask: the function building it and the inputs it depends on.
+The tasks of a page are submitted together to a shared worker pool, so independent figures are
+built at the same time, and the page only places the finished figures. Results are memoized
+(process wide, LRU) by builder and inputs: a figure already built, or still being built for
+another session, is reused instead of started again.
+
+Figures are shared between sessions and must not be modified.
+"""
+import threading
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_WORKERS = 4
+
+# Number of figures kept in memory (process wide)
+CACHE_SIZE = 256
+
+# name: key of the figure in the results, builder: function returning it, data: first argument
+# of the builder, left out of the memo key (it must not change while the process runs, or its
+# version must be one of the inputs; None: the builder takes only the inputs), inputs: tuple of
+# the other (hashable) arguments
+FigureTask = namedtuple('FigureTask', ['name', 'builder', 'data', 'inputs'])
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='figure-task')
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _build(task):
+    if task.data is None:
+        return task.builder(*task.inputs)
+    return task.builder(task.data, *task.inputs)
+
+
+def submit_tasks(tasks):
+    """
+    Start the tasks whose figure is neither built nor being built.
+
+    Parameters:
+    tasks (iterable): FigureTask objects.
+
+    Returns:
+    dict: Task name -> concurrent.futures.Future of its figure.
+    """
+    futures = {}
+    with _cache_lock:
+        for task in tasks:
+            key = (task.builder, task.inputs)
+            future = _cache.get(key)
+            # Failed builds are not memoized
+            if future is None or (future.done() and future.exception() is not None):
+                future = _executor.submit(_build, task)
+                _cache[key] = future
+            _cache.move_to_end(key)
+            futures[task.name] = future
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return futures
+
+
+def run_tasks(tasks):
+    """
+    Build the figures of a page concurrently and wait for all of them.
+
+    Parameters:
+    tasks (iterable): FigureTask objects.
+
+    Returns:
+    dict: Task name -> figure. The first failing task's exception is raised.
+    """
+    return {name: future.result() for name, future in submit_tasks(tasks).items()}
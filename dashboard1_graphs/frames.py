@@ -0,0 +1,126 @@
+"""
+Precomputed frames of the time-animated district choropleth.
+
+The rent of every district and month is classified once, with a single color scale over the
+whole history (so colors are comparable between months), into a compact uint8 matrix of
+palette indices: one row per month, one column per district. Year-over-year change gets the
+same treatment with a diverging palette.
+
+Animating the map is then only a matter of looking up palette[indices[month]] for each
+district. map_d1.py ships the frames to the browser once (frames_payload) and swaps the
+polygon colors client-side, so playback does no server work per frame.
+"""
+import base64
+import hashlib
+from collections import namedtuple
+
+import numpy as np
+
+from dashboard1_graphs.colormap import RAMP, ColorScale, build_color_scale, build_lut, color_indices, legend_gradient
+
+# Palette index of months without data (the palettes have at most 255 colors)
+NO_DATA = 255
+NO_DATA_COLOR = '#cccccc'
+
+# Blue (rent fell) - white - red (rent rose)
+YOY_RAMP = ('#2166ac', '#f7f7f7', '#b2182b')
+# Share of the YoY changes inside the color range; the most extreme ones are clipped
+YOY_QUANTILE = 0.99
+
+# months: datetime64[M] (n_months,), districts: names (n_districts,),
+# indices: uint8 (n_months, n_districts), palette: hex colors (NO_DATA is the last entry)
+ChoroplethFrames = namedtuple('ChoroplethFrames', ['months', 'districts', 'indices', 'palette', 'scale'])
+
+
+def _frames(matrix, values, scale):
+    indices = color_indices(values, scale).astype(np.uint8)
+    indices[~np.isfinite(values)] = NO_DATA
+    palette = np.append(scale.colors, NO_DATA_COLOR)
+    return ChoroplethFrames(matrix.months, np.asarray(matrix.districts), indices, palette, scale)
+
+
+def build_rent_frames(matrix, method='linear', classes=5, ramp=RAMP):
+    """
+    Frames of the monthly rent per district.
+
+    Parameters:
+    matrix (RentMatrix): Dense district x month matrix (see utils.build_rent_matrix).
+    method (str): 'linear', 'quantile' or 'jenks' (see colormap.build_color_scale).
+    classes (int): Number of classes for 'quantile' and 'jenks'.
+    ramp (sequence): Hex colors from the lowest to the highest rent.
+
+    Returns:
+    ChoroplethFrames: One row of palette indices per month.
+    """
+    values = np.asarray(matrix.values, dtype=np.float64).T
+    scale = build_color_scale(values[np.isfinite(values)], method, classes, ramp, lut_size=NO_DATA)
+    return _frames(matrix, values, scale)
+
+
+def build_yoy_frames(matrix, ramp=YOY_RAMP):
+    """
+    Frames of the year-over-year rent change per district (NaN during the first year).
+
+    The color range is symmetric around 0, so white always means no change.
+
+    Parameters:
+    matrix (RentMatrix): Dense district x month matrix (see utils.build_rent_matrix).
+    ramp (sequence): Hex colors from the largest fall to the largest rise.
+
+    Returns:
+    ChoroplethFrames: One row of palette indices per month; scale.breaks are the change
+    fractions at both ends of the palette.
+    """
+    values = np.asarray(matrix.values, dtype=np.float64).T
+    yoy = np.full_like(values, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        yoy[12:] = values[12:] / values[:-12] - 1
+    yoy[~np.isfinite(yoy)] = np.nan
+    changes = np.abs(yoy[np.isfinite(yoy)])
+    limit = float(np.quantile(changes, YOY_QUANTILE)) if len(changes) else 0.0
+    limit = limit if limit > 0 else 1.0
+    scale = ColorScale('linear', np.array([-limit, limit]), build_lut(ramp, NO_DATA))
+    return _frames(matrix, yoy, scale)
+
+
+def reorder_frames(frames, districts):
+    """
+    Frames with their columns in the given district order (e.g. the order of the map polygons).
+
+    Parameters:
+    frames (ChoroplethFrames): Frames to reorder.
+    districts (sequence): District names; unknown districts get NO_DATA in every month.
+
+    Returns:
+    ChoroplethFrames: Reordered frames.
+    """
+    position = {name: i for i, name in enumerate(frames.districts.tolist())}
+    columns = np.array([position.get(name, -1) for name in districts], dtype=np.int64)
+    indices = np.full((len(frames.months), len(columns)), NO_DATA, dtype=np.uint8)
+    known = columns >= 0
+    indices[:, known] = frames.indices[:, columns[known]]
+    return frames._replace(districts=np.asarray(districts), indices=indices)
+
+
+def frames_payload(frames, low_label, high_label):
+    """
+    JSON-serializable frames for the browser (e.g. a dcc.Store).
+
+    Parameters:
+    frames (ChoroplethFrames): Frames, in the order of the map polygons.
+    low_label (str): Legend label of the low end.
+    high_label (str): Legend label of the high end.
+
+    Returns:
+    dict: months ('YYYY-MM'), districts (count), palette, indices (base64 of the row-major uint8
+    matrix), key (content hash, to cache the decoded indices) and the legend.
+    """
+    raw = np.ascontiguousarray(frames.indices).tobytes()
+    return {
+        'months': np.datetime_as_string(frames.months, unit='M').tolist(),
+        'districts': int(frames.indices.shape[1]),
+        'palette': frames.palette.tolist(),
+        'indices': base64.b64encode(raw).decode('ascii'),
+        'key': hashlib.blake2b(raw + ''.join(frames.palette.tolist()).encode(), digest_size=8).hexdigest(),
+        'legend': {'background': legend_gradient(frames.scale), 'low': low_label, 'high': high_label},
+    }
@@ -0,0 +1,275 @@
+"""
+Simplified district geometries at several zoom tiers.
+
+The district boundaries are split into arcs: maximal runs of ring edges shared by the same set
+of polygons (a border between two districts, or an outer edge of one). Each arc is simplified
+once with Douglas-Peucker and reused, reversed where needed, by every polygon it belongs to.
+Neighbouring districts therefore keep an identical border at every tolerance, without gaps or
+overlaps. The simplified coordinates are rounded to the precision the tier needs (which also
+shrinks the JSON sent to the browser). Each tier is available both as GeoJSON ([lon, lat],
+for folium) and as Leaflet positions ([lat, lon], for dash_leaflet), so consumers never
+rearrange coordinates themselves.
+
+Pick the tier for a map with tier_for_zoom(zoom).
+"""
+import math
+from collections import namedtuple
+
+import numpy as np
+
+# name -> (tolerance in meters, decimals kept), coarsest first
+TIERS = {
+    'low': (100.0, 4),
+    'medium': (50.0, 4),
+    'high': (20.0, 5),
+    'full': (0.0, 6),
+}
+
+# Reference latitude for the meters / degrees conversion (Madrid)
+REFERENCE_LATITUDE = 40.4
+
+_METERS_PER_DEGREE_LAT = 110540.0
+_METERS_PER_DEGREE_LON = 111320.0
+# Input coordinates are compared on this grid (degrees) to find shared vertices
+_GRID = 1e-7
+
+# geojson: FeatureCollection with [lon, lat] coordinates, positions: per feature, its polygon
+# rings as [lat, lon] lists in the nesting dash_leaflet's Polygon expects
+GeometryTier = namedtuple('GeometryTier', ['name', 'tolerance', 'geojson', 'positions'])
+
+# arcs: list of (n, 2) int64 arrays of grid coordinates
+# polygons: per feature, per polygon, per ring, list of (arc index, reversed) references
+Topology = namedtuple('Topology', ['arcs', 'polygons'])
+
+
+def meters_per_pixel(zoom, latitude=REFERENCE_LATITUDE):
+    """Ground size of a screen pixel in Web Mercator at the given zoom and latitude."""
+    return 156543.03392 * math.cos(math.radians(latitude)) / 2 ** zoom
+
+
+def tier_for_zoom(zoom, latitude=REFERENCE_LATITUDE):
+    """
+    Coarsest tier whose simplification error stays within one pixel at this zoom.
+
+    Parameters:
+    zoom (float): Leaflet zoom level.
+    latitude (float): Latitude of the map center.
+
+    Returns:
+    str: Tier name (a key of TIERS).
+    """
+    limit = meters_per_pixel(zoom, latitude)
+    for name, (tolerance, _) in TIERS.items():
+        if tolerance <= limit:
+            return name
+    return 'full'
+
+
+def _polygons_of(geometry):
+    if geometry['type'] == 'Polygon':
+        return [geometry['coordinates']]
+    if geometry['type'] == 'MultiPolygon':
+        return geometry['coordinates']
+    raise ValueError(f"Unsupported geometry type: {geometry['type']}")
+
+
+def _open_ring(ring):
+    """Ring as grid coordinates, without the closing point and consecutive duplicates."""
+    points = np.rint(np.asarray(ring, dtype=np.float64)[:, :2] / _GRID).astype(np.int64)
+    keep = np.ones(len(points), dtype=bool)
+    keep[1:] = np.any(points[1:] != points[:-1], axis=1)
+    points = points[keep]
+    if len(points) > 1 and (points[0] == points[-1]).all():
+        points = points[:-1]
+    return points
+
+
+def build_topology(geojson):
+    """
+    Split the rings of every feature into shared arcs.
+
+    Parameters:
+    geojson (dict): FeatureCollection of Polygon / MultiPolygon features ([lon, lat]).
+
+    Returns:
+    Topology: Arcs and, per ring, the arcs that make it up.
+    """
+    rings = []
+    for f, feature in enumerate(geojson['features']):
+        for p, polygon in enumerate(_polygons_of(feature['geometry'])):
+            for r, ring in enumerate(polygon):
+                rings.append(((f, p, r), _open_ring(ring)))
+
+    # Which rings use each vertex and each (undirected) edge
+    vertex_rings, edge_rings = {}, {}
+    for ring_id, (_, points) in enumerate(rings):
+        keys = [tuple(point) for point in points.tolist()]
+        for i, key in enumerate(keys):
+            vertex_rings.setdefault(key, set()).add(ring_id)
+            edge = (key, keys[(i + 1) % len(keys)])
+            edge_rings.setdefault(min(edge, edge[::-1]), set()).add(ring_id)
+
+    arcs, arc_index = [], {}
+    structure = [[[] for _ in _polygons_of(feature['geometry'])] for feature in geojson['features']]
+    for ring_id, ((f, p, r), points) in enumerate(rings):
+        keys = [tuple(point) for point in points.tolist()]
+        n = len(keys)
+        owners = []
+        for i in range(n):
+            edge = (keys[i], keys[(i + 1) % n])
+            owners.append(frozenset(edge_rings[min(edge, edge[::-1])]))
+        # Cut where the owners of consecutive edges differ, or at vertices used by other rings
+        cuts = [i for i in range(n)
+                if owners[i - 1] != owners[i] or vertex_rings[keys[i]] != owners[i]]
+
+        refs = []
+        if not cuts:
+            # Closed arc (island or a ring shared as a whole): start at its smallest vertex
+            start = min(range(n), key=lambda i: keys[i])
+            segments = [list(range(start, n)) + list(range(0, start + 1))]
+        else:
+            segments = []
+            for c, start in enumerate(cuts):
+                end = cuts[(c + 1) % len(cuts)]
+                if end <= start:
+                    end += n
+                segments.append([i % n for i in range(start, end + 1)])
+        for segment in segments:
+            arc = tuple(keys[i] for i in segment)
+            reverse = arc[::-1]
+            canonical = min(arc, reverse)
+            if canonical not in arc_index:
+                arc_index[canonical] = len(arcs)
+                arcs.append(np.array(canonical, dtype=np.int64))
+            refs.append((arc_index[canonical], arc != canonical))
+        if r == len(structure[f][p]):
+            structure[f][p].append(refs)
+    return Topology(arcs=arcs, polygons=structure)
+
+
+def _to_meters(points):
+    """Grid coordinates to local planar meters (equirectangular at REFERENCE_LATITUDE)."""
+    scale = np.array([_METERS_PER_DEGREE_LON * math.cos(math.radians(REFERENCE_LATITUDE)),
+                      _METERS_PER_DEGREE_LAT]) * _GRID
+    return points * scale
+
+
+def _douglas_peucker(points, tolerance, min_points=2):
+    """
+    Indices of the points kept by Douglas-Peucker (endpoints always kept).
+
+    Parameters:
+    points (np.ndarray): (n, 2) planar coordinates.
+    tolerance (float): Maximum distance of a dropped point to the simplified line.
+    min_points (int): Keep splitting at the farthest point until this many points are kept.
+
+    Returns:
+    np.ndarray: Sorted indices of the kept points.
+    """
+    n = len(points)
+    keep = np.zeros(n, dtype=bool)
+    keep[[0, n - 1]] = True
+    kept = 2 if n > 1 else 1
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        inner = points[first + 1:last]
+        start, end = points[first], points[last]
+        direction = end - start
+        length = math.hypot(*direction)
+        if length == 0:
+            distances = np.hypot(*(inner - start).T)
+        else:
+            offsets = inner - start
+            distances = np.abs(direction[0] * offsets[:, 1] - direction[1] * offsets[:, 0]) / length
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance or kept < min_points:
+            index = first + 1 + farthest
+            keep[index] = True
+            kept += 1
+            stack.append((index, last))
+            stack.append((first, index))
+    return np.flatnonzero(keep)
+
+
+def simplify(topology, tolerance, decimals):
+    """
+    Simplify every arc of a topology and rebuild the rings.
+
+    Parameters:
+    topology (Topology): Arcs from build_topology.
+    tolerance (float): Douglas-Peucker tolerance in meters (0 drops only collinear points).
+    decimals (int): Decimals kept in the output coordinates.
+
+    Returns:
+    list: Per feature, per polygon, per ring, a list of [lon, lat] pairs (closed).
+    """
+    # Arcs of rings with fewer than three arcs keep an interior point, so no ring collapses
+    min_points = [2] * len(topology.arcs)
+    for polygons in topology.polygons:
+        for polygon in polygons:
+            for refs in polygon:
+                if len(refs) < 3:
+                    for arc, _ in refs:
+                        min_points[arc] = 4 if len(refs) == 1 else 3
+
+    simplified = []
+    for arc, points in enumerate(topology.arcs):
+        kept = points[_douglas_peucker(_to_meters(points), tolerance, min_points[arc])]
+        simplified.append(np.round(kept * _GRID, decimals))
+
+    features = []
+    for polygons in topology.polygons:
+        feature = []
+        for polygon in polygons:
+            rings = []
+            for refs in polygon:
+                parts = [simplified[arc][::-1] if reverse else simplified[arc] for arc, reverse in refs]
+                # Consecutive arcs share their junction point
+                ring = np.concatenate([parts[0]] + [part[1:] for part in parts[1:]])
+                keep = np.ones(len(ring), dtype=bool)
+                keep[1:] = np.any(ring[1:] != ring[:-1], axis=1)
+                ring = ring[keep]
+                if (ring[0] != ring[-1]).any():
+                    ring = np.vstack([ring, ring[:1]])
+                rings.append(ring.tolist())
+            feature.append(rings)
+        features.append(feature)
+    return features
+
+
+def _leaflet_positions(polygons):
+    """[lon, lat] polygons to dash_leaflet positions ([lat, lon]; a plain ring when possible)."""
+    swapped = [[np.asarray(ring)[:, ::-1].tolist() for ring in polygon] for polygon in polygons]
+    if len(swapped) == 1:
+        return swapped[0][0] if len(swapped[0]) == 1 else swapped[0]
+    return swapped
+
+
+def build_geometry_tiers(geojson):
+    """
+    Build every tier of TIERS for a district GeoJSON.
+
+    Parameters:
+    geojson (dict): FeatureCollection of Polygon / MultiPolygon features ([lon, lat]).
+
+    Returns:
+    dict: Tier name -> GeometryTier. Feature properties are kept (shared with the input).
+    """
+    topology = build_topology(geojson)
+    tiers = {}
+    for name, (tolerance, decimals) in TIERS.items():
+        features, positions = [], []
+        for feature, polygons in zip(geojson['features'], simplify(topology, tolerance, decimals)):
+            if feature['geometry']['type'] == 'Polygon':
+                geometry = {'type': 'Polygon', 'coordinates': polygons[0]}
+            else:
+                geometry = {'type': 'MultiPolygon', 'coordinates': polygons}
+            features.append({'type': 'Feature', 'properties': feature['properties'], 'geometry': geometry})
+            positions.append(_leaflet_positions(polygons))
+        collection = {key: value for key, value in geojson.items() if key not in ('features', 'bbox')}
+        collection['features'] = features
+        tiers[name] = GeometryTier(name=name, tolerance=tolerance, geojson=collection, positions=positions)
+    return tiers
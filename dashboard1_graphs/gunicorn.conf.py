@@ -0,0 +1,21 @@
+# Gunicorn settings for the Dash map app (dashboard1_graphs/wsgi.py)
+import multiprocessing
+import os
+
+# The data paths (data/...) are relative to the repository root
+chdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+bind = os.environ.get('MAP_D1_BIND', '127.0.0.1:8050')
+workers = int(os.environ.get('MAP_D1_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('MAP_D1_THREADS', 2))
+timeout = 60
+
+# Import and warm up the app once in the master, before forking: workers start with the data
+# already loaded (copy-on-write) and the shared cache filled, and no request arrives earlier
+preload_app = True
+
+# Behind the proxy: trust its X-Forwarded-* headers
+forwarded_allow_ips = os.environ.get('FORWARDED_ALLOW_IPS', '127.0.0.1')
+
+accesslog = '-'
+errorlog = '-'
@@ -0,0 +1,439 @@
+"""
+Running aggregates of the long rent table and the incremental monthly append.
+
+Dashboard 1 needs the mean rent per Date and District (line chart), the overall monthly mean
+and the all-time mean per district (map colors, min_rent / max_rent). Instead of regrouping
+the whole history every time a month lands, the per district x month row counts, valid counts,
+sums and maxima are kept next to the snapshot, together with running per-district totals.
+append_month() adds a new month to prices.csv, its snapshot and these aggregates, touching
+only the new rows; check_consistency() compares the result with a full recompute.
+
+The per-cell arrays are stored month by month (one .npy file per field, each month a block of
+n_districts values), so a new month is appended to the files in place (see
+snapshot._append_npy) and the per-district totals and the months count are rewritten in a
+small JSON manifest: an append costs time proportional to the new rows and the number of
+districts, not to the history. Only a month that brings a new district rewrites the files.
+
+    python -m dashboard1_graphs.incremental data/prices.csv new_month.csv --check
+    python -m dashboard1_graphs.incremental data/prices.csv --check
+"""
+import os
+import csv
+import json
+import math
+import argparse
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from dashboard1_graphs import snapshot
+
+FORMAT_VERSION = 2
+
+# Per-cell fields and their dtypes on disk (month-major: month 0 of every district first)
+CELL_DTYPES = {'rows': 'int64', 'counts': 'int64', 'sums': 'float64', 'maxima': 'float64'}
+TOTAL_FIELDS = ('district_rows', 'district_counts', 'district_sums', 'district_max')
+
+# districts: sorted names, months: sorted datetime64[M] months with rows
+# rows / counts / sums / maxima: (n_districts, n_months) per cell, counts ignore NaN prices
+# and maxima is -inf where a cell has no valid price
+# district_rows / district_counts / district_sums / district_max: running per-district totals
+RunningAggregates = namedtuple('RunningAggregates', [
+    'districts', 'months', 'rows', 'counts', 'sums', 'maxima',
+    'district_rows', 'district_counts', 'district_sums', 'district_max',
+])
+
+
+def aggregates_path(csv_path, snapshot_dir=None):
+    """Path of the manifest of the stored running aggregates of csv_path (keyed like its snapshot)."""
+    key = snapshot.snapshot_key(csv_path)
+    return os.path.join(snapshot_dir or snapshot.SNAPSHOT_DIR, f"{key}.aggregates.json")
+
+
+def _field_path(csv_path, snapshot_dir, field):
+    # No dot before the field: snapshot._remove_old_generations only touches key.generation.column.npy
+    key = snapshot.snapshot_key(csv_path)
+    return os.path.join(snapshot_dir or snapshot.SNAPSHOT_DIR, f"{key}.aggregates-{field}.npy")
+
+
+def compute_running_aggregates(columns):
+    """
+    Compute the running aggregates of a set of rows from scratch.
+
+    Parameters:
+    columns (dict): Column arrays with 'Date', 'District' and 'Rent_Price'.
+
+    Returns:
+    RunningAggregates: Aggregates of the rows.
+    """
+    months_of_rows = np.asarray(columns['Date']).astype('datetime64[M]')
+    prices = np.asarray(columns['Rent_Price'], dtype=np.float64)
+    districts, district_idx = np.unique(np.asarray(columns['District'], dtype=object), return_inverse=True)
+    months, month_idx = np.unique(months_of_rows, return_inverse=True)
+
+    shape = (len(districts), len(months))
+    cells = district_idx * len(months) + month_idx
+    valid = ~np.isnan(prices)
+    size = shape[0] * shape[1]
+    rows = np.bincount(cells, minlength=size).reshape(shape)
+    counts = np.bincount(cells[valid], minlength=size).reshape(shape)
+    sums = np.bincount(cells[valid], weights=prices[valid], minlength=size).reshape(shape)
+    maxima = np.full(size, -np.inf)
+    np.maximum.at(maxima, cells[valid], prices[valid])
+    maxima = maxima.reshape(shape)
+
+    return RunningAggregates(
+        districts=districts,
+        months=months,
+        rows=rows,
+        counts=counts,
+        sums=sums,
+        maxima=maxima,
+        district_rows=rows.sum(axis=1),
+        district_counts=counts.sum(axis=1),
+        district_sums=sums.sum(axis=1),
+        district_max=maxima.max(axis=1, initial=-np.inf),
+    )
+
+
+def _place(values, positions, size, fill):
+    """Spread values along the last axis into an array of length size at the given positions."""
+    out = np.full(values.shape[:-1] + (size,), fill, dtype=values.dtype)
+    out[..., positions] = values
+    return out
+
+
+def merge_running_aggregates(current, new):
+    """
+    Combine the aggregates of two disjoint sets of rows in memory.
+
+    The result is built at its full size (districts x months of both sets); append_month only
+    uses it when a new month brings a district the stored aggregates do not have.
+
+    Parameters:
+    current (RunningAggregates): Aggregates of the existing rows.
+    new (RunningAggregates): Aggregates of the new rows.
+
+    Returns:
+    RunningAggregates: Aggregates of both sets of rows.
+    """
+    districts = np.union1d(current.districts, new.districts).astype(object)
+    months = np.union1d(current.months, new.months)
+    merged = {}
+    for part in (current, new):
+        d_pos = np.searchsorted(districts, part.districts)
+        m_pos = np.searchsorted(months, part.months)
+        for field in RunningAggregates._fields[2:]:
+            values = getattr(part, field)
+            fill = -np.inf if field in ('maxima', 'district_max') else 0
+            if values.ndim == 2:
+                values = _place(values, m_pos, len(months), fill)
+            values = _place(values.T, d_pos, len(districts), fill).T
+            if field not in merged:
+                merged[field] = values
+            elif fill == 0:
+                merged[field] = merged[field] + values
+            else:
+                merged[field] = np.maximum(merged[field], values)
+    return RunningAggregates(districts=districts, months=months, **merged)
+
+
+def aggregate_columns(running):
+    """
+    Derive the Dashboard 1 aggregations from running aggregates.
+
+    The results match groupby(['Date', 'District']).mean(), groupby('Date').mean() and
+    groupby('District').mean() of Rent_Price on the underlying rows.
+
+    Parameters:
+    running (RunningAggregates): Running aggregates.
+
+    Returns:
+    tuple: (df_avg columns, overall_df columns, district_avgs dict).
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cell_means = np.where(running.counts > 0, running.sums / running.counts, np.nan)
+        month_means = running.sums.sum(axis=0) / running.counts.sum(axis=0)
+        district_means = np.where(running.district_counts > 0,
+                                  running.district_sums / running.district_counts, np.nan)
+
+    # Transposed so the cells come out ordered by Date, then District
+    present = running.rows.T > 0
+    month_idx, district_idx = np.nonzero(present)
+    df_avg = {
+        'Date': running.months[month_idx].astype('datetime64[ns]'),
+        'District': running.districts[district_idx],
+        'Rent_Price': cell_means.T[present],
+    }
+    has_rows = running.rows.sum(axis=0) > 0
+    overall_df = {
+        'Date': running.months[has_rows].astype('datetime64[ns]'),
+        'Rent_Price': np.where(running.counts.sum(axis=0) > 0, month_means, np.nan)[has_rows],
+    }
+    district_avgs = {
+        district: float(mean)
+        for district, mean, n_rows in zip(running.districts, district_means, running.district_rows)
+        if n_rows > 0
+    }
+    return df_avg, overall_df, district_avgs
+
+
+def _write_manifest(manifest, csv_path, snapshot_dir):
+    target = aggregates_path(csv_path, snapshot_dir)
+    tmp = f"{target}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp, target)
+
+
+def _manifest(running, csv_path):
+    manifest = {
+        'format': FORMAT_VERSION,
+        'districts': [str(d) for d in running.districts],
+        'months': int(len(running.months)),
+    }
+    # JSON keeps the floats exactly (and -inf as -Infinity)
+    manifest.update({field: getattr(running, field).tolist() for field in TOTAL_FIELDS})
+    manifest.update(snapshot.source_key(csv_path))
+    return manifest
+
+
+def save_running_aggregates(running, csv_path, snapshot_dir=None):
+    """
+    Store running aggregates for the current version of csv_path (every file is rewritten).
+
+    Parameters:
+    running (RunningAggregates): Aggregates of every row of csv_path.
+    csv_path (str): Source CSV.
+    snapshot_dir (str): Directory holding the snapshots. Default snapshot.SNAPSHOT_DIR.
+    """
+    os.makedirs(os.path.dirname(aggregates_path(csv_path, snapshot_dir)), exist_ok=True)
+    arrays = {field: np.asarray(getattr(running, field)).T.astype(dtype).ravel()
+              for field, dtype in CELL_DTYPES.items()}
+    arrays['months'] = np.asarray(running.months, dtype='datetime64[M]')
+    for field, values in arrays.items():
+        target = _field_path(csv_path, snapshot_dir, field)
+        with open(f"{target}.tmp", 'wb') as f:
+            np.save(f, values)
+        os.replace(f"{target}.tmp", target)
+    _write_manifest(_manifest(running, csv_path), csv_path, snapshot_dir)
+
+
+def append_running_aggregates(running, new, csv_path, snapshot_dir=None):
+    """
+    Append the aggregates of later months to the stored ones in place.
+
+    The cells of the new months are appended to the field files and the per-district totals are
+    rewritten in the manifest; the stored history is not read or rewritten. There must be a
+    single writer.
+
+    Parameters:
+    running (RunningAggregates): Stored aggregates of csv_path (from load_running_aggregates,
+    before the new rows were appended to the CSV).
+    new (RunningAggregates): Aggregates of the new rows: months after running.months, districts
+    among running.districts.
+    csv_path (str): Source CSV, already holding the new rows.
+    snapshot_dir (str): Directory holding the snapshots. Default snapshot.SNAPSHOT_DIR.
+
+    Returns:
+    RunningAggregates: Aggregates of the updated CSV (memory-mapped).
+    """
+    d_pos = np.searchsorted(running.districts, new.districts)
+    for field, dtype in CELL_DTYPES.items():
+        block = np.full((len(new.months), len(running.districts)), -np.inf if field == 'maxima' else 0, dtype=dtype)
+        block[:, d_pos] = getattr(new, field).T
+        snapshot._append_npy(_field_path(csv_path, snapshot_dir, field), block.ravel())
+    snapshot._append_npy(_field_path(csv_path, snapshot_dir, 'months'), np.asarray(new.months, dtype='datetime64[M]'))
+
+    totals = {}
+    for field in TOTAL_FIELDS:
+        values = np.array(getattr(running, field))
+        if field == 'district_max':
+            values[d_pos] = np.maximum(values[d_pos], new.district_max)
+        else:
+            values[d_pos] += getattr(new, field)
+        totals[field] = values
+    _write_manifest(_manifest(running._replace(months=np.concatenate([running.months, new.months]), **totals), csv_path),
+                    csv_path, snapshot_dir)
+    return load_running_aggregates(csv_path, snapshot_dir)
+
+
+def load_running_aggregates(csv_path, snapshot_dir=None):
+    """
+    Load the stored running aggregates of csv_path.
+
+    Parameters:
+    csv_path (str): Source CSV.
+    snapshot_dir (str): Directory holding the snapshots. Default snapshot.SNAPSHOT_DIR.
+
+    Returns:
+    RunningAggregates: The stored aggregates (per-cell arrays memory-mapped, read-only), or None
+    if there are none for the CSV as it is now.
+    """
+    try:
+        with open(aggregates_path(csv_path, snapshot_dir), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('format') != FORMAT_VERSION:
+            return None
+        source = snapshot.source_key(csv_path)
+        if (manifest['source_mtime_ns'] != source['source_mtime_ns']
+                or manifest['source_size'] != source['source_size']):
+            return None
+        n_districts, n_months = len(manifest['districts']), manifest['months']
+        # Files may hold more than the manifest's months (an append that did not complete)
+        mmap_mode = 'r' if n_months else None
+        arrays = {
+            field: np.load(_field_path(csv_path, snapshot_dir, field), mmap_mode=mmap_mode)[:n_months * n_districts]
+            .reshape(n_months, n_districts).T
+            for field in CELL_DTYPES
+        }
+        arrays['months'] = np.load(_field_path(csv_path, snapshot_dir, 'months'), mmap_mode=mmap_mode)[:n_months]
+    except (OSError, KeyError, ValueError):
+        return None
+    arrays['districts'] = np.asarray(manifest['districts'], dtype=object)
+    arrays.update({field: np.asarray(manifest[field], dtype=np.float64 if field in ('district_sums', 'district_max')
+                                     else np.int64) for field in TOTAL_FIELDS})
+    return RunningAggregates(**arrays)
+
+
+def _normalise_rows(columns):
+    df = pd.DataFrame({col: np.asarray(columns[col]) for col in ('Date', 'District', 'COD_DIS', 'Rent_Price')})
+    df['Date'] = pd.to_datetime(df['Date'])
+    return {
+        'Date': df['Date'].to_numpy(dtype='datetime64[ns]'),
+        'District': df['District'].to_numpy(dtype=object),
+        'COD_DIS': df['COD_DIS'].to_numpy(dtype=np.int64),
+        'Rent_Price': df['Rent_Price'].to_numpy(dtype=np.float64),
+    }
+
+
+def _append_csv_rows(csv_path, columns):
+    """Append rows to a long CSV in the formatting of prices.csv."""
+    needs_newline = False
+    with open(csv_path, 'rb') as f:
+        if f.seek(0, os.SEEK_END):
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b'\n'
+    with open(csv_path, 'a', encoding='utf-8', newline='') as f:
+        if needs_newline:
+            f.write('\n')
+        writer = csv.writer(f, lineterminator='\n')
+        for date, district, code, price in zip(columns['Date'].astype('datetime64[D]').astype(str),
+                                               columns['District'], columns['COD_DIS'], columns['Rent_Price']):
+            writer.writerow([date, district, int(code), '' if math.isnan(price) else repr(float(price))])
+
+
+def append_month(csv_path, columns, snapshot_dir=None):
+    """
+    Append the rows of one or more new months to csv_path, its snapshot and its running aggregates.
+
+    Only the new rows are parsed and written: the CSV is appended to, and the snapshot columns
+    and the stored aggregates are extended in place (see append_running_aggregates). Months at
+    or before the last stored month are rejected; rebuild from the CSV to correct history.
+
+    Parameters:
+    csv_path (str): Long rent CSV (e.g. data/prices.csv).
+    columns (dict): Column arrays of the new rows ('Date', 'District', 'COD_DIS', 'Rent_Price').
+    snapshot_dir (str): Directory holding the snapshots. Default snapshot.SNAPSHOT_DIR.
+
+    Returns:
+    RunningAggregates: Aggregates of the updated CSV.
+    """
+    columns = _normalise_rows(columns)
+    if not len(columns['Date']):
+        raise ValueError("No rows to append")
+
+    running = load_running_aggregates(csv_path, snapshot_dir)
+    stored = running is not None
+    if not stored:
+        # First incremental update (or the CSV was edited by hand): aggregate the history once
+        running = compute_running_aggregates(snapshot.load_snapshot(csv_path, snapshot_dir))
+    first_new = columns['Date'].astype('datetime64[M]').min()
+    if len(running.months) and first_new <= running.months[-1]:
+        raise ValueError(f"{csv_path} already has data up to {running.months[-1]}; "
+                         f"cannot append rows from {first_new}")
+
+    snapshot_fresh = snapshot.is_fresh(csv_path, snapshot_dir)
+    _append_csv_rows(csv_path, columns)
+    if snapshot_fresh:
+        snapshot.append_snapshot(columns, csv_path, snapshot_dir)
+
+    new = compute_running_aggregates(columns)
+    if stored and np.isin(new.districts, running.districts).all():
+        return append_running_aggregates(running, new, csv_path, snapshot_dir)
+    running = merge_running_aggregates(running, new)
+    save_running_aggregates(running, csv_path, snapshot_dir)
+    return running
+
+
+def check_consistency(csv_path, snapshot_dir=None, rtol=1e-9):
+    """
+    Compare the stored running aggregates with a full recompute from the CSV text.
+
+    Parameters:
+    csv_path (str): Long rent CSV.
+    snapshot_dir (str): Directory holding the snapshots. Default snapshot.SNAPSHOT_DIR.
+    rtol (float): Relative tolerance for sums and means (summation order differs).
+
+    Returns:
+    list: Names of the aggregates that do not match; empty if everything is consistent.
+    """
+    running = load_running_aggregates(csv_path, snapshot_dir)
+    if running is None:
+        return ['missing or stale']
+
+    df = pd.read_csv(csv_path)
+    df['Date'] = pd.to_datetime(df['Date'])
+    df_avg, overall_df, district_avgs = aggregate_columns(running)
+    expected_avg = df.groupby(['Date', 'District'])['Rent_Price'].mean().reset_index()
+    expected_overall = df.groupby('Date')['Rent_Price'].mean().reset_index()
+    expected_district = df.groupby('District')['Rent_Price'].agg(['size', 'count', 'sum', 'max', 'mean'])
+    expected_district = expected_district.reindex(running.districts)
+
+    def same(actual, expected):
+        actual, expected = np.asarray(actual, dtype=np.float64), np.asarray(expected, dtype=np.float64)
+        return actual.shape == expected.shape and np.allclose(actual, expected, rtol=rtol, equal_nan=True)
+
+    mismatches = []
+    if not (len(df_avg['Date']) == len(expected_avg)
+            and (df_avg['Date'] == expected_avg['Date'].to_numpy()).all()
+            and (df_avg['District'] == expected_avg['District'].to_numpy(dtype=object)).all()
+            and same(df_avg['Rent_Price'], expected_avg['Rent_Price'])):
+        mismatches.append('df_avg')
+    if not (len(overall_df['Date']) == len(expected_overall)
+            and (overall_df['Date'] == expected_overall['Date'].to_numpy()).all()
+            and same(overall_df['Rent_Price'], expected_overall['Rent_Price'])):
+        mismatches.append('overall_df')
+    checks = {
+        'district_rows': expected_district['size'],
+        'district_counts': expected_district['count'],
+        'district_sums': expected_district['sum'],
+        'district_max': expected_district['max'].fillna(-np.inf),
+    }
+    for field, expected in checks.items():
+        if not same(getattr(running, field), expected):
+            mismatches.append(field)
+    expected_means = expected_district['mean'].tolist()
+    if set(district_avgs) != set(df['District'].unique()) or not same(list(district_avgs.values()), expected_means):
+        mismatches.append('district_avgs')
+    elif not same([min(district_avgs.values()), max(district_avgs.values())],
+                  [min(expected_means), max(expected_means)]):
+        mismatches.append('min_rent/max_rent')
+    return mismatches
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Append new months to a long rent CSV and update its aggregates.")
+    parser.add_argument('csv_path', help="Long rent CSV, e.g. data/prices.csv")
+    parser.add_argument('new_rows', nargs='?', help="Long CSV with the rows of the new month(s)")
+    parser.add_argument('--snapshot-dir', default=snapshot.SNAPSHOT_DIR)
+    parser.add_argument('--check', action='store_true', help="Compare the aggregates with a full recompute")
+    args = parser.parse_args()
+    if args.new_rows:
+        running = append_month(args.csv_path, snapshot.read_prices_columns(args.new_rows), args.snapshot_dir)
+        print(f"{args.csv_path}: appended {args.new_rows}, data up to {running.months[-1]}")
+    if args.check:
+        mismatches = check_consistency(args.csv_path, args.snapshot_dir)
+        print("consistent" if not mismatches else f"mismatches: {', '.join(mismatches)}")
+        raise SystemExit(1 if mismatches else 0)
@@ -0,0 +1,193 @@
+"""
+Streaming ingest of the wide rent exports from the INE / Madrid Data Portal (e.g. data/rent_prices.csv).
+
+The exports are semicolon separated with a few preamble lines, one row per month
+("2019;Enero;...") and one column per district labelled like "01. Centro", decimal commas and
+".." for missing values. This module reads them row by row and converts them to the long
+Date, District, COD_DIS, Rent_Price layout of prices.csv, either as a CSV or directly as a
+columnar snapshot (see snapshot.py), without building intermediate DataFrames.
+
+    python -m dashboard1_graphs.ingest data/rent_prices.csv --out data/prices.csv
+    python -m dashboard1_graphs.ingest data/rent_prices.csv --snapshot
+"""
+import re
+import csv
+import math
+import argparse
+from array import array
+
+import numpy as np
+
+from dashboard1_graphs import snapshot
+
+SPANISH_MONTHS = {
+    'enero': 1, 'febrero': 2, 'marzo': 3, 'abril': 4, 'mayo': 5, 'junio': 6, 'julio': 7,
+    'agosto': 8, 'septiembre': 9, 'setiembre': 9, 'octubre': 10, 'noviembre': 11, 'diciembre': 12,
+}
+
+# District names by COD_DIS, spelled as in prices.csv and DistritosMadrid.geojson (NOMBRE)
+DISTRICT_NAMES = {
+    1: 'Centro', 2: 'Arganzuela', 3: 'Retiro', 4: 'Salamanca', 5: 'Chamartín', 6: 'Tetuán',
+    7: 'Chamberí', 8: 'Fuencarral - El Pardo', 9: 'Moncloa - Aravaca', 10: 'Latina',
+    11: 'Carabanchel', 12: 'Usera', 13: 'Puente de Vallecas', 14: 'Moratalaz', 15: 'Ciudad Lineal',
+    16: 'Hortaleza', 17: 'Villaverde', 18: 'Villa de Vallecas', 19: 'Vicálvaro',
+    20: 'San Blas - Canillejas', 21: 'Barajas',
+}
+
+MISSING_VALUES = {'', '..', '.', '-'}
+
+_LABEL_PATTERN = re.compile(r'^\s*(\d+)\.\s*(.+?)\s*$')
+
+
+def parse_district_label(label):
+    """
+    Split a column label like "08. Fuencarral-El Pardo" into its code and district name.
+
+    Parameters:
+    label (str): Column label from the export header.
+
+    Returns:
+    tuple: (COD_DIS as int, district name). Known codes use the names of DISTRICT_NAMES.
+    """
+    match = _LABEL_PATTERN.match(label)
+    if not match:
+        raise ValueError(f"Unrecognised district label: {label!r}")
+    code = int(match.group(1))
+    return code, DISTRICT_NAMES.get(code, match.group(2))
+
+
+def parse_value(text):
+    """Convert a cell such as "24,98", "15" or ".." to a float (NaN when missing)."""
+    text = text.strip()
+    if text in MISSING_VALUES:
+        return float('nan')
+    return float(text.replace('.', '').replace(',', '.')) if ',' in text else float(text)
+
+
+def iter_wide_rows(path, encoding='utf-8-sig'):
+    """
+    Stream a wide export as long rows.
+
+    Parameters:
+    path (str): Path to the wide CSV.
+    encoding (str): File encoding. Default handles the UTF-8 BOM of the portal exports.
+
+    Yields:
+    tuple: (date as 'YYYY-MM-01', district name, COD_DIS, value), month by month.
+    """
+    with open(path, 'r', encoding=encoding, newline='') as f:
+        reader = csv.reader(f, delimiter=';')
+        districts = None
+        for row in reader:
+            if districts is None:
+                # Preamble lines come before the header row ";;01. Centro;02. Arganzuela;..."
+                labels = [cell for cell in row[2:] if cell.strip()]
+                if len(row) > 2 and not row[0].strip() and labels and all(_LABEL_PATTERN.match(c) for c in labels):
+                    districts = [parse_district_label(cell) for cell in labels]
+                continue
+            if len(row) < 2 or not row[0].strip().isdigit():
+                # Blank separators and the "Fuente: ..." footer
+                continue
+            month = SPANISH_MONTHS.get(row[1].strip().lower())
+            if month is None:
+                raise ValueError(f"Unrecognised month {row[1]!r} in {path}")
+            date = f"{int(row[0]):04d}-{month:02d}-01"
+            cells = row[2:2 + len(districts)]
+            cells += [''] * (len(districts) - len(cells))
+            for (code, name), cell in zip(districts, cells):
+                yield date, name, code, parse_value(cell)
+    if districts is None:
+        raise ValueError(f"No district header row found in {path}")
+
+
+def wide_to_long_csv(path, out_path, value_name='Rent_Price', encoding='utf-8-sig'):
+    """
+    Convert a wide export to a long CSV in the layout of prices.csv.
+
+    Parameters:
+    path (str): Path to the wide CSV.
+    out_path (str): Path of the long CSV to write.
+    value_name (str): Name of the value column. Default 'Rent_Price'.
+    encoding (str): Encoding of the wide CSV.
+
+    Returns:
+    int: Number of rows written.
+    """
+    rows = 0
+    with open(out_path, 'w', encoding='utf-8', newline='') as out:
+        writer = csv.writer(out, lineterminator='\n')
+        writer.writerow(['Date', 'District', 'COD_DIS', value_name])
+        for date, name, code, value in iter_wide_rows(path, encoding):
+            writer.writerow([date, name, code, '' if math.isnan(value) else repr(value)])
+            rows += 1
+    return rows
+
+
+def read_wide_columns(path, encoding='utf-8-sig'):
+    """
+    Read a wide export straight into the column arrays of a snapshot.
+
+    Values are accumulated in typed arrays while streaming, so no per-row Python objects or
+    DataFrames are kept around.
+
+    Parameters:
+    path (str): Path to the wide CSV.
+    encoding (str): Encoding of the wide CSV.
+
+    Returns:
+    dict: 'Date' (datetime64[ns]), 'District' (names), 'COD_DIS' and 'Rent_Price' arrays.
+    """
+    months = array('q')  # months since 1970-01
+    codes = array('h')
+    values = array('d')
+    names = {}
+    for date, name, code, value in iter_wide_rows(path, encoding):
+        months.append((int(date[:4]) - 1970) * 12 + int(date[5:7]) - 1)
+        codes.append(code)
+        values.append(value)
+        names[code] = name
+
+    cod_dis = np.frombuffer(codes, dtype=np.int16)
+    lookup = np.empty(max(names, default=0) + 1, dtype=object)
+    for code, name in names.items():
+        lookup[code] = name
+    return {
+        'Date': np.frombuffer(months, dtype=np.int64).astype('datetime64[M]').astype('datetime64[ns]'),
+        'District': lookup[cod_dis],
+        'COD_DIS': cod_dis,
+        'Rent_Price': np.frombuffer(values, dtype=np.float64),
+    }
+
+
+def wide_to_snapshot(path, snapshot_dir=None):
+    """
+    Build the columnar snapshot of a wide export directly, without writing a long CSV.
+
+    Load it afterwards with snapshot.load_snapshot(path, reader=read_wide_columns).
+
+    Parameters:
+    path (str): Path to the wide CSV.
+    snapshot_dir (str): Directory holding the snapshots. Default snapshot.SNAPSHOT_DIR.
+
+    Returns:
+    dict: The manifest that was written.
+    """
+    return snapshot.build_snapshot(path, snapshot_dir, reader=read_wide_columns)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Convert wide INE / Madrid portal rent exports to the long format.")
+    parser.add_argument('paths', nargs='+', help="Wide CSV exports")
+    parser.add_argument('--out', help="Long CSV to write (only with a single input)")
+    parser.add_argument('--snapshot', action='store_true', help="Write a columnar snapshot of each input")
+    parser.add_argument('--snapshot-dir', default=snapshot.SNAPSHOT_DIR)
+    parser.add_argument('--value-name', default='Rent_Price')
+    args = parser.parse_args()
+    if args.out and len(args.paths) != 1:
+        parser.error("--out needs exactly one input file")
+    for path in args.paths:
+        if args.out:
+            print(f"{path}: {wide_to_long_csv(path, args.out, args.value_name)} rows -> {args.out}")
+        if args.snapshot:
+            manifest = wide_to_snapshot(path, args.snapshot_dir)
+            print(f"{path}: {manifest['rows']} rows -> {snapshot.manifest_path(path, args.snapshot_dir)}")
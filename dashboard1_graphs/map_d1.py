@@ -1,136 +1,74 @@
 # dash_app.py
+import os
+import sys
 import dash
-from dash import dcc, html, Input, Output, callback_context, dash_table
+from dash import dcc, html, Input, Output, State, dash_table
+from dash.exceptions import PreventUpdate
 import dash_leaflet as dl
 import dash_bootstrap_components as dbc
 import dash_daq as daq
+from flask_caching import Cache
 import plotly.express as px
 import plotly.graph_objects as go
-import pandas as pd
-import json
-
-# Load your data (adjust paths as needed)
-with open('data/DistritosMadrid.geojson', 'r', encoding='utf-8') as f:
-    geojson_data = json.load(f)
-
-df_prices = pd.read_csv('data/prices.csv')
-df_prices['Date'] = pd.to_datetime(df_prices['Date'])
-df_avg = df_prices.groupby(['Date', 'District'])['Rent_Price'].mean().reset_index()
-
-district_avgs = df_prices.groupby('District')['Rent_Price'].mean().to_dict()
-min_rent = min(district_avgs.values())
-max_rent = max(district_avgs.values())
-
-def get_color(val, min_val, max_val):
-    norm = (val - min_val) / (max_val - min_val) if max_val > min_val else 0
-    red_level = int(norm * 255)
-    return f"#{red_level:02x}0000"
-
-# Create district polygons
-polygons = []
-district_names = []
-for feature in geojson_data['features']:
-    positions = feature['geometry']['coordinates'][0]
-    swapped_positions = [[coord[1], coord[0]] for coord in positions]
-    district_name = feature['properties'].get('NOMBRE', 'Unknown')
-    district_names.append(district_name)
-    avg_rent = district_avgs.get(district_name, min_rent)
-    fill_color = get_color(avg_rent, min_rent, max_rent)
-    polygon = dl.Polygon(
-        positions=swapped_positions,
-        id={'type': 'district-polygon', 'index': district_name},
-        color='Gray',
-        fill=True,
-        fillOpacity=0.6,
-        fillColor=fill_color,
-        n_clicks=0
-    )
-    polygons.append(polygon)
-
-# Build the map container
-map_component = dl.Map(
-    center=[40.38, -3.68],
-    zoom=10,
-    children=[dl.TileLayer()] + polygons,
-    style={'width': '100%', 'height': '100%'},
-    id='map'
-)
-map_container = html.Div([
-    map_component,
-    html.Div([
-        html.Div([
-            html.Span("Low", style={'float': 'left', 'fontSize': '12px'}),
-            html.Span("High", style={'float': 'right', 'fontSize': '12px'}),
-            html.Div(style={'clear': 'both'})
-        ]),
-        html.Div(
-            style={
-                'height': '10px',
-                'width': '150px',
-                'background': 'linear-gradient(to right, #000000, #ff0000)'
-            }
-        )
-    ],
-    style={
-        'position': 'absolute',
-        'bottom': '10px',
-        'right': '10px',
-        'backgroundColor': 'white',
-        'padding': '5px',
-        'border': '1px solid gray',
-        'fontFamily': 'Arial',
-        'zIndex': '1000'
-    })
-], style={'position': 'relative', 'width': '100%', 'height': '45vh'})
+
+# Make the repository root importable when run as `python dashboard1_graphs/map_d1.py`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dashboard1_graphs.data_loader import (GEOJSON_PATH, PRICES_PATH, file_key, load_choropleth_frames, load_color_scale,
+                                           load_geojson, load_geometry_tiers, load_price_aggregates)
+from dashboard1_graphs.colormap import legend_gradient, map_colors
+from dashboard1_graphs.frames import frames_payload, reorder_frames
+from dashboard1_graphs.geometry import TIERS, tier_for_zoom
+
+MAP_ZOOM = 10
+FRAME_INTERVAL_MS = 150
+
+# Results shared by all worker processes (see wsgi.py). Entries are keyed on the version of the
+# data files, so they never need to expire: a changed file simply gives new keys.
+CACHE_CONFIG = {
+    'CACHE_TYPE': os.environ.get('MAP_D1_CACHE_TYPE', 'FileSystemCache'),
+    'CACHE_DIR': os.environ.get('MAP_D1_CACHE_DIR', os.path.join('data', '.cache', 'map_d1')),
+    'CACHE_DEFAULT_TIMEOUT': 0,
+    'CACHE_THRESHOLD': 64,
+}
 
 # Initialize the Dash app
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
-app.layout = html.Div([
-    html.H1("Madrid Housing Market"),
-    html.Div([
-        dcc.Graph(id='rent-graph', style={'height': '45vh'}),
-        html.Div(map_container, style={'marginTop': '20px'})
-    ])
-])
+cache = Cache(app.server, config=CACHE_CONFIG)
 
-@app.callback(
-    Output('rent-graph', 'figure'),
-    Input({'type': 'district-polygon', 'index': dash.ALL}, 'n_clicks')
-)
-def update_graph(n_clicks_list):
-    ctx = callback_context
-    selected_districts = []
-    if n_clicks_list is not None:
-        for i, n in enumerate(n_clicks_list):
-            if n is not None and n % 2 == 1:
-                selected_districts.append(district_names[i])
-    
-    if not selected_districts:
-        filtered_df = df_avg.copy()
-        title = "Average Rent Price by Date (All Districts)"
-        default_opacity = 0.5
-        overall_opacity = 1
-    else:
-        filtered_df = df_avg[df_avg['District'].isin(selected_districts)]
-        title = "Average Rent Price by Date - " + ", ".join(selected_districts)
-        default_opacity = 1
-        overall_opacity = 0.2
-
-    fig = px.line(filtered_df, x='Date', y='Rent_Price', color='District', title=title)
+
+def data_version():
+    """Version of the files the app is built from (modification time and size of each)."""
+    return file_key(PRICES_PATH)[1:] + file_key(GEOJSON_PATH)[1:]
+
+
+def build_rent_figure(df_avg, overall_df):
+    """
+    Line chart of every district plus the overall mean.
+
+    Selecting districts on the map only toggles the traces' visibility and opacity in the
+    browser (see the clientside callback below), so the figure is never rebuilt per click.
+
+    Parameters:
+    df_avg (pd.DataFrame): Mean rent per Date and District.
+    overall_df (pd.DataFrame): Mean rent per Date over all rows.
+
+    Returns:
+    go.Figure: Rent price by date, all districts visible.
+    """
+    fig = px.line(df_avg, x='Date', y='Rent_Price', color='District',
+                  title="Average Rent Price by Date (All Districts)")
     for trace in fig.data:
-        if trace.name != "Overall Mean":
-            trace.opacity = default_opacity
+        trace.opacity = 0.5
 
-    overall_df = df_prices.groupby('Date')['Rent_Price'].mean().reset_index()
-    overall_trace = go.Scatter(
+    fig.add_trace(go.Scatter(
         x=overall_df['Date'],
         y=overall_df['Rent_Price'],
         mode='lines',
         name='Overall Mean',
         line=dict(dash='dash', color='black'),
-        opacity=overall_opacity
-    )
-    fig.add_trace(overall_trace)
+        opacity=1
+    ))
     fig.update_layout(
         yaxis_title="Rent Price (€ per M²)",
         xaxis_title="Date",
@@ -138,6 +76,288 @@ def update_graph(n_clicks_list):
     )
     return fig
 
+
+@cache.memoize()
+def rent_figure(version):
+    """Default line chart as a plotly dict, computed once per data version across workers."""
+    aggregates = load_price_aggregates()
+    return build_rent_figure(aggregates.df_avg, aggregates.overall_df).to_dict()
+
+
+@cache.memoize()
+def map_data(version):
+    """
+    District names, colors and animation frames of the map, computed once per data version.
+
+    Parameters:
+    version (tuple): data_version(), part of the cache key.
+
+    Returns:
+    dict: district_names, fill_colors, legend_background and frames (the map-frames store).
+    """
+    geojson_data = load_geojson()
+    aggregates = load_price_aggregates()
+    # Map colors and legend from the same scale (breaks computed once per data version)
+    color_scale = load_color_scale()
+    district_names = [feature['properties'].get('NOMBRE', 'Unknown') for feature in geojson_data['features']]
+    avg_rents = [aggregates.district_avgs.get(name, aggregates.min_rent) for name in district_names]
+    fill_colors = map_colors(avg_rents, color_scale).tolist()
+
+    # Month-by-month colors of every polygon, sent to the browser once and animated client-side
+    rent_frames = reorder_frames(load_choropleth_frames('rent'), district_names)
+    yoy_frames = reorder_frames(load_choropleth_frames('yoy'), district_names)
+    yoy_limit = yoy_frames.scale.breaks[-1] * 100
+    frames = {
+        'rent': frames_payload(rent_frames, f"€{rent_frames.scale.breaks[0]:.1f}", f"€{rent_frames.scale.breaks[-1]:.1f}"),
+        'yoy': frames_payload(yoy_frames, f"-{yoy_limit:.0f}%", f"+{yoy_limit:.0f}%"),
+        'average': {'colors': fill_colors, 'legend': {'background': legend_gradient(color_scale), 'low': 'Low', 'high': 'High'}},
+    }
+    return {
+        'district_names': district_names,
+        'fill_colors': fill_colors,
+        'legend_background': legend_gradient(color_scale),
+        'frames': frames,
+    }
+
+
+@cache.memoize()
+def tier_positions(version, tier):
+    """Polygon positions of a geometry tier (simplified boundaries in Leaflet's [lat, lon] order)."""
+    return load_geometry_tiers()[tier].positions
+
+
+def serve_layout():
+    """
+    Page layout, built from the shared cache on each page load (so new data shows on reload).
+
+    Returns:
+    html.Div: The app layout.
+    """
+    version = data_version()
+    data = map_data(version)
+    initial_tier = tier_for_zoom(MAP_ZOOM)
+    frame_months = data['frames']['rent']['months']
+
+    # Create district polygons
+    polygons = []
+    for district_name, positions, fill_color in zip(data['district_names'], tier_positions(version, initial_tier), data['fill_colors']):
+        polygon = dl.Polygon(
+            positions=positions,
+            id={'type': 'district-polygon', 'index': district_name},
+            color='Gray',
+            fill=True,
+            fillOpacity=0.6,
+            fillColor=fill_color,
+            n_clicks=0
+        )
+        polygons.append(polygon)
+
+    # Build the map container
+    map_component = dl.Map(
+        center=[40.38, -3.68],
+        zoom=MAP_ZOOM,
+        children=[dl.TileLayer()] + polygons,
+        style={'width': '100%', 'height': '100%'},
+        id='map'
+    )
+    map_container = html.Div([
+        map_component,
+        html.Div([
+            html.Div([
+                html.Span("Low", id='legend-low', style={'float': 'left', 'fontSize': '12px'}),
+                html.Span("High", id='legend-high', style={'float': 'right', 'fontSize': '12px'}),
+                html.Div(style={'clear': 'both'})
+            ]),
+            html.Div(
+                id='legend-bar',
+                style={
+                    'height': '10px',
+                    'width': '150px',
+                    'background': data['legend_background']
+                }
+            )
+        ],
+        style={
+            'position': 'absolute',
+            'bottom': '10px',
+            'right': '10px',
+            'backgroundColor': 'white',
+            'padding': '5px',
+            'border': '1px solid gray',
+            'fontFamily': 'Arial',
+            'zIndex': '1000'
+        })
+    ], style={'position': 'relative', 'width': '100%', 'height': '45vh'})
+
+    return html.Div([
+        html.H1("Madrid Housing Market"),
+        html.Div([
+            dcc.Graph(id='rent-graph', figure=rent_figure(version), style={'height': '45vh'}),
+            html.Div(map_container, style={'marginTop': '20px'}),
+            html.Div([
+                dcc.RadioItems(
+                    id='map-mode',
+                    options=[
+                        {'label': 'All-time average', 'value': 'average'},
+                        {'label': 'Monthly rent', 'value': 'rent'},
+                        {'label': 'YoY change', 'value': 'yoy'},
+                    ],
+                    value='average',
+                    inline=True,
+                    inputStyle={'marginRight': '4px', 'marginLeft': '12px'}
+                ),
+                html.Div([
+                    html.Button("Play", id='play-button', n_clicks=0, style={'marginRight': '10px'}),
+                    html.Span(frame_months[-1], id='frame-label', style={'fontFamily': 'Arial', 'width': '70px'}),
+                    html.Div(
+                        dcc.Slider(
+                            id='frame-slider',
+                            min=0,
+                            max=len(frame_months) - 1,
+                            step=1,
+                            value=len(frame_months) - 1,
+                            marks={i: month[:4] for i, month in enumerate(frame_months) if month.endswith('-01') and int(month[:4]) % 3 == 0},
+                            updatemode='drag'
+                        ),
+                        style={'flex': '1'}
+                    )
+                ], style={'display': 'flex', 'alignItems': 'center', 'marginTop': '10px'})
+            ], style={'marginTop': '10px'})
+        ]),
+        dcc.Store(id='geometry-tier', data=initial_tier),
+        dcc.Store(id='map-frames', data=data['frames']),
+        dcc.Store(id='district-names', data=data['district_names']),
+        dcc.Interval(id='frame-interval', interval=FRAME_INTERVAL_MS, disabled=True)
+    ])
+
+
+def warm_up():
+    """
+    Compute the default figure, map data and every geometry tier before serving traffic.
+
+    Called by wsgi.py at startup; with several workers only the first one computes, the
+    others read the results from the shared cache.
+    """
+    version = data_version()
+    rent_figure(version)
+    map_data(version)
+    for tier in TIERS:
+        tier_positions(version, tier)
+    serve_layout()
+
+
+app.layout = serve_layout
+
+# --- Animation (client-side: the server is not involved once the frames are loaded) ---
+app.clientside_callback(
+    """
+    function(frame, mode, frames) {
+        const months = frames.rent.months;
+        if (mode === 'average') {
+            const legend = frames.average.legend;
+            return [frames.average.colors, {height: '10px', width: '150px', background: legend.background},
+                    legend.low, legend.high, months[frame]];
+        }
+        const data = frames[mode];
+        // Decode the palette indices once per payload
+        const cache = window.choroplethFrames = window.choroplethFrames || {};
+        if (!cache[data.key]) {
+            const raw = atob(data.indices);
+            cache[data.key] = Uint8Array.from(raw, c => c.charCodeAt(0));
+        }
+        const indices = cache[data.key];
+        const colors = new Array(data.districts);
+        for (let i = 0; i < data.districts; i++) {
+            colors[i] = data.palette[indices[frame * data.districts + i]];
+        }
+        return [colors, {height: '10px', width: '150px', background: data.legend.background},
+                data.legend.low, data.legend.high, months[frame]];
+    }
+    """,
+    Output({'type': 'district-polygon', 'index': dash.ALL}, 'fillColor'),
+    Output('legend-bar', 'style'),
+    Output('legend-low', 'children'),
+    Output('legend-high', 'children'),
+    Output('frame-label', 'children'),
+    Input('frame-slider', 'value'),
+    Input('map-mode', 'value'),
+    State('map-frames', 'data')
+)
+
+app.clientside_callback(
+    """
+    function(n_clicks, mode) {
+        const playing = n_clicks % 2 === 1;
+        // Playing the all-time average would show nothing, start with the monthly rent
+        const nextMode = playing && mode === 'average' ? 'rent' : mode;
+        return [!playing, playing ? 'Pause' : 'Play', nextMode];
+    }
+    """,
+    Output('frame-interval', 'disabled'),
+    Output('play-button', 'children'),
+    Output('map-mode', 'value'),
+    Input('play-button', 'n_clicks'),
+    State('map-mode', 'value'),
+    prevent_initial_call=True
+)
+
+app.clientside_callback(
+    """
+    function(n_intervals, frame, last) {
+        return frame >= last ? 0 : frame + 1;
+    }
+    """,
+    Output('frame-slider', 'value'),
+    Input('frame-interval', 'n_intervals'),
+    State('frame-slider', 'value'),
+    State('frame-slider', 'max'),
+    prevent_initial_call=True
+)
+
+@app.callback(
+    Output({'type': 'district-polygon', 'index': dash.ALL}, 'positions'),
+    Output('geometry-tier', 'data'),
+    Input('map', 'zoom'),
+    State('geometry-tier', 'data')
+)
+def update_geometry_tier(zoom, current_tier):
+    # Only send new boundaries when the zoom crosses into another tier
+    tier = tier_for_zoom(zoom if zoom is not None else MAP_ZOOM)
+    if tier == current_tier:
+        raise PreventUpdate
+    return tier_positions(data_version(), tier), tier
+
+# --- Line chart (selection handled client-side) ---
+app.clientside_callback(
+    """
+    function(n_clicks_list, figure, districts) {
+        // A district is selected after an odd number of clicks on its polygon
+        const selected = districts.filter((name, i) => (n_clicks_list[i] || 0) % 2 === 1);
+        const isSelected = new Set(selected);
+        const fig = Object.assign({}, figure);
+        fig.data = figure.data.map(trace => {
+            if (trace.name === 'Overall Mean') {
+                return Object.assign({}, trace, {opacity: selected.length ? 0.2 : 1});
+            }
+            return Object.assign({}, trace, {
+                visible: !selected.length || isSelected.has(trace.name),
+                opacity: selected.length ? 1 : 0.5
+            });
+        });
+        const title = selected.length
+            ? 'Average Rent Price by Date - ' + selected.join(', ')
+            : 'Average Rent Price by Date (All Districts)';
+        fig.layout = Object.assign({}, figure.layout, {title: Object.assign({}, figure.layout.title, {text: title})});
+        return fig;
+    }
+    """,
+    Output('rent-graph', 'figure'),
+    Input({'type': 'district-polygon', 'index': dash.ALL}, 'n_clicks'),
+    State('rent-graph', 'figure'),
+    State('district-names', 'data'),
+    prevent_initial_call=True
+)
+
 if __name__ == '__main__':
-    # Run the Dash app on a dedicated port
+    # Development server (single process, reloader on); use wsgi.py in production
     app.run(debug=True, port=8050)
@@ -0,0 +1,260 @@
+"""
+Precomputed index over the district x month rent matrix for arbitrary date-window KPIs.
+
+Built once per dataset version, it answers mean, maximum and CAGR queries for any window of
+months in constant time (per district), so a date-range slider does not rescan the data:
+
+- mean: prefix sums and prefix counts of the prices
+- max: a sparse table of range maxima (two overlapping power-of-two blocks per query)
+- CAGR: next-valid / previous-valid month lookups for the first and last price in the window,
+  never before CAGR_START (like bucket_1, so that all districts have data)
+
+Row "All" aggregates every district like the buckets do: its mean and max run over all cells
+and its CAGR uses the monthly mean across districts. Over the full history the window KPIs are
+those of utils.compute_kpi_table.
+"""
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from dashboard1_graphs.utils import CAGR_START, KPI_COLUMNS
+
+# labels: row labels (districts then "All"), index: label -> row
+# months: datetime64[M] axis, days: month starts as days since epoch (int64)
+# cum_sums / cum_counts: (n_rows, n_months + 1) prefix sums of prices and of valid cells
+# sparse_max: (n_levels, n_rows, n_months), level k holds the max of months [i, i + 2**k)
+# level: (n_rows, n_months) price series used for CAGR
+# next_valid: (n_rows, n_months + 1) first valid month >= i (n_months if none)
+# prev_valid: (n_rows, n_months) last valid month <= i (-1 if none)
+RentWindowIndex = namedtuple('RentWindowIndex', [
+    'labels', 'index', 'months', 'days', 'cum_sums', 'cum_counts',
+    'sparse_max', 'level', 'next_valid', 'prev_valid',
+])
+
+
+def build_rent_index(matrix):
+    """
+    Build the window index from a rent matrix.
+
+    Parameters:
+    matrix (RentMatrix): Dense rent matrix from utils.build_rent_matrix.
+
+    Returns:
+    RentWindowIndex: Index answering window_mean / window_max / window_cagr queries.
+    """
+    values = matrix.values.astype(np.float64)
+    labels = tuple(matrix.districts) + ("All",)
+    n_months = values.shape[1] if values.ndim == 2 else 0
+    values = values.reshape(len(matrix.districts), n_months)
+    valid = ~np.isnan(values)
+
+    # Per-row sums, counts and maxima; the "All" row aggregates each month over districts
+    sums = np.vstack([np.where(valid, values, 0), np.where(valid, values, 0).sum(axis=0)])
+    counts = np.vstack([valid, valid.sum(axis=0)]).astype(np.int64)
+    maxima = np.where(valid, values, -np.inf)
+    maxima = np.vstack([maxima, maxima.max(axis=0, initial=-np.inf)])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        level = np.where(counts > 0, sums / counts, np.nan)
+
+    n_rows = len(labels)
+    cum_sums = np.zeros((n_rows, n_months + 1))
+    cum_sums[:, 1:] = np.cumsum(sums, axis=1)
+    cum_counts = np.zeros((n_rows, n_months + 1), dtype=np.int64)
+    cum_counts[:, 1:] = np.cumsum(counts, axis=1)
+
+    levels = [maxima]
+    width = 1
+    while 2 * width <= n_months:
+        previous = levels[-1]
+        current = previous.copy()
+        current[:, :n_months - width] = np.maximum(previous[:, :n_months - width], previous[:, width:])
+        levels.append(current)
+        width *= 2
+    sparse_max = np.stack(levels)
+
+    positions = np.arange(n_months)
+    has_level = counts > 0
+    prev_valid = np.maximum.accumulate(np.where(has_level, positions, -1), axis=1)
+    next_valid = np.full((n_rows, n_months + 1), n_months, dtype=np.int64)
+    if n_months:
+        next_valid[:, :n_months] = np.minimum.accumulate(
+            np.where(has_level, positions, n_months)[:, ::-1], axis=1)[:, ::-1]
+
+    for array in (cum_sums, cum_counts, sparse_max, level, next_valid, prev_valid):
+        array.flags.writeable = False
+    return RentWindowIndex(
+        labels=labels,
+        index={label: i for i, label in enumerate(labels)},
+        months=matrix.months,
+        days=matrix.months.astype('datetime64[D]').astype(np.int64),
+        cum_sums=cum_sums,
+        cum_counts=cum_counts,
+        sparse_max=sparse_max,
+        level=level,
+        next_valid=next_valid,
+        prev_valid=prev_valid,
+    )
+
+
+def month_position(index, date):
+    """
+    Position of the month containing date on the index's month axis, clipped to the axis.
+
+    Parameters:
+    index (RentWindowIndex): Window index.
+    date (str, date or datetime64): Any date in the month.
+
+    Returns:
+    int: Month position.
+    """
+    month = np.datetime64(pd.Timestamp(date).to_period('M').start_time, 'M')
+    position = int((month - index.months[0]).astype(np.int64))
+    return min(max(position, 0), len(index.months) - 1)
+
+
+def default_kpi_window(index):
+    """
+    Default KPI date window: the full history, whose KPIs are the all-time ones of the
+    precomputed KPI table (also behind the required income).
+
+    Parameters:
+    index (RentWindowIndex): Window index with at least one month.
+
+    Returns:
+    tuple: (first month, last month) as datetime.date, as shown by the date slider.
+    """
+    months = pd.to_datetime(index.months).date
+    return months[0], months[-1]
+
+
+def _rows(index, district):
+    if district is None:
+        return np.arange(len(index.labels))
+    return np.array([index.index[district]])
+
+
+def _window_stats(index, rows, start, end):
+    """Mean, max and CAGR (%) of rows over months [start, end] (positions, inclusive)."""
+    count = index.cum_counts[rows, end + 1] - index.cum_counts[rows, start]
+    total = index.cum_sums[rows, end + 1] - index.cum_sums[rows, start]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(count > 0, total / count, np.nan)
+
+    k = int(np.log2(end - start + 1))
+    block = index.sparse_max[k]
+    maximum = np.maximum(block[rows, start], block[rows, end - (1 << k) + 1])
+    maximum = np.where(np.isfinite(maximum), maximum, np.nan)
+
+    # The CAGR starts at CAGR_START at the earliest, as in bucket_1
+    cagr_start = max(start, int(np.searchsorted(index.months, CAGR_START)))
+    first = index.next_valid[rows, cagr_start]
+    last = index.prev_valid[rows, end]
+    ok = (first <= end) & (last >= cagr_start) & (first < last)
+    first_safe, last_safe = np.where(ok, first, 0), np.where(ok, last, 0)
+    initial_price = index.level[rows, first_safe]
+    final_price = index.level[rows, last_safe]
+    years = (index.days[last_safe] - index.days[first_safe]) / 365.25
+    ok &= (initial_price > 0) & (final_price >= 0) & (years > 0)
+    cagr = np.full(len(rows), np.nan)
+    with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+        cagr[ok] = ((final_price[ok] / initial_price[ok]) ** (1 / years[ok]) - 1) * 100
+    cagr[~np.isfinite(cagr)] = np.nan
+    return mean, maximum, cagr
+
+
+def _window_bounds(index, start, end):
+    if len(index.months) == 0:
+        return None
+    start, end = month_position(index, start), month_position(index, end)
+    if start > end:
+        return None
+    return start, end
+
+
+def window_mean(index, district, start, end):
+    """
+    Average rent of a district (or "All") between two dates, inclusive of both months.
+
+    Parameters:
+    index (RentWindowIndex): Window index.
+    district (str): District name or "All".
+    start, end (str, date or datetime64): Window bounds.
+
+    Returns:
+    float: Average rent, NaN if there is no data in the window.
+    """
+    bounds = _window_bounds(index, start, end)
+    if bounds is None:
+        return np.nan
+    return float(_window_stats(index, _rows(index, district), *bounds)[0][0])
+
+
+def window_max(index, district, start, end):
+    """
+    Maximum rent of a district (or "All") between two dates, inclusive of both months.
+
+    Parameters:
+    index (RentWindowIndex): Window index.
+    district (str): District name or "All".
+    start, end (str, date or datetime64): Window bounds.
+
+    Returns:
+    float: Maximum rent, NaN if there is no data in the window.
+    """
+    bounds = _window_bounds(index, start, end)
+    if bounds is None:
+        return np.nan
+    return float(_window_stats(index, _rows(index, district), *bounds)[1][0])
+
+
+def window_cagr(index, district, start, end):
+    """
+    CAGR (%) of a district (or "All") between its first and last price inside the window,
+    from CAGR_START at the earliest.
+
+    Parameters:
+    index (RentWindowIndex): Window index.
+    district (str): District name or "All".
+    start, end (str, date or datetime64): Window bounds.
+
+    Returns:
+    float: CAGR as a percentage, NaN if it cannot be computed.
+    """
+    bounds = _window_bounds(index, start, end)
+    if bounds is None:
+        return np.nan
+    return float(_window_stats(index, _rows(index, district), *bounds)[2][0])
+
+
+def window_kpi_table(index, start, end):
+    """
+    KPIs of every district and "All" over a date window, in the layout of utils.compute_kpi_table.
+
+    Parameters:
+    index (RentWindowIndex): Window index.
+    start, end (str, date or datetime64): Window bounds (inclusive months).
+
+    Returns:
+    pd.DataFrame: Columns CAGR, Max_Rent, Rank, Avg_Rent indexed by District; read it with
+    utils.kpi_value.
+    """
+    table = pd.DataFrame(np.nan, index=pd.Index(index.labels, name='District'), columns=KPI_COLUMNS)
+    bounds = _window_bounds(index, start, end)
+    if bounds is None:
+        return table
+    mean, maximum, cagr = _window_stats(index, _rows(index, None), *bounds)
+    mean[mean <= 0] = np.nan
+    maximum[maximum <= 0] = np.nan
+
+    district_avgs = mean[:-1]
+    has_avg = ~np.isnan(district_avgs)
+    ranked = np.sort(district_avgs[has_avg])
+    rank = np.full(len(index.labels), np.nan)
+    rank[:-1][has_avg] = len(ranked) - np.searchsorted(ranked, district_avgs[has_avg], side='right') + 1
+
+    table['CAGR'] = np.round(cagr, 2)
+    table['Max_Rent'] = np.round(maximum, 2)
+    table['Rank'] = rank
+    table['Avg_Rent'] = np.round(mean, 2)
+    return table
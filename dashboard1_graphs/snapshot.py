@@ -0,0 +1,322 @@
+"""
+Columnar binary snapshot of the long rent table (Date, District, COD_DIS, Rent_Price).
+
+Parsing prices.csv as text (dates and floats) dominates cold start, so the table is converted
+once into one .npy file per column plus a small JSON manifest. Readers memory-map the .npy
+files instead of parsing them, which also lets several Streamlit / Dash worker processes on
+the same host share the same physical pages. The snapshot is rebuilt automatically when the
+CSV changes. Snapshots live under the repository's data/.snapshots whatever the working
+directory, and are keyed by the CSV's absolute path (see snapshot_key), so CSVs with the same
+file name in different folders do not overwrite each other.
+
+Build (or refresh) the snapshot explicitly with:
+
+    python -m dashboard1_graphs.snapshot data/prices.csv
+"""
+import io
+import os
+import json
+import time
+import uuid
+import hashlib
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# Anchored at the repository, not the working directory
+SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', '.snapshots')
+FORMAT_VERSION = 1
+
+# Column dtypes on disk. District is stored as int16 codes into the manifest's district list.
+COLUMN_DTYPES = {
+    'Date': 'datetime64[ns]',
+    'District': 'int16',
+    'COD_DIS': 'int16',
+    'Rent_Price': 'float64',
+}
+
+# Generations older than this (seconds) that are no longer referenced get deleted
+_STALE_AFTER = 60
+
+
+def source_key(csv_path):
+    """Modification time and size of csv_path, as recorded in snapshot manifests."""
+    stat = os.stat(csv_path)
+    return {'source_mtime_ns': stat.st_mtime_ns, 'source_size': stat.st_size}
+
+
+def snapshot_key(csv_path):
+    """
+    Prefix of the snapshot files of csv_path: its file name and a hash of its absolute path.
+
+    Parameters:
+    csv_path (str): Path to the source CSV.
+
+    Returns:
+    str: e.g. 'prices-0123456789ab' (no dots, see _remove_old_generations).
+    """
+    stem = os.path.splitext(os.path.basename(csv_path))[0].replace('.', '_')
+    digest = hashlib.sha1(os.path.abspath(csv_path).encode('utf-8')).hexdigest()[:12]
+    return f"{stem}-{digest}"
+
+
+def manifest_path(csv_path, snapshot_dir=None):
+    """
+    Path of the manifest describing the snapshot of csv_path.
+
+    Parameters:
+    csv_path (str): Path to the source CSV.
+    snapshot_dir (str): Directory holding the snapshots. Default SNAPSHOT_DIR.
+
+    Returns:
+    str: Path to the JSON manifest.
+    """
+    return os.path.join(snapshot_dir or SNAPSHOT_DIR, f"{snapshot_key(csv_path)}.manifest.json")
+
+
+def read_manifest(csv_path, snapshot_dir=None):
+    """Return the manifest of the snapshot of csv_path, or None if there is none."""
+    try:
+        with open(manifest_path(csv_path, snapshot_dir), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if manifest.get('format') != FORMAT_VERSION:
+        return None
+    return manifest
+
+
+def is_fresh(csv_path, snapshot_dir=None):
+    """
+    Check whether the snapshot matches the current version of the CSV.
+
+    Parameters:
+    csv_path (str): Path to the source CSV.
+    snapshot_dir (str): Directory holding the snapshots. Default SNAPSHOT_DIR.
+
+    Returns:
+    bool: True if a snapshot exists and was built from the CSV as it is now.
+    """
+    manifest = read_manifest(csv_path, snapshot_dir)
+    if manifest is None:
+        return False
+    source = source_key(csv_path)
+    return (manifest['source_mtime_ns'] == source['source_mtime_ns']
+            and manifest['source_size'] == source['source_size'])
+
+
+def read_prices_columns(csv_path):
+    """
+    Parse the long rent CSV into column arrays.
+
+    Parameters:
+    csv_path (str): Path to a CSV with 'Date', 'District', 'COD_DIS' and 'Rent_Price' columns.
+
+    Returns:
+    dict: Column name -> np.ndarray, with 'Date' as datetime64[ns] and 'District' as strings.
+    """
+    df = pd.read_csv(csv_path)
+    df['Date'] = pd.to_datetime(df['Date'])
+    return {col: df[col].to_numpy() for col in df.columns}
+
+
+def _write_manifest(manifest, csv_path, snapshot_dir):
+    """Swap in a new manifest atomically."""
+    target = manifest_path(csv_path, snapshot_dir)
+    tmp = f"{target}.{manifest['generation']}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp, target)
+
+
+def write_snapshot(columns, csv_path, snapshot_dir=None, extra=None):
+    """
+    Write column arrays as a snapshot for csv_path.
+
+    The column files of a new generation are written first and the manifest is swapped in
+    atomically afterwards, so readers never see a half-written snapshot.
+
+    Parameters:
+    columns (dict): Column name -> array with the columns in COLUMN_DTYPES ('District' as strings).
+    csv_path (str): Source CSV the snapshot represents (its mtime/size are recorded).
+    snapshot_dir (str): Directory holding the snapshots. Default SNAPSHOT_DIR.
+    extra (dict): Additional entries to store in the manifest.
+
+    Returns:
+    dict: The manifest that was written.
+    """
+    snapshot_dir = snapshot_dir or SNAPSHOT_DIR
+    os.makedirs(snapshot_dir, exist_ok=True)
+    key = snapshot_key(csv_path)
+    generation = uuid.uuid4().hex[:12]
+
+    districts, codes = np.unique(np.asarray(columns['District'], dtype=object), return_inverse=True)
+    arrays = dict(columns)
+    arrays['District'] = codes
+
+    files = {}
+    for name, dtype in COLUMN_DTYPES.items():
+        file_name = f"{key}.{generation}.{name}.npy"
+        np.save(os.path.join(snapshot_dir, file_name), np.asarray(arrays[name]).astype(dtype, copy=False))
+        files[name] = file_name
+
+    manifest = {
+        'format': FORMAT_VERSION,
+        'source': os.path.basename(csv_path),
+        'generation': generation,
+        'rows': int(len(codes)),
+        'columns': files,
+        'districts': [str(d) for d in districts],
+    }
+    manifest.update(source_key(csv_path))
+    if extra:
+        manifest.update(extra)
+
+    _write_manifest(manifest, csv_path, snapshot_dir)
+    _remove_old_generations(snapshot_dir, key, generation)
+    return manifest
+
+
+def _remove_old_generations(snapshot_dir, key, current):
+    """Delete column files (key.generation.column.npy) of generations that are no longer referenced."""
+    now = time.time()
+    for name in os.listdir(snapshot_dir):
+        parts = name.split('.')
+        if len(parts) != 4 or parts[0] != key or parts[1] == current or parts[3] != 'npy':
+            continue
+        path = os.path.join(snapshot_dir, name)
+        try:
+            # Leave recent files alone: they may belong to a concurrent build
+            if now - os.path.getmtime(path) > _STALE_AFTER:
+                os.remove(path)
+        except OSError:
+            # Still mapped by a reader on platforms that forbid it, or already gone
+            pass
+
+
+def _append_npy(path, values):
+    """
+    Append values to a 1-D .npy file in place.
+
+    np.save pads the header so the length of a growing axis fits without moving the data: the
+    new rows are written first and the header with the new shape afterwards, so a concurrent
+    np.load sees either the old or the new length, never rows that are not there yet.
+    """
+    with open(path, 'r+b') as f:
+        version = np.lib.format.read_magic(f)
+        if version != (1, 0):
+            raise ValueError(f"Unsupported .npy version {version} in {path}")
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        data_offset = f.tell()
+        if len(shape) != 1:
+            raise ValueError(f"Can only append to 1-D arrays, {path} has shape {shape}")
+        header = io.BytesIO()
+        np.lib.format.write_array_header_1_0(header, {
+            'descr': np.lib.format.dtype_to_descr(dtype),
+            'fortran_order': fortran_order,
+            'shape': (shape[0] + len(values),),
+        })
+        if header.tell() != data_offset:
+            raise ValueError(f"No room to grow the header of {path}")
+        f.seek(data_offset + shape[0] * dtype.itemsize)
+        f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+        f.flush()
+        f.seek(0)
+        f.write(header.getvalue())
+
+
+def append_snapshot(columns, csv_path, snapshot_dir=None):
+    """
+    Append rows to the current snapshot of csv_path in place, without rewriting the columns.
+
+    Call it after appending the same rows to the CSV itself: the manifest then records the
+    CSV's new mtime/size, so the snapshot stays fresh. There must be a single writer.
+
+    Parameters:
+    columns (dict): Column name -> array of the new rows, as for write_snapshot.
+    csv_path (str): Source CSV the snapshot represents.
+    snapshot_dir (str): Directory holding the snapshots. Default SNAPSHOT_DIR.
+
+    Returns:
+    dict: The updated manifest.
+    """
+    snapshot_dir = snapshot_dir or SNAPSHOT_DIR
+    manifest = read_manifest(csv_path, snapshot_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"No snapshot for {csv_path} in {snapshot_dir}")
+
+    # New districts are added at the end so the stored codes stay valid
+    districts = list(manifest['districts'])
+    codes = {name: i for i, name in enumerate(districts)}
+    names = [str(name) for name in columns['District']]
+    for name in names:
+        if name not in codes:
+            codes[name] = len(districts)
+            districts.append(name)
+    arrays = dict(columns)
+    arrays['District'] = np.array([codes[name] for name in names], dtype=np.int64)
+
+    for name, dtype in COLUMN_DTYPES.items():
+        values = np.asarray(arrays[name]).astype(dtype, copy=False)
+        _append_npy(os.path.join(snapshot_dir, manifest['columns'][name]), values)
+
+    manifest['rows'] += len(names)
+    manifest['districts'] = districts
+    manifest.update(source_key(csv_path))
+    _write_manifest(manifest, csv_path, snapshot_dir)
+    return manifest
+
+
+def build_snapshot(csv_path, snapshot_dir=None, reader=read_prices_columns):
+    """
+    Parse csv_path and write its snapshot.
+
+    Parameters:
+    csv_path (str): Path to the source CSV.
+    snapshot_dir (str): Directory holding the snapshots. Default SNAPSHOT_DIR.
+    reader (callable): Parses csv_path into the columns of COLUMN_DTYPES. Default
+    read_prices_columns (long format); see ingest.read_wide_columns for the wide export.
+
+    Returns:
+    dict: The manifest that was written.
+    """
+    return write_snapshot(reader(csv_path), csv_path, snapshot_dir)
+
+
+def load_snapshot(csv_path, snapshot_dir=None, rebuild=True, reader=read_prices_columns):
+    """
+    Memory-map the snapshot of csv_path, rebuilding it first if the CSV is newer.
+
+    Parameters:
+    csv_path (str): Path to the source CSV.
+    snapshot_dir (str): Directory holding the snapshots. Default SNAPSHOT_DIR.
+    rebuild (bool): Rebuild a missing or stale snapshot. If False, a stale snapshot raises.
+    reader (callable): Parser used when rebuilding (see build_snapshot).
+
+    Returns:
+    dict: Column name -> read-only array. Numeric columns are memory-mapped; 'District'
+    is resolved from the stored codes to strings.
+    """
+    snapshot_dir = snapshot_dir or SNAPSHOT_DIR
+    if not is_fresh(csv_path, snapshot_dir):
+        if not rebuild:
+            raise FileNotFoundError(f"No up-to-date snapshot for {csv_path} in {snapshot_dir}")
+        build_snapshot(csv_path, snapshot_dir, reader)
+    manifest = read_manifest(csv_path, snapshot_dir)
+    columns = {
+        name: np.load(os.path.join(snapshot_dir, file_name), mmap_mode='r')
+        for name, file_name in manifest['columns'].items()
+    }
+    columns['District'] = np.asarray(manifest['districts'], dtype=object)[columns['District']]
+    return columns
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build columnar snapshots of long rent CSVs.")
+    parser.add_argument('csv_paths', nargs='*', default=[os.path.join('data', 'prices.csv')])
+    parser.add_argument('--snapshot-dir', default=SNAPSHOT_DIR)
+    args = parser.parse_args()
+    for csv_path in args.csv_paths:
+        manifest = build_snapshot(csv_path, args.snapshot_dir)
+        print(f"{csv_path}: {manifest['rows']} rows -> {manifest_path(csv_path, args.snapshot_dir)}")
@@ -1,5 +1,16 @@
 import pandas as pd
 import numpy as np
+from collections import namedtuple
+
+# Dense district x month representation of the long rent table.
+# values: float32 array (n_districts, n_months), NaN where there is no price
+# districts: tuple of district names (row labels, sorted)
+# months: datetime64[M] array of consecutive months (column labels)
+# index: dict district name -> row
+RentMatrix = namedtuple('RentMatrix', ['values', 'districts', 'months', 'index'])
+
+# bucket_1 / compute_kpi_table start the CAGR here so that all districts have data
+CAGR_START = np.datetime64('2012-01', 'M')
 
 def bucket_1(df, district):
     """
@@ -190,4 +201,133 @@ def bucket_5(price_2m, surface=100):
     # Calculate the monthly income based on the assumption that 40% of the total income is dedicated to rent
     monthly_income = rent_expenditure / 0.40
 
-    return monthly_income
\ No newline at end of file
+    return monthly_income
+
+
+def build_rent_matrix(df):
+    """
+    Build the dense district x month matrix from the long rent table.
+
+    Parameters:
+    df (pd.DataFrame): DataFrame with 'Date', 'District' and 'Rent_Price' columns.
+
+    Returns:
+    RentMatrix: float32 matrix of monthly rent prices (mean of the rows of each district and
+    month) over a continuous month axis, NaN for missing months.
+    """
+    dates = pd.to_datetime(df['Date'], errors='coerce')
+    prices = pd.to_numeric(df['Rent_Price'], errors='coerce').to_numpy(dtype=np.float64)
+    valid_date = dates.notna().to_numpy()
+    if not valid_date.any():
+        empty = np.empty((0, 0), dtype=np.float32)
+        return RentMatrix(empty, (), np.array([], dtype='datetime64[M]'), {})
+
+    months = dates.to_numpy()[valid_date].astype('datetime64[M]')
+    districts, rows = np.unique(df['District'].to_numpy(dtype=object)[valid_date], return_inverse=True)
+    month_axis = np.arange(months.min(), months.max() + 1)
+    n_districts, n_months = len(districts), len(month_axis)
+
+    cells = rows * n_months + (months - month_axis[0]).astype(np.int64)
+    prices = prices[valid_date]
+    has_price = ~np.isnan(prices)
+    sums = np.bincount(cells[has_price], weights=prices[has_price], minlength=n_districts * n_months)
+    counts = np.bincount(cells[has_price], minlength=n_districts * n_months)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        values = np.where(counts > 0, sums / counts, np.nan).astype(np.float32).reshape(n_districts, n_months)
+    values.flags.writeable = False
+
+    districts = tuple(str(d) for d in districts)
+    return RentMatrix(values, districts, month_axis, {d: i for i, d in enumerate(districts)})
+
+
+# Columns of the table returned by compute_kpi_table
+KPI_COLUMNS = ['CAGR', 'Max_Rent', 'Rank', 'Avg_Rent']
+
+
+def compute_kpi_table(matrix):
+    """
+    Compute the KPIs of buckets 1-4 for every district and for "All" in one vectorized pass.
+
+    Parameters:
+    matrix (RentMatrix): Dense rent matrix from build_rent_matrix.
+
+    Returns:
+    pd.DataFrame: One row per district plus "All" (index 'District') with columns
+    CAGR (%, since CAGR_START), Max_Rent, Rank (1 is highest average) and Avg_Rent,
+    rounded like the buckets. NaN where a bucket would return "N/A".
+    """
+    values = matrix.values.astype(np.float64)
+    labels = list(matrix.districts) + ["All"]
+    if values.size == 0:
+        return pd.DataFrame(np.nan, index=pd.Index(labels, name='District'), columns=KPI_COLUMNS)
+    valid = ~np.isnan(values)
+
+    # Average and maximum: per district, and over every cell for "All"
+    counts = np.append(valid.sum(axis=1), valid.sum())
+    sums = np.where(valid, values, 0)
+    sums = np.append(sums.sum(axis=1), sums.sum())
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg_rent = np.where(counts > 0, sums / counts, np.nan)
+    masked = np.where(valid, values, -np.inf)
+    max_rent = np.append(masked.max(axis=1), masked.max())
+    max_rent[~np.isfinite(max_rent) | (max_rent <= 0)] = np.nan
+    avg_rent[avg_rent <= 0] = np.nan
+
+    # Rank by district average, same as rank(ascending=False, method='min')
+    district_avgs = avg_rent[:-1]
+    ranked = np.sort(district_avgs[~np.isnan(district_avgs)])
+    rank = np.full(len(labels), np.nan)
+    has_avg = ~np.isnan(district_avgs)
+    rank[:-1][has_avg] = len(ranked) - np.searchsorted(ranked, district_avgs[has_avg], side='right') + 1
+
+    # CAGR between the first and last valid month since CAGR_START; "All" uses the monthly mean
+    start = max(int((CAGR_START - matrix.months[0]).astype(np.int64)), 0)
+    window = values[:, start:]
+    window_valid = valid[:, start:]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        monthly_mean = np.where(window_valid, window, 0).sum(axis=0) / window_valid.sum(axis=0)
+    series = np.vstack([window, monthly_mean])
+    series_valid = ~np.isnan(series)
+    n_months = series.shape[1]
+    cagr = np.full(len(labels), np.nan)
+    if n_months > 0:
+        first = series_valid.argmax(axis=1)
+        last = n_months - 1 - series_valid[:, ::-1].argmax(axis=1)
+        days = (matrix.months[start:].astype('datetime64[D]').astype(np.int64))
+        years = (days[last] - days[first]) / 365.25
+        rows = np.arange(len(labels))
+        initial_price, final_price = series[rows, first], series[rows, last]
+        ok = (series_valid.sum(axis=1) >= 2) & (initial_price > 0) & (final_price >= 0) & (years > 0)
+        with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+            cagr[ok] = ((final_price[ok] / initial_price[ok]) ** (1 / years[ok]) - 1) * 100
+        cagr[~np.isfinite(cagr)] = np.nan
+
+    table = pd.DataFrame({
+        'CAGR': np.round(cagr, 2),
+        'Max_Rent': np.round(max_rent, 2),
+        'Rank': rank,
+        'Avg_Rent': np.round(avg_rent, 2),
+    }, index=pd.Index(labels, name='District'))
+    return table
+
+
+def kpi_value(table, district, kpi):
+    """
+    Read one KPI from a table produced by compute_kpi_table.
+
+    Parameters:
+    table (pd.DataFrame): KPI table.
+    district (str): Selected district or "All".
+    kpi (str): One of KPI_COLUMNS.
+
+    Returns:
+    str, int or float: The KPI value (Rank as int), or "N/A" if it is not available.
+    """
+    if district not in table.index:
+        return "N/A"
+    value = table.at[district, kpi]
+    if pd.isna(value):
+        return "N/A"
+    if kpi == 'Rank':
+        return int(value)
+    return float(value)
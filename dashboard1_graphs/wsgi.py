@@ -0,0 +1,24 @@
+"""
+Production entry point of the Dash map app (map_d1.py).
+
+Run from the repository root (the data paths are relative to it) behind the proxy:
+
+    gunicorn -c dashboard1_graphs/gunicorn.conf.py dashboard1_graphs.wsgi:server
+
+The app is imported and warmed up (default figure, map data and geometry tiers) before the
+server accepts requests. Workers share their results through the app's cache: a filesystem
+cache under data/.cache/map_d1 by default, see CACHE_CONFIG in map_d1.py and the
+MAP_D1_CACHE_TYPE / MAP_D1_CACHE_DIR environment variables.
+"""
+import os
+import sys
+
+# Make the repository root importable when gunicorn is started from another directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dashboard1_graphs.map_d1 import app, warm_up
+
+warm_up()
+
+# WSGI callable
+server = app.server
@@ -0,0 +1,147 @@
+"""
+Optimal split of the budget left after incentives between the housing programs (Dashboard 3).
+
+Each program turns its budget a (% of the total) into affordability improvement with a concave,
+saturating curve weight * log(1 + a / saturation), and must receive between its minimum and
+maximum. The best split maximizes the total improvement for the remaining budget. At the
+optimum every program not at a bound has the same marginal improvement,
+weight / (saturation + a) = 1 / multiplier, so
+
+    a = clip(weight * multiplier - saturation, minimum, maximum)
+
+and the total spent only grows with the multiplier: a one-dimensional root, found by
+bisection (water-filling). Between the multipliers where a program hits a bound the total is
+linear, so once the bracket holds no such change the root is solved for exactly. Slider moves
+change the remaining budget a little at a time, so callers pass the multiplier of their
+previous solve back as the start: the first bracket is then narrow and usually needs no
+bisection at all.
+
+The curves and bounds are read from PROGRAMS_PATH (one row per program). Without that file
+there is nothing to optimize and the pages keep the fixed 24 / 28.2 / 20 split.
+"""
+import functools
+import os
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+PROGRAMS_PATH = 'data/program_curves.csv'
+# Programs of the Dashboard 3 Sankey, in the order of its nodes
+PROGRAM_NAMES = ('Affordable Housing Programs', 'Rental Assistance', 'Other Housing Initiatives')
+
+# weight: scale of the impact curve (affordability improvement, %), saturation: budget (%)
+# where the returns have halved, minimum / maximum: bounds of the program's budget (%)
+Program = namedtuple('Program', ['name', 'weight', 'saturation', 'minimum', 'maximum'])
+# amounts: budget per program (%), impact: total affordability improvement (%), multiplier:
+# budget per unit of marginal improvement (NaN when the bounds decide), iterations: bracketing
+# and bisection steps
+Allocation = namedtuple('Allocation', ['amounts', 'impact', 'multiplier', 'iterations'])
+
+# Relative precision of the multiplier
+TOLERANCE = 1e-10
+# Half-width (relative) of the first bracket around the start multiplier
+WARM_START_STEP = 0.02
+
+
+@functools.lru_cache(maxsize=4)
+def _load_programs(path, mtime_ns, size):
+    curves = pd.read_csv(path).set_index('name')
+    missing = [name for name in PROGRAM_NAMES if name not in curves.index]
+    if missing:
+        raise ValueError(f"{path} has no curve for {', '.join(missing)}")
+    return tuple(Program(name, *(float(curves.at[name, field]) for field in Program._fields[1:]))
+                 for name in PROGRAM_NAMES)
+
+
+def load_programs(path=PROGRAMS_PATH):
+    """
+    Impact curves and budget bounds of the housing programs (cached until the file changes).
+
+    Parameters:
+    path (str): CSV file with the columns name, weight, saturation, minimum and maximum, one
+    row per program of PROGRAM_NAMES.
+
+    Returns:
+    tuple: Programs in the order of PROGRAM_NAMES, or None without a file.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return _load_programs(os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+def program_impact(amounts, programs):
+    """
+    Total affordability improvement of a split.
+
+    Parameters:
+    amounts (iterable): Budget per program (%).
+    programs (tuple): Program curves, in the same order.
+
+    Returns:
+    float: Affordability improvement (%).
+    """
+    return float(sum(program.weight * np.log1p(amount / program.saturation)
+                     for program, amount in zip(programs, amounts)))
+
+
+def optimize_allocation(budget, programs, start=None):
+    """
+    Split a budget between the programs to maximize the total affordability improvement.
+
+    A budget below the sum of the minimums (above the sum of the maximums) is split in
+    proportion to them.
+
+    Parameters:
+    budget (float): Budget to split (% of the total housing budget).
+    programs (tuple): Program curves and bounds.
+    start (float): Multiplier to start from, e.g. the multiplier of the caller's previous
+    Allocation (None: cold start).
+
+    Returns:
+    Allocation: Budget per program, total improvement, multiplier and bisection steps.
+    """
+    weight, saturation, minimum, maximum = (np.array(values, dtype=np.float64)
+                                            for values in list(zip(*programs))[1:])
+    if budget <= minimum.sum() or budget >= maximum.sum():
+        bounds = minimum if budget <= minimum.sum() else maximum
+        amounts = tuple(float(amount) for amount in bounds * budget / bounds.sum())
+        return Allocation(amounts, program_impact(amounts, programs), float('nan'), 0)
+
+    def spent(multiplier):
+        return np.clip(weight * multiplier - saturation, minimum, maximum).sum()
+
+    def bounds_hit(multiplier):
+        unbounded = weight * multiplier - saturation
+        return tuple(unbounded < minimum) + tuple(unbounded > maximum)
+
+    if start is None or not start > 0:
+        # Cold start: the multiplier that funds every program at its minimum
+        start = float(((minimum + saturation) / weight).min())
+    low, high = start / (1 + WARM_START_STEP), start * (1 + WARM_START_STEP)
+    iterations = 0
+    while spent(low) > budget:
+        low, iterations = low / 2, iterations + 1
+    while spent(high) < budget:
+        high, iterations = high * 2, iterations + 1
+    while high - low > TOLERANCE * high:
+        below, above = np.array(bounds_hit(low)).reshape(2, -1)
+        free = ~(below | above)
+        if bounds_hit(high) == bounds_hit(low) and free.any():
+            # Linear between low and high: spent = sum(weight * m - saturation) over the free
+            # programs + the bounds of the others
+            fixed = minimum[below].sum() + maximum[above].sum()
+            low = high = (budget - fixed + saturation[free].sum()) / weight[free].sum()
+            break
+        middle = (low + high) / 2
+        if spent(middle) < budget:
+            low = middle
+        else:
+            high = middle
+        iterations += 1
+
+    multiplier = float((low + high) / 2)
+    amounts = tuple(float(amount) for amount in np.clip(weight * multiplier - saturation, minimum, maximum))
+    return Allocation(amounts, program_impact(amounts, programs), multiplier, iterations)
@@ -0,0 +1,143 @@
+"""
+Bootstrap confidence intervals of the incentive-participation regression (Dashboard 3).
+
+The correlation view fits a straight line of participation rate on incentive amount. Here the
+fit is repeated on RESAMPLES bootstrap resamples of the responses to get percentile intervals of
+the correlation, R², slope and intercept, and a confidence band around the trendline.
+
+Resamples are drawn as one matrix of indices (resample x response) and evaluated together: the
+statistics of a simple linear regression only need the means and centered sums of squares and
+products of each row, which are NumPy reductions along the rows. The matrix is processed
+CHUNK_ELEMENTS indices at a time to bound memory. For large surveys the chunks can be spread
+over a process pool; every chunk has its own seed (spawned from the main one), so the results
+are the same with or without the pool.
+"""
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+RESAMPLES = 2000
+SEED = 42
+CONFIDENCE = 0.95
+# Indices drawn and evaluated at once (resamples per chunk = CHUNK_ELEMENTS // responses)
+CHUNK_ELEMENTS = 4_000_000
+# Smallest problem (resamples x responses) sent to the process pool when workers are given
+PARALLEL_MIN_ELEMENTS = 50_000_000
+
+# estimate: value on the full sample, low / high: bounds of the percentile interval
+Interval = namedtuple('Interval', ['estimate', 'low', 'high'])
+# correlation, r_squared, slope, intercept: Interval; slopes, intercepts: one value per resample
+# (NaN when a resample has no spread in x)
+BootstrapResult = namedtuple('BootstrapResult', [
+    'resamples', 'confidence', 'correlation', 'r_squared', 'slope', 'intercept', 'slopes', 'intercepts',
+])
+
+# Responses of the worker processes, set once per process by _init_worker
+_worker_data = None
+
+
+def regression_statistics(xs, ys):
+    """
+    Correlation, slope and intercept of a least squares line, for many samples at once.
+
+    Parameters:
+    xs (np.ndarray): Incentive amounts, one sample per row.
+    ys (np.ndarray): Participation rates, same shape as xs.
+
+    Returns:
+    tuple: (correlation, slope, intercept) arrays, one value per row (NaN for rows without
+    spread).
+    """
+    mean_x = xs.mean(axis=1)
+    mean_y = ys.mean(axis=1)
+    dx = xs - mean_x[:, None]
+    dy = ys - mean_y[:, None]
+    sxx = np.einsum('ij,ij->i', dx, dx)
+    syy = np.einsum('ij,ij->i', dy, dy)
+    sxy = np.einsum('ij,ij->i', dx, dy)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = sxy / sxx
+        correlation = sxy / np.sqrt(sxx * syy)
+    return correlation, slope, mean_y - slope * mean_x
+
+
+def _bootstrap_chunk(x, y, seed, resamples):
+    rng = np.random.default_rng(seed)
+    index = rng.integers(0, len(x), size=(resamples, len(x)))
+    return regression_statistics(x[index], y[index])
+
+
+def _init_worker(x, y):
+    global _worker_data
+    _worker_data = (x, y)
+
+
+def _worker_chunk(seed, resamples):
+    return _bootstrap_chunk(*_worker_data, seed, resamples)
+
+
+def _interval(estimate, samples, confidence):
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.nanpercentile(samples, [tail, 100 - tail])
+    return Interval(float(estimate), float(low), float(high))
+
+
+def bootstrap_regression(x, y, resamples=RESAMPLES, confidence=CONFIDENCE, seed=SEED, workers=None):
+    """
+    Bootstrap the linear regression of y on x.
+
+    Parameters:
+    x (array-like): Incentive amounts (€), one per response.
+    y (array-like): Participation rates (%), one per response.
+    resamples (int): Number of bootstrap resamples.
+    confidence (float): Coverage of the intervals (e.g. 0.95).
+    seed (int): Seed of the draws.
+    workers (int): Size of the process pool for problems of PARALLEL_MIN_ELEMENTS indices or
+    more (None: always in this process).
+
+    Returns:
+    BootstrapResult: Point estimates with percentile intervals and the resampled lines.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    per_chunk = max(1, CHUNK_ELEMENTS // len(x))
+    counts = [min(per_chunk, resamples - start) for start in range(0, resamples, per_chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(counts))
+
+    if workers and workers > 1 and resamples * len(x) >= PARALLEL_MIN_ELEMENTS:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(x, y)) as pool:
+            chunks = list(pool.map(_worker_chunk, seeds, counts))
+    else:
+        chunks = [_bootstrap_chunk(x, y, chunk_seed, count) for chunk_seed, count in zip(seeds, counts)]
+    correlations, slopes, intercepts = (np.concatenate(values) for values in zip(*chunks))
+
+    correlation, slope, intercept = (float(value[0]) for value in regression_statistics(x[None], y[None]))
+    return BootstrapResult(
+        resamples=resamples,
+        confidence=confidence,
+        correlation=_interval(correlation, correlations, confidence),
+        r_squared=_interval(correlation ** 2, correlations ** 2, confidence),
+        slope=_interval(slope, slopes, confidence),
+        intercept=_interval(intercept, intercepts, confidence),
+        slopes=slopes,
+        intercepts=intercepts,
+    )
+
+
+def trend_band(result, x):
+    """
+    Confidence band of the trendline: percentile interval of the resampled lines at each x.
+
+    Parameters:
+    result (BootstrapResult): Output of bootstrap_regression.
+    x (array-like): Positions of the band (€).
+
+    Returns:
+    tuple: (low, high) arrays of participation rates (%), one value per position.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    lines = result.intercepts[:, None] + result.slopes[:, None] * x[None, :]
+    tail = (1 - result.confidence) / 2 * 100
+    low, high = np.nanpercentile(lines, [tail, 100 - tail], axis=0)
+    return low, high
@@ -4,6 +4,12 @@ import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
 from plotly.subplots import make_subplots
+# Financial model shared with the combined dashboard (found next to this script)
+from finance import CURRENT_PROPERTY_TAX, PAYBACK_HORIZON, scenario
+from bootstrap import bootstrap_regression, trend_band
+from allocation import load_programs, optimize_allocation, program_impact
+from simulation import PAYBACK_BINS, simulate
+from survey import bin_means, fit_line, line_band, load_survey
 
 # Set page config for wide layout
 st.set_page_config(layout="wide", page_title="Madrid Housing Analytics")
@@ -236,30 +242,20 @@ waterfall_data = {
 
 # Long-term Projection Data
 years = list(range(2025, 2035))
-current_property_tax = 500
+current_property_tax = CURRENT_PROPERTY_TAX
 growth_without = 0.02
 growth_with = 0.03
-revenue_without = [current_property_tax * (1 + growth_without)**t for t in range(10)]
-revenue_with = [current_property_tax * (1 + growth_with)**t for t in range(10)]
-revenue_diff = [with_ - without_ for with_, without_ in zip(revenue_with, revenue_without)]
-cumulative_diff = sum(revenue_diff)
+initial_investment = 27.8  # million euros
+baseline = scenario(initial_investment, 7313, growth_without, growth_with)
+revenue_without = list(baseline.revenue_without)
+revenue_with = list(baseline.revenue_with)
+revenue_diff = list(baseline.revenue_diff)
+cumulative_diff = baseline.cumulative_diff
 
 # Sustainability KPIs data
-roi = (cumulative_diff / 27.8) * 100  # ROI percentage
-initial_investment = 27.8  # million euros
-cumulative_revenue_diff = np.cumsum(revenue_diff)
-years_to_payback = np.searchsorted(cumulative_revenue_diff, initial_investment)
-if years_to_payback >= len(cumulative_revenue_diff):
-    payback_period = 10.0
-else:
-    if years_to_payback == 0:
-        payback_period = initial_investment / cumulative_revenue_diff[0]
-    else:
-        prev_cumulative = cumulative_revenue_diff[years_to_payback-1] if years_to_payback > 0 else 0
-        remaining = initial_investment - prev_cumulative
-        year_diff = cumulative_revenue_diff[years_to_payback] - prev_cumulative
-        payback_period = years_to_payback + (remaining / year_diff)
-revenue_growth = ((revenue_with[-1] / revenue_without[-1]) - 1) * 100  # % increase in final year
+roi = baseline.roi  # ROI percentage
+payback_period = baseline.payback_period  # np.inf if it never pays back
+revenue_growth = baseline.revenue_growth  # % increase in final year
 social_impact = 25.2  # Average percentage improvement in affordability
 
 # Correlation Analysis Data
@@ -270,6 +266,30 @@ noise = np.random.normal(0, 5, 20)
 participation_rates = np.clip(base_participation + incentive_amounts * 0.006 + noise, 0, 100)
 correlation = np.corrcoef(incentive_amounts, participation_rates)[0, 1]
 r_squared = correlation ** 2
+# Percentile intervals of the correlation, R² and trendline
+correlation_bootstrap = bootstrap_regression(incentive_amounts, participation_rates)
+band_low, band_high = trend_band(correlation_bootstrap, incentive_amounts)
+trendline_values = np.poly1d(np.polyfit(incentive_amounts, participation_rates, 1))(incentive_amounts)
+correlation_low, correlation_high = correlation_bootstrap.correlation.low, correlation_bootstrap.correlation.high
+r_squared_low, r_squared_high = correlation_bootstrap.r_squared.low, correlation_bootstrap.r_squared.high
+band_name = f"{correlation_bootstrap.confidence:.0%} CI"
+points_name = 'Data Points'
+correlation_note = f"{band_name}, {correlation_bootstrap.resamples:,} resamples"
+
+# The landlord survey replaces the synthetic data when data/landlord_survey.csv exists
+# (streamed in one pass, see survey.py); the points are the mean participation per incentive bin
+survey = load_survey()
+if survey is not None and survey.moments.count >= 3:
+    survey_fit = fit_line(survey.moments)
+    incentive_amounts, participation_rates, _ = bin_means(survey)
+    band_low, band_high = line_band(survey.moments, incentive_amounts)
+    trendline_values = survey_fit.intercept + survey_fit.slope * incentive_amounts
+    correlation, r_squared = survey_fit.correlation, survey_fit.r_squared
+    correlation_low, correlation_high = survey_fit.correlation_low, survey_fit.correlation_high
+    r_squared_low, r_squared_high = survey_fit.r_squared_low, survey_fit.r_squared_high
+    band_name = f"{survey_fit.confidence:.0%} CI"
+    points_name = 'Survey (bin means)'
+    correlation_note = f"{band_name}, {survey_fit.count:,} responses"
 
 # District Analysis Data
 districts = [
@@ -337,43 +357,56 @@ with st.sidebar:
         index=0
     )
     
+    # Split of the remaining budget between the housing programs, optimized only when
+    # data/program_curves.csv gives their impact curves (see allocation.py)
+    programs = load_programs()
+    if programs is not None:
+        allocation_mode = st.radio(
+            "Budget Allocation",
+            ["Optimized", "Fixed Ratios"],
+            index=0,
+            help="Split the remaining budget between the housing programs for the largest affordability improvement, or with the fixed 24 / 28.2 / 20 ratios"
+        )
+    else:
+        allocation_mode = "Fixed Ratios"
+    
     st.button("Reset Filters", on_click=lambda: None)
 
 # --- Recalculation of Values based on Sidebar ---
 # Recalculate values for Sankey
 updated_sankey_values = [incentive_budget, 100-incentive_budget]
 remaining_budget = 100 - incentive_budget
-updated_remaining_values = [
-    remaining_budget * 24/72.2, 
-    remaining_budget * 28.2/72.2, 
-    remaining_budget * 20/72.2
-]
+if allocation_mode == "Optimized":
+    # Best split for affordability, warm-started from this session's previous solve
+    allocation = optimize_allocation(remaining_budget, programs, start=st.session_state.get("allocation_multiplier"))
+    st.session_state.allocation_multiplier = allocation.multiplier
+    updated_remaining_values = list(allocation.amounts)
+else:
+    updated_remaining_values = [
+        remaining_budget * 24/72.2, 
+        remaining_budget * 28.2/72.2, 
+        remaining_budget * 20/72.2
+    ]
+if programs is not None:
+    social_impact = program_impact(updated_remaining_values, programs)  # Affordability improvement of the split
 
 # Recalculate values for waterfall
 rent_reduction = -1440  # Keep this fixed for simplicity
 updated_net_gain = tax_savings + rent_reduction
 
-# Recalculate long-term projection
-updated_revenue_without = [current_property_tax * (1 + growth_rate_without)**t for t in range(10)]
-updated_revenue_with = [current_property_tax * (1 + growth_rate_with)**t for t in range(10)]
-updated_revenue_diff = [with_ - without_ for with_, without_ in zip(updated_revenue_with, updated_revenue_without)]
-updated_cumulative_diff = sum(updated_revenue_diff)
-
-# Recalculate KPIs
-updated_roi = (updated_cumulative_diff / incentive_budget) * 100
-updated_cumulative_revenue_diff = np.cumsum(updated_revenue_diff)
-years_to_payback = np.searchsorted(updated_cumulative_revenue_diff, incentive_budget)
-if years_to_payback >= len(updated_cumulative_revenue_diff):
-    updated_payback_period = 10.0
+# Recalculate long-term projection and KPIs
+updated_scenario = scenario(incentive_budget, tax_savings, growth_rate_without, growth_rate_with)
+updated_revenue_without = list(updated_scenario.revenue_without)
+updated_revenue_with = list(updated_scenario.revenue_with)
+updated_revenue_diff = list(updated_scenario.revenue_diff)
+updated_cumulative_diff = updated_scenario.cumulative_diff
+updated_roi = updated_scenario.roi
+updated_payback_period = updated_scenario.payback_period
+updated_revenue_growth = updated_scenario.revenue_growth
+if updated_payback_period != float('inf'):
+    payback_insight = f"Pays for itself in <b>{updated_payback_period:.1f} years</b>"
 else:
-    if years_to_payback == 0:
-        updated_payback_period = incentive_budget / updated_cumulative_revenue_diff[0]
-    else:
-        prev_cumulative = updated_cumulative_revenue_diff[years_to_payback-1] if years_to_payback > 0 else 0
-        remaining = incentive_budget - prev_cumulative
-        year_diff = updated_cumulative_revenue_diff[years_to_payback] - prev_cumulative
-        updated_payback_period = years_to_payback + (remaining / year_diff)
-updated_revenue_growth = ((updated_revenue_with[-1] / updated_revenue_without[-1]) - 1) * 100
+    payback_insight = f"Does not pay back within <b>{PAYBACK_HORIZON} years</b>"
 
 # Filter district data if needed
 if selected_districts:
@@ -396,8 +429,8 @@ with kpi_placeholder.container():
     with kpi_cols[1]:
         st.metric(
             label="Payback Period",
-            value=f"{updated_payback_period:.1f} years",
-            delta=f"{5 - updated_payback_period:.1f} years" if updated_payback_period < 5 else f"{updated_payback_period - 5:.1f} years",
+            value=f"{updated_payback_period:.1f} years" if updated_payback_period != float('inf') else f">{PAYBACK_HORIZON} years",
+            delta=(f"{5 - updated_payback_period:.1f} years" if updated_payback_period < 5 else f"{updated_payback_period - 5:.1f} years") if updated_payback_period != float('inf') else None,
             delta_color="inverse"
         )
 
@@ -540,7 +573,7 @@ with row2_col1:
     # Add a selector for the chart type
     chart_type = st.selectbox(
         "Select Chart", 
-        ["Long-term Projection", "Correlation Analysis", "District Analysis"],
+        ["Long-term Projection", "Correlation Analysis", "Uncertainty (Monte Carlo)", "District Analysis"],
         index=0
     )
     
@@ -616,15 +649,34 @@ with row2_col1:
             x=incentive_amounts,
             y=participation_rates,
             mode='markers',
-            name='Data Points',
+            name=points_name,
             marker=dict(size=8, color='royalblue', line=dict(width=1, color='black'))
         ))
         
+        # Confidence band of the trendline
+        fig_combined.add_trace(go.Scatter(
+            x=incentive_amounts,
+            y=band_high,
+            mode='lines',
+            line=dict(width=0),
+            showlegend=False,
+            hoverinfo='skip'
+        ))
+        fig_combined.add_trace(go.Scatter(
+            x=incentive_amounts,
+            y=band_low,
+            mode='lines',
+            line=dict(width=0),
+            fill='tonexty',
+            fillcolor='rgba(255, 0, 0, 0.15)',
+            name=band_name,
+            hoverinfo='skip'
+        ))
+        
         # Trendline
-        trendline = np.poly1d(np.polyfit(incentive_amounts, participation_rates, 1))
         fig_combined.add_trace(go.Scatter(
             x=incentive_amounts,
-            y=trendline(incentive_amounts),
+            y=trendline_values,
             mode='lines',
             name='Trendline',
             line=dict(color='red', width=2)
@@ -633,7 +685,9 @@ with row2_col1:
         # Correlation annotation
         fig_combined.add_annotation(
             x=1000, y=90,
-            text=f"<b>Correlation:</b> {correlation:.2f}<br><b>R²:</b> {r_squared:.2f}",
+            text=(f"<b>Correlation:</b> {correlation:.2f} [{correlation_low:.2f}, {correlation_high:.2f}]"
+                  f"<br><b>R²:</b> {r_squared:.2f} [{r_squared_low:.2f}, {r_squared_high:.2f}]"
+                  f"<br><i>{correlation_note}</i>"),
             showarrow=False,
             bgcolor='white',
             bordercolor='black',
@@ -685,6 +739,96 @@ with row2_col1:
             legend=dict(x=0.02, y=0.98, bgcolor='rgba(255,255,255,0.6)', font=dict(size=10))
         )
         
+    elif chart_type == "Uncertainty (Monte Carlo)":
+        # Monte Carlo around the sidebar values (see simulation.py)
+        simulation = simulate(incentive_budget, growth_rate_without, growth_rate_with)
+        gain_p5, gain_p25, gain_median, gain_p75, gain_p95 = simulation.cumulative_gain
+        fig_combined = make_subplots(rows=1, cols=2, column_widths=[0.6, 0.4], horizontal_spacing=0.12)
+        
+        # Cumulative gain: P5-P95 and P25-P75 bands around the median
+        fig_combined.add_trace(go.Scatter(
+            x=years,
+            y=gain_p95,
+            line=dict(width=0),
+            hoverinfo='skip',
+            showlegend=False
+        ), row=1, col=1)
+        fig_combined.add_trace(go.Scatter(
+            x=years,
+            y=gain_p5,
+            fill='tonexty',
+            fillcolor='rgba(0,128,0,0.15)',
+            line=dict(width=0),
+            name='P5–P95',
+            hovertemplate='P5: %{y:.1f}M €'
+        ), row=1, col=1)
+        fig_combined.add_trace(go.Scatter(
+            x=years,
+            y=gain_p75,
+            line=dict(width=0),
+            hoverinfo='skip',
+            showlegend=False
+        ), row=1, col=1)
+        fig_combined.add_trace(go.Scatter(
+            x=years,
+            y=gain_p25,
+            fill='tonexty',
+            fillcolor='rgba(0,128,0,0.3)',
+            line=dict(width=0),
+            name='P25–P75',
+            hovertemplate='P25: %{y:.1f}M €'
+        ), row=1, col=1)
+        fig_combined.add_trace(go.Scatter(
+            x=years,
+            y=gain_median,
+            line=dict(color='green', width=3),
+            name='Median',
+            hovertemplate='%{y:.1f}M €'
+        ), row=1, col=1)
+        fig_combined.add_hline(y=incentive_budget, line=dict(color='gray', width=1, dash='dash'), row=1, col=1)
+        
+        # Payback period distribution
+        fig_combined.add_trace(go.Bar(
+            x=PAYBACK_BINS[:-1] + 0.5,
+            y=simulation.payback_histogram * 100,
+            width=1,
+            marker_color='orange',
+            name='Paths',
+            showlegend=False,
+            hovertemplate='%{x:.1f} years: %{y:.1f}% of paths<extra></extra>'
+        ), row=1, col=2)
+        median_payback = simulation.payback[2]
+        fig_combined.add_annotation(
+            x=0.98, y=0.95,
+            xref='paper', yref='paper',
+            xanchor='right',
+            showarrow=False,
+            bgcolor='white',
+            bordercolor='orange',
+            borderwidth=1,
+            font=dict(size=11),
+            text=f"<b>P(payback ≤ 10y):</b> {simulation.prob_payback * 100:.1f}%<br>Median: "
+                 + (f"{median_payback:.1f} years" if np.isfinite(median_payback) else "beyond 10 years")
+        )
+        
+        # Layout Settings
+        fig_combined.update_layout(
+            title=dict(
+                text=f'Uncertainty: {simulation.paths:,} Simulated Paths',
+                x=0.5,
+                font=dict(size=16),
+                xanchor='center',
+                yanchor='top'
+            ),
+            height=310,
+            margin=dict(l=40, r=20, t=40, b=40),
+            plot_bgcolor='white',
+            legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='left', x=0, font=dict(size=9))
+        )
+        fig_combined.update_yaxes(title_text='Cumulative Gain (M €)', gridcolor='lightgrey', row=1, col=1)
+        fig_combined.update_xaxes(title_text='Payback (years)', row=1, col=2)
+        fig_combined.update_yaxes(title_text='% of Paths', gridcolor='lightgrey', row=1, col=2)
+        
     else:  # District Analysis
         # District Analysis chart - using the analysis_view from sidebar
         if analysis_view == "Quadrant Analysis":
@@ -854,7 +998,7 @@ with row2_col2:
     <div style="display: flex; flex-direction: column; justify-content: space-around; flex-grow: 1;">
         <div style="padding: 8px; background-color: rgba(255,255,255,0.6); border-radius: 5px;">
             <span style="font-weight: bold; color:#2c3e50;">Program Payback:</span><br>
-            <span style="font-size: 1.1em; color:#333;">Pays for itself in <b>{updated_payback_period:.1f} years</b></span>
+            <span style="font-size: 1.1em; color:#333;">{payback_insight}</span>
         </div>
         <div style="padding: 8px; background-color: rgba(255,255,255,0.6); border-radius: 5px;">
             <span style="font-weight: bold; color:#2c3e50;">Revenue Impact:</span><br>
@@ -871,7 +1015,7 @@ with row2_col2:
     </div>
     </div>
     """.format(
-        updated_payback_period=updated_payback_period,
+        payback_insight=payback_insight,
         updated_cumulative_diff=updated_cumulative_diff,
         incentive_budget=incentive_budget,
         updated_net_gain=updated_net_gain
@@ -0,0 +1,288 @@
+"""
+Financial scenario of the tax incentive program (Dashboard 3).
+
+scenario() turns the four sidebar values (incentive budget, tax savings per landlord and the
+revenue growth rates without / with the program) into every figure the page derives from them:
+the budget split, the landlord's net gain, the 10-year revenue projections, ROI, payback period
+and revenue growth. It is a pure function of its inputs, so its results are kept in a bounded
+LRU cache shared by every session of the process; reruns that only change other widgets (e.g.
+the district analysis view) reuse the scenario. scenario_cache_info() reports the hit / miss
+counters.
+
+For the slider grids the three KPIs that depend only on the budget and the growth rates (ROI,
+payback period, revenue growth) are also evaluated all at once, as NumPy broadcasts over the
+revenue projection, into a float32 lookup cube (sensitivity_cube). scenario() answers slider
+positions on the grid by indexing it, and the cube doubles as the data of sensitivity plots.
+"""
+import functools
+from collections import namedtuple
+
+import numpy as np
+
+# Yearly property tax revenue today (M €)
+CURRENT_PROPERTY_TAX = 500
+PROJECTION_YEARS = 10
+# Yearly rent given up by a landlord under rent control (€)
+RENT_REDUCTION = -1440
+# Split of the budget left after incentives: affordable housing, rental assistance, other
+BUDGET_SHARES = (24, 28.2, 20)
+# Years searched for the payback of the program (it may take longer than the projection)
+PAYBACK_HORIZON = 50
+
+# Scenarios kept in memory (process wide)
+SCENARIO_CACHE_SIZE = 512
+# Inputs are rounded before the cache lookup, so float noise from the sliders (2.3 / 100)
+# does not create new entries
+INPUT_DECIMALS = 6
+
+# Slider grids of the sensitivity cube: incentive budget (%) and growth rates (fractions). The
+# growth rate with the program is always above the one without (other cells are NaN)
+CUBE_BUDGETS = np.arange(200, 401) / 10
+CUBE_GROWTH_WITHOUT = np.arange(10, 31) / 1000
+CUBE_GROWTH_WITH = np.arange(11, 51) / 1000
+# Largest distance to a grid point still answered from the cube
+CUBE_TOLERANCE = 1e-6
+
+# Lists are tuples: scenarios are shared between sessions and must not be modified
+Scenario = namedtuple('Scenario', [
+    'remaining_budget', 'remaining_values', 'net_gain',
+    'revenue_without', 'revenue_with', 'revenue_diff', 'cumulative_diff',
+    'roi', 'payback_period', 'revenue_growth',
+])
+
+
+def budget_split(incentive_budget):
+    """
+    Budget left after incentives and its split between the other housing programs.
+
+    Parameters:
+    incentive_budget (float): Share of the total housing budget spent on incentives (%).
+
+    Returns:
+    tuple: (remaining budget, (affordable housing, rental assistance, other)), in % of the total.
+    """
+    remaining_budget = 100 - incentive_budget
+    total = sum(BUDGET_SHARES)
+    return remaining_budget, tuple(remaining_budget * share / total if remaining_budget > 0 else 0
+                                   for share in BUDGET_SHARES)
+
+
+def revenue_projection(growth_rate, current_property_tax=CURRENT_PROPERTY_TAX):
+    """
+    Property tax revenue of the next PROJECTION_YEARS years.
+
+    Parameters:
+    growth_rate (float): Annual growth rate (fraction).
+    current_property_tax (float): Revenue of the first year (M €).
+
+    Returns:
+    tuple: Revenue per year (M €).
+    """
+    return tuple(current_property_tax * (1 + growth_rate)**t for t in range(PROJECTION_YEARS))
+
+
+def cumulative_gain(growth_rate_without, growth_rate_with, horizon=PAYBACK_HORIZON,
+                    current_property_tax=CURRENT_PROPERTY_TAX):
+    """
+    Cumulative extra revenue of the program after each of the first `horizon` years.
+
+    Revenue of year t is current_property_tax * (1 + g)**t, so k years add up to the geometric
+    sum current_property_tax * ((1 + g)**k - 1) / g: no year-by-year list is needed and the
+    horizon is arbitrary.
+
+    Parameters:
+    growth_rate_without (array-like): Annual growth without the program (fractions).
+    growth_rate_with (array-like): Annual growth with the program (fractions), broadcast with
+    growth_rate_without.
+    horizon (int): Number of years.
+    current_property_tax (float): Revenue of the first year (M €).
+
+    Returns:
+    np.ndarray: Cumulative gain (M €), the broadcast shape of the rates + (horizon,).
+    """
+    k = np.arange(1, horizon + 1)
+
+    def total(growth_rate):
+        growth_rate = np.asarray(growth_rate, dtype=np.float64)[..., None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(growth_rate != 0, np.expm1(k * np.log1p(growth_rate)) / growth_rate, k)
+
+    return current_property_tax * (total(growth_rate_with) - total(growth_rate_without))
+
+
+def solve_payback(investment, cumulative):
+    """
+    Payback time of many scenarios at once.
+
+    A year's extra revenue accrues evenly over the year, so a scenario pays back in the first
+    year whose cumulative gain covers the investment, after the fraction of that year still
+    needed (exact linear interpolation between the year-end totals).
+
+    Parameters:
+    investment (array-like): Amount to pay back per scenario (any shape).
+    cumulative (array-like): Cumulative gain after each year of the horizon, shape
+    broadcastable to investment's shape + (horizon,) (e.g. from cumulative_gain).
+
+    Returns:
+    np.ndarray: Payback time in years (float64), np.inf for scenarios that do not pay back
+    within the horizon.
+    """
+    investment = np.asarray(investment, dtype=np.float64)
+    cumulative = np.asarray(cumulative, dtype=np.float64)
+    shape = np.broadcast_shapes(investment.shape, cumulative.shape[:-1])
+    investment = np.broadcast_to(investment, shape)
+    cumulative = np.broadcast_to(cumulative, shape + cumulative.shape[-1:])
+
+    crossed = cumulative >= investment[..., None]
+    pays_back = crossed.any(axis=-1)
+    year = crossed.argmax(axis=-1)
+    reached = np.take_along_axis(cumulative, year[..., None], axis=-1)[..., 0]
+    previous = np.where(year > 0, np.take_along_axis(cumulative, np.maximum(year - 1, 0)[..., None], axis=-1)[..., 0], 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fraction = np.where(reached > previous, (investment - previous) / (reached - previous), 0.0)
+    return np.where(pays_back, year + np.clip(fraction, 0.0, 1.0), np.inf)
+
+
+# budgets, growth_without, growth_with: the grid axes; roi, payback_period, revenue_growth:
+# float32 arrays (budgets x growth_without x growth_with)
+SensitivityCube = namedtuple('SensitivityCube', [
+    'budgets', 'growth_without', 'growth_with', 'roi', 'payback_period', 'revenue_growth',
+])
+
+
+def build_sensitivity_cube(budgets=CUBE_BUDGETS, growth_without=CUBE_GROWTH_WITHOUT,
+                           growth_with=CUBE_GROWTH_WITH, current_property_tax=CURRENT_PROPERTY_TAX):
+    """
+    Evaluate ROI, payback period and revenue growth over a whole grid of inputs at once.
+
+    Same formulas as scenario(), broadcast over the grid.
+
+    Parameters:
+    budgets (np.ndarray): Incentive budgets (%), all > 0.
+    growth_without (np.ndarray): Annual growth rates without the program (fractions).
+    growth_with (np.ndarray): Annual growth rates with the program (fractions).
+    current_property_tax (float): Revenue of the first year (M €).
+
+    Returns:
+    SensitivityCube: The grid axes and one float32 array per KPI, NaN where
+    growth_with <= growth_without; payback_period is np.inf beyond PAYBACK_HORIZON years.
+    """
+    years = np.arange(PROJECTION_YEARS)
+    revenue_without = current_property_tax * (1 + growth_without[:, None]) ** years
+    revenue_with = current_property_tax * (1 + growth_with[:, None]) ** years
+    # (growth_without, growth_with, year)
+    revenue_diff = revenue_with[None, :, :] - revenue_without[:, None, :]
+    cumulative = np.cumsum(revenue_diff, axis=-1)
+    valid = growth_with[None, :] > growth_without[:, None]
+
+    budget = budgets[:, None, None]
+    roi = cumulative[None, :, :, -1] / budget * 100
+    revenue_growth = np.broadcast_to((revenue_with[None, :, -1] / revenue_without[:, None, -1] - 1) * 100, roi.shape)
+
+    payback = solve_payback(budget, cumulative_gain(growth_without[:, None], growth_with[None, :],
+                                                    current_property_tax=current_property_tax)[None])
+
+    def _cube(values):
+        return np.where(valid[None], values, np.nan).astype(np.float32)
+
+    return SensitivityCube(budgets, growth_without, growth_with,
+                           _cube(roi), _cube(payback), _cube(revenue_growth))
+
+
+@functools.lru_cache(maxsize=1)
+def sensitivity_cube():
+    """
+    Sensitivity cube of the slider grids, built once per process.
+
+    Returns:
+    SensitivityCube: See build_sensitivity_cube (shared, do not modify).
+    """
+    return build_sensitivity_cube()
+
+
+def _grid_index(axis, value):
+    i = int(np.clip(np.searchsorted(axis, value), 1, len(axis) - 1))
+    i = i if abs(axis[i] - value) < abs(axis[i - 1] - value) else i - 1
+    return i if abs(axis[i] - value) <= CUBE_TOLERANCE else None
+
+
+def cube_index(cube, incentive_budget, growth_rate_without, growth_rate_with):
+    """
+    Position of a slider combination in the sensitivity cube.
+
+    Parameters:
+    cube (SensitivityCube): Cube from build_sensitivity_cube.
+    incentive_budget (float): Incentive budget (%).
+    growth_rate_without (float): Growth rate without the program (fraction).
+    growth_rate_with (float): Growth rate with the program (fraction).
+
+    Returns:
+    tuple: (budget, growth_without, growth_with) indices, or None when off the grid or invalid.
+    """
+    index = (_grid_index(cube.budgets, incentive_budget),
+             _grid_index(cube.growth_without, growth_rate_without),
+             _grid_index(cube.growth_with, growth_rate_with))
+    if None in index or np.isnan(cube.payback_period[index]):
+        return None
+    return index
+
+
+@functools.lru_cache(maxsize=SCENARIO_CACHE_SIZE)
+def _scenario(incentive_budget, tax_savings, growth_rate_without, growth_rate_with):
+    remaining_budget, remaining_values = budget_split(incentive_budget)
+    revenue_without = revenue_projection(growth_rate_without)
+    revenue_with = revenue_projection(growth_rate_with)
+    revenue_diff = tuple(with_ - without_ for with_, without_ in zip(revenue_with, revenue_without))
+    cumulative_diff = sum(revenue_diff)
+    cube = sensitivity_cube()
+    index = cube_index(cube, incentive_budget, growth_rate_without, growth_rate_with)
+    if index is not None:
+        roi = float(cube.roi[index])
+        payback = float(cube.payback_period[index])
+        revenue_growth = float(cube.revenue_growth[index])
+    else:
+        safe_incentive_budget = incentive_budget if incentive_budget > 0 else 1
+        safe_revenue_without_last = revenue_without[-1] if revenue_without[-1] != 0 else 1
+        roi = (cumulative_diff / safe_incentive_budget) * 100
+        payback = float(solve_payback(safe_incentive_budget, cumulative_gain(growth_rate_without, growth_rate_with)))
+        revenue_growth = ((revenue_with[-1] / safe_revenue_without_last) - 1) * 100
+    return Scenario(
+        remaining_budget=remaining_budget,
+        remaining_values=remaining_values,
+        net_gain=tax_savings + RENT_REDUCTION,
+        revenue_without=revenue_without,
+        revenue_with=revenue_with,
+        revenue_diff=revenue_diff,
+        cumulative_diff=cumulative_diff,
+        roi=roi,
+        payback_period=payback,
+        revenue_growth=revenue_growth,
+    )
+
+
+def scenario(incentive_budget, tax_savings, growth_rate_without, growth_rate_with):
+    """
+    Financial outcome of a program configuration (cached, see SCENARIO_CACHE_SIZE).
+
+    Parameters:
+    incentive_budget (float): Share of the housing budget spent on incentives (%).
+    tax_savings (float): Average tax savings per participating landlord (€).
+    growth_rate_without (float): Annual revenue growth without the program (fraction).
+    growth_rate_with (float): Annual revenue growth with the program (fraction).
+
+    Returns:
+    Scenario: Budget split, net gain, projections, ROI (%), payback period (years, np.inf when
+    the program does not pay back within PAYBACK_HORIZON years) and revenue growth (%).
+    """
+    return _scenario(*(round(float(value), INPUT_DECIMALS)
+                       for value in (incentive_budget, tax_savings, growth_rate_without, growth_rate_with)))
+
+
+def scenario_cache_info():
+    """
+    Counters of the scenario cache.
+
+    Returns:
+    functools._CacheInfo: hits, misses, maxsize and currsize.
+    """
+    return _scenario.cache_info()
@@ -0,0 +1,144 @@
+"""
+Monte Carlo uncertainty mode of the Dashboard 3 financial model.
+
+The deterministic model (finance.scenario) projects revenue with two fixed growth rates and
+gives one ROI and one payback period. Here every path draws its own inputs around the sidebar
+values:
+- a yearly growth rate of the tax base (the same shocks with and without the program),
+- the growth uplift brought by the program, scaled by the share of landlords that participate,
+- the incentive budget actually spent.
+
+All paths are evaluated as one batched NumPy computation, a chunk of CHUNK_SIZE paths at a
+time to bound the memory of the intermediate arrays. The results are percentile bands of the
+revenue, the distributions of ROI and payback period, and the probability that the program
+pays back within the projection. Draws use a fixed seed, so the same inputs give the same
+results (and are cached).
+"""
+import functools
+from collections import namedtuple
+
+import numpy as np
+
+if __package__:
+    from .finance import CURRENT_PROPERTY_TAX, INPUT_DECIMALS, PROJECTION_YEARS, solve_payback
+else:
+    # Imported next to finance.py (streamlit run dashboard3/dashboard3.py puts dashboard3/ on
+    # sys.path, where `dashboard3` is the script itself rather than the package)
+    from finance import CURRENT_PROPERTY_TAX, INPUT_DECIMALS, PROJECTION_YEARS, solve_payback
+
+PATHS = 100_000
+CHUNK_SIZE = 25_000
+SEED = 42
+PERCENTILES = (5, 25, 50, 75, 95)
+# Bins of the payback period histogram (years); paths that do not pay back are left out
+PAYBACK_BINS = np.arange(0, PROJECTION_YEARS + 1, 1.0)
+
+# Simulations kept in memory (process wide)
+SIMULATION_CACHE_SIZE = 32
+
+# growth_sd: yearly shock of the base growth rate (fraction, normal)
+# uplift_sd: uncertainty of the program's growth uplift, per path (fraction, normal)
+# budget_sd: deviation of the budget actually spent (percentage points, normal, kept >= 0.1)
+# participation: expected share of participating landlords (Full Incentives in Dashboard 2)
+# participation_concentration: concentration of its Beta distribution (higher: narrower)
+Distributions = namedtuple('Distributions', [
+    'growth_sd', 'uplift_sd', 'budget_sd', 'participation', 'participation_concentration',
+])
+DEFAULT_DISTRIBUTIONS = Distributions(
+    growth_sd=0.005, uplift_sd=0.003, budget_sd=2.0, participation=0.70, participation_concentration=50.0,
+)
+
+# revenue_with, cumulative_gain: percentile x year (M €); roi, payback: one value per
+# percentile (payback: np.inf beyond the projection); payback_histogram: share of paths per
+# PAYBACK_BINS bin; prob_payback: share of paths paying back within the projection
+SimulationResult = namedtuple('SimulationResult', [
+    'paths', 'percentiles', 'revenue_with', 'cumulative_gain', 'roi', 'payback',
+    'payback_histogram', 'prob_payback',
+])
+
+
+def simulate_chunk(rng, paths, incentive_budget, growth_rate_without, growth_rate_with,
+                   distributions=DEFAULT_DISTRIBUTIONS, years=PROJECTION_YEARS,
+                   current_property_tax=CURRENT_PROPERTY_TAX):
+    """
+    Draw and evaluate a batch of paths.
+
+    Parameters:
+    rng (np.random.Generator): Source of the draws.
+    paths (int): Number of paths.
+    incentive_budget (float): Expected incentive budget (% of the housing budget, M €).
+    growth_rate_without (float): Expected annual growth without the program (fraction).
+    growth_rate_with (float): Expected annual growth with the program (fraction).
+    distributions (Distributions): Spread of the uncertain inputs.
+    years (int): Projection length.
+    current_property_tax (float): Revenue of the first year (M €).
+
+    Returns:
+    tuple: revenue_with and cumulative_gain (paths x years), roi and payback (paths,; np.inf
+    when the path does not pay back within the projection).
+    """
+    shocks = rng.normal(0.0, distributions.growth_sd, (paths, years - 1))
+    concentration = distributions.participation_concentration
+    participation = rng.beta(distributions.participation * concentration,
+                             (1 - distributions.participation) * concentration, paths)
+    uplift = ((growth_rate_with - growth_rate_without) + rng.normal(0.0, distributions.uplift_sd, paths)) \
+        * participation / distributions.participation
+    budget = np.maximum(rng.normal(incentive_budget, distributions.budget_sd, paths), 0.1)
+
+    # Revenue of year t is the first year's revenue grown by the rates of years 1..t
+    growth_without = 1 + growth_rate_without + shocks
+    first = np.ones((paths, 1))
+    revenue_without = current_property_tax * np.cumprod(np.hstack([first, growth_without]), axis=1)
+    revenue_with = current_property_tax * np.cumprod(np.hstack([first, growth_without + uplift[:, None]]), axis=1)
+    revenue_diff = revenue_with - revenue_without
+    cumulative_gain = np.cumsum(revenue_diff, axis=1)
+    roi = cumulative_gain[:, -1] / budget * 100
+    payback = solve_payback(budget, cumulative_gain)
+    return revenue_with, cumulative_gain, roi, payback
+
+
+@functools.lru_cache(maxsize=SIMULATION_CACHE_SIZE)
+def _simulate(incentive_budget, growth_rate_without, growth_rate_with, paths, distributions, seed):
+    rng = np.random.default_rng(seed)
+    revenue_with = np.empty((paths, PROJECTION_YEARS), dtype=np.float32)
+    cumulative_gain = np.empty((paths, PROJECTION_YEARS), dtype=np.float32)
+    roi = np.empty(paths, dtype=np.float32)
+    payback = np.empty(paths, dtype=np.float32)
+    for start in range(0, paths, CHUNK_SIZE):
+        stop = min(start + CHUNK_SIZE, paths)
+        chunk = simulate_chunk(rng, stop - start, incentive_budget, growth_rate_without, growth_rate_with, distributions)
+        revenue_with[start:stop], cumulative_gain[start:stop], roi[start:stop], payback[start:stop] = chunk
+
+    counts, _ = np.histogram(payback, bins=PAYBACK_BINS)
+    return SimulationResult(
+        paths=paths,
+        percentiles=PERCENTILES,
+        revenue_with=np.percentile(revenue_with, PERCENTILES, axis=0),
+        cumulative_gain=np.percentile(cumulative_gain, PERCENTILES, axis=0),
+        roi=np.percentile(roi, PERCENTILES),
+        # Empirical quantiles: paths that never pay back stay np.inf instead of being interpolated
+        payback=np.percentile(payback, PERCENTILES, method='inverted_cdf'),
+        payback_histogram=counts / paths,
+        prob_payback=float(np.mean(payback <= PROJECTION_YEARS)),
+    )
+
+
+def simulate(incentive_budget, growth_rate_without, growth_rate_with, paths=PATHS,
+             distributions=DEFAULT_DISTRIBUTIONS, seed=SEED):
+    """
+    Monte Carlo simulation of the program around the sidebar values (cached).
+
+    Parameters:
+    incentive_budget (float): Expected incentive budget (%).
+    growth_rate_without (float): Expected annual growth without the program (fraction).
+    growth_rate_with (float): Expected annual growth with the program (fraction).
+    paths (int): Number of simulated paths.
+    distributions (Distributions): Spread of the uncertain inputs.
+    seed (int): Seed of the draws.
+
+    Returns:
+    SimulationResult: Percentile bands, distributions and probability of payback (shared, do
+    not modify).
+    """
+    rounded = (round(float(value), INPUT_DECIMALS) for value in (incentive_budget, growth_rate_without, growth_rate_with))
+    return _simulate(*rounded, paths, distributions, seed)
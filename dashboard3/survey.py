@@ -0,0 +1,283 @@
+"""
+Streaming regression of landlord participation on the tax incentive (Dashboard 3).
+
+The landlord survey has one row per response: the incentive offered (€) and the landlord's
+participation (%, 0 / 100 for a yes / no answer). Files can be larger than memory, so they are
+read CHUNK_ROWS rows at a time and reduced to a few running moments in a single pass:
+
+- count, means of x and y, and centered sums of squares and products, which stay accurate
+  where raw sums of x² lose precision. They hold the normal equations of the least squares
+  line: slope = c_xy / m2_x, intercept = mean_y - slope * mean_x.
+- the count and sum of y per incentive bin (BIN_EDGES), the points shown on the chart.
+
+Chunks are folded in with Chan et al.'s pairwise update (Welford's update for a batch), and
+summaries of separate files or workers combine the same way (merge_summaries), so
+survey_summary can read several files in a process pool. Fitted
+lines come with normal-theory intervals (Fisher z for the correlation, standard error of the
+mean response for the band), which need nothing beyond the moments.
+"""
+import functools
+import math
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+SURVEY_PATH = 'data/landlord_survey.csv'
+INCENTIVE_COLUMN = 'incentive_amount'
+PARTICIPATION_COLUMN = 'participation_rate'
+CHUNK_ROWS = 500_000
+# Incentive bins of the chart points (€); responses outside them only count in the moments
+BIN_EDGES = np.linspace(0, 10000, 21)
+CONFIDENCE = 0.95
+
+# Summaries kept in memory (process wide)
+SURVEY_CACHE_SIZE = 8
+
+# m2_x, m2_y: sums of squared deviations from the means, c_xy: sum of their products
+Moments = namedtuple('Moments', ['count', 'mean_x', 'mean_y', 'm2_x', 'm2_y', 'c_xy'])
+EMPTY_MOMENTS = Moments(0, 0.0, 0.0, 0.0, 0.0, 0.0)
+# bin_counts, bin_sums: responses and sum of participation per BIN_EDGES bin
+SurveySummary = namedtuple('SurveySummary', ['moments', 'bin_counts', 'bin_sums'])
+# correlation, r_squared, slope, intercept (NaN without spread); *_low / *_high: bounds of the
+# intervals of the correlation and R²
+Fit = namedtuple('Fit', ['count', 'correlation', 'r_squared', 'slope', 'intercept',
+                         'correlation_low', 'correlation_high', 'r_squared_low', 'r_squared_high',
+                         'confidence'])
+
+
+def chunk_moments(x, y):
+    """
+    Moments of one chunk of responses.
+
+    Parameters:
+    x (np.ndarray): Incentive amounts (€).
+    y (np.ndarray): Participation (%), same length as x.
+
+    Returns:
+    Moments: Moments of the chunk.
+    """
+    if len(x) == 0:
+        return EMPTY_MOMENTS
+    mean_x, mean_y = float(x.mean()), float(y.mean())
+    dx, dy = x - mean_x, y - mean_y
+    return Moments(len(x), mean_x, mean_y, float(dx @ dx), float(dy @ dy), float(dx @ dy))
+
+
+def merge_moments(a, b):
+    """
+    Moments of the union of two disjoint sets of responses.
+
+    Parameters:
+    a, b (Moments): Moments of each set.
+
+    Returns:
+    Moments: Combined moments.
+    """
+    if a.count == 0:
+        return b
+    if b.count == 0:
+        return a
+    count = a.count + b.count
+    delta_x = b.mean_x - a.mean_x
+    delta_y = b.mean_y - a.mean_y
+    weight = a.count * b.count / count
+    return Moments(
+        count,
+        a.mean_x + delta_x * b.count / count,
+        a.mean_y + delta_y * b.count / count,
+        a.m2_x + b.m2_x + delta_x * delta_x * weight,
+        a.m2_y + b.m2_y + delta_y * delta_y * weight,
+        a.c_xy + b.c_xy + delta_x * delta_y * weight,
+    )
+
+
+def chunk_summary(x, y):
+    """
+    Summary (moments and chart bins) of one chunk of responses.
+
+    Parameters:
+    x (np.ndarray): Incentive amounts (€).
+    y (np.ndarray): Participation (%), same length as x.
+
+    Returns:
+    SurveySummary: Summary of the chunk.
+    """
+    bins = np.searchsorted(BIN_EDGES, x, side='right') - 1
+    # The last edge belongs to the last bin
+    bins[x == BIN_EDGES[-1]] = len(BIN_EDGES) - 2
+    inside = (bins >= 0) & (bins < len(BIN_EDGES) - 1)
+    size = len(BIN_EDGES) - 1
+    return SurveySummary(
+        chunk_moments(x, y),
+        np.bincount(bins[inside], minlength=size),
+        np.bincount(bins[inside], weights=y[inside], minlength=size),
+    )
+
+
+def merge_summaries(summaries):
+    """
+    Combine the summaries of disjoint chunks, files or workers.
+
+    Parameters:
+    summaries (iterable): SurveySummary objects.
+
+    Returns:
+    SurveySummary: Summary of all the responses.
+    """
+    size = len(BIN_EDGES) - 1
+    merged = SurveySummary(EMPTY_MOMENTS, np.zeros(size, dtype=np.int64), np.zeros(size))
+    for summary in summaries:
+        merged = SurveySummary(merge_moments(merged.moments, summary.moments),
+                               merged.bin_counts + summary.bin_counts,
+                               merged.bin_sums + summary.bin_sums)
+    return merged
+
+
+def read_survey(path, chunk_rows=CHUNK_ROWS):
+    """
+    Summarize a survey file in one pass, chunk_rows rows at a time.
+
+    Rows with a missing value are skipped.
+
+    Parameters:
+    path (str): CSV file with INCENTIVE_COLUMN and PARTICIPATION_COLUMN.
+    chunk_rows (int): Rows read at once.
+
+    Returns:
+    SurveySummary: Summary of the file.
+    """
+    chunks = pd.read_csv(path, usecols=[INCENTIVE_COLUMN, PARTICIPATION_COLUMN],
+                         dtype='float64', chunksize=chunk_rows)
+    return merge_summaries(
+        chunk_summary(chunk[INCENTIVE_COLUMN].to_numpy(), chunk[PARTICIPATION_COLUMN].to_numpy())
+        for chunk in (chunk.dropna() for chunk in chunks)
+    )
+
+
+def survey_summary(paths, workers=None):
+    """
+    Summarize several survey files, optionally one per worker process.
+
+    Parameters:
+    paths (iterable): CSV files (see read_survey).
+    workers (int): Size of the process pool (None: read the files in this process).
+
+    Returns:
+    SurveySummary: Summary of all the files.
+    """
+    paths = list(paths)
+    if workers and workers > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return merge_summaries(pool.map(read_survey, paths))
+    return merge_summaries(read_survey(path) for path in paths)
+
+
+def survey_version(path=SURVEY_PATH):
+    """
+    Identify the current version of the survey file.
+
+    Parameters:
+    path (str): Survey file.
+
+    Returns:
+    tuple: (absolute path, modification time in ns, size in bytes), or None without a file.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+@functools.lru_cache(maxsize=SURVEY_CACHE_SIZE)
+def _load_survey(version):
+    return read_survey(version[0])
+
+
+def load_survey(path=SURVEY_PATH):
+    """
+    Summary of the survey file, read once per version of the file (process wide).
+
+    Parameters:
+    path (str): Survey file.
+
+    Returns:
+    SurveySummary: Summary (shared, do not modify), or None when there is no survey file.
+    """
+    version = survey_version(path)
+    return _load_survey(version) if version is not None else None
+
+
+def _z(confidence):
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def fit_line(moments, confidence=CONFIDENCE):
+    """
+    Least squares line, correlation and R² from the moments.
+
+    Parameters:
+    moments (Moments): Moments of the responses.
+    confidence (float): Coverage of the correlation's interval (Fisher z).
+
+    Returns:
+    Fit: The fitted line and its statistics.
+    """
+    nan = float('nan')
+    if moments.count < 2 or moments.m2_x <= 0 or moments.m2_y <= 0:
+        return Fit(moments.count, nan, nan, nan, nan, nan, nan, nan, nan, confidence)
+    slope = moments.c_xy / moments.m2_x
+    correlation = moments.c_xy / math.sqrt(moments.m2_x * moments.m2_y)
+    correlation = min(max(correlation, -1.0), 1.0)
+    if moments.count > 3 and abs(correlation) < 1:
+        spread = _z(confidence) / math.sqrt(moments.count - 3)
+        low, high = math.tanh(math.atanh(correlation) - spread), math.tanh(math.atanh(correlation) + spread)
+    else:
+        low = high = nan
+    # R² = correlation², its interval is the image of the correlation's (0 when it spans 0)
+    squared = sorted((low ** 2, high ** 2))
+    r_squared_low = 0.0 if low < 0 < high else squared[0]
+    return Fit(moments.count, correlation, correlation ** 2, slope, moments.mean_y - slope * moments.mean_x,
+               low, high, r_squared_low, squared[1], confidence)
+
+
+def line_band(moments, x, confidence=CONFIDENCE):
+    """
+    Confidence band of the fitted line (mean participation) at each x.
+
+    Parameters:
+    moments (Moments): Moments of the responses.
+    x (array-like): Positions of the band (€).
+    confidence (float): Coverage of the band.
+
+    Returns:
+    tuple: (low, high) arrays of participation (%), NaN with fewer than 3 responses.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    fit = fit_line(moments, confidence)
+    if moments.count < 3 or np.isnan(fit.slope):
+        return np.full_like(x, np.nan), np.full_like(x, np.nan)
+    line = fit.intercept + fit.slope * x
+    residual_variance = max(moments.m2_y - moments.c_xy * fit.slope, 0.0) / (moments.count - 2)
+    error = np.sqrt(residual_variance * (1 / moments.count + (x - moments.mean_x) ** 2 / moments.m2_x))
+    spread = _z(confidence) * error
+    return line - spread, line + spread
+
+
+def bin_means(summary):
+    """
+    Chart points: mean participation of each incentive bin that has responses.
+
+    Parameters:
+    summary (SurveySummary): Summary of the responses.
+
+    Returns:
+    tuple: (bin centers (€), mean participation (%), responses per bin).
+    """
+    filled = summary.bin_counts > 0
+    centers = (BIN_EDGES[:-1] + BIN_EDGES[1:]) / 2
+    return centers[filled], summary.bin_sums[filled] / summary.bin_counts[filled], summary.bin_counts[filled]
@@ -1,5 +1,7 @@
 import streamlit as st
 
+from dashboard1_graphs.data_watcher import refresh_on_data_change
+
 # --- Page configuration ---
 st.set_page_config(page_title="My Dashboard", layout="wide")
 
@@ -43,8 +45,8 @@ st.markdown("""
     </div>
     """, unsafe_allow_html=True)
 
-# Update automatically on changes
-st.markdown("<meta http-equiv='refresh' content='5'>", unsafe_allow_html=True)
+# Update automatically when the data changes (no full page reload)
+refresh_on_data_change()
 
 # --- Sidebar with filters ---
 with st.sidebar:
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The dashboards import their modules from the repository root (dashboard1_graphs.*, dashboard3.*)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
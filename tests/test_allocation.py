@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from dashboard3.allocation import PROGRAM_NAMES, Program, load_programs, optimize_allocation, program_impact
+
+PROGRAMS = (
+    Program('Affordable Housing Programs', 30.0, 15.0, 5.0, 60.0),
+    Program('Rental Assistance', 18.0, 6.0, 5.0, 60.0),
+    Program('Other Housing Initiatives', 9.0, 10.0, 5.0, 25.0),
+)
+
+
+def test_optimum_beats_other_splits():
+    allocation = optimize_allocation(72.2, PROGRAMS)
+    assert allocation.impact > program_impact((24, 28.2, 20), PROGRAMS) + 0.1
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        amounts = rng.dirichlet(np.ones(3)) * 72.2
+        if all(p.minimum <= a <= p.maximum for p, a in zip(PROGRAMS, amounts)):
+            assert program_impact(amounts, PROGRAMS) <= allocation.impact + 1e-9
+    # Same marginal improvement for the programs away from their bounds
+    marginal = [p.weight / (p.saturation + a) for p, a in zip(PROGRAMS, allocation.amounts)
+                if p.minimum < a < p.maximum]
+    assert np.allclose(marginal, 1 / allocation.multiplier)
+
+
+def test_allocation_spends_the_budget_within_bounds():
+    for budget in (10.0, 20.0, 50.0, 72.2, 90.0, 150.0):
+        allocation = optimize_allocation(budget, PROGRAMS)
+        assert np.isclose(sum(allocation.amounts), budget)
+        if 15.0 < budget < 145.0:
+            assert all(p.minimum - 1e-9 <= a <= p.maximum + 1e-9 for p, a in zip(PROGRAMS, allocation.amounts))
+
+
+def test_warm_start_comes_from_the_caller():
+    cold = optimize_allocation(72.2, PROGRAMS)
+    # No state is kept between calls: a second cold solve takes the same steps
+    assert optimize_allocation(72.2, PROGRAMS) == cold
+    warm = optimize_allocation(72.3, PROGRAMS, start=cold.multiplier)
+    assert warm.iterations <= optimize_allocation(72.3, PROGRAMS).iterations
+    assert np.allclose(warm.amounts, optimize_allocation(72.3, PROGRAMS).amounts)
+
+
+def test_load_programs(tmp_path):
+    assert load_programs(str(tmp_path / 'missing.csv')) is None
+    path = tmp_path / 'program_curves.csv'
+    rows = ['name,weight,saturation,minimum,maximum']
+    rows += [f'{p.name},{p.weight},{p.saturation},{p.minimum},{p.maximum}' for p in reversed(PROGRAMS)]
+    path.write_text('\n'.join(rows) + '\n')
+    programs = load_programs(str(path))
+    assert tuple(p.name for p in programs) == PROGRAM_NAMES
+    assert programs == PROGRAMS
+
+    path.write_text('\n'.join(rows[:-1]) + '\n')
+    with pytest.raises(ValueError):
+        load_programs(str(path))
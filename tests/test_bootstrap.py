@@ -0,0 +1,45 @@
+import numpy as np
+
+from dashboard3 import bootstrap
+from dashboard3.bootstrap import bootstrap_regression, regression_statistics, trend_band
+
+
+def survey(responses=200, seed=0):
+    rng = np.random.default_rng(seed)
+    x = rng.uniform(0, 5000, responses)
+    y = 20 + 0.01 * x + rng.normal(0, 10, responses)
+    return x, y
+
+
+def test_regression_statistics_match_polyfit_row_by_row():
+    rng = np.random.default_rng(1)
+    xs = rng.normal(size=(5, 30))
+    ys = 2 * xs + rng.normal(size=(5, 30))
+    correlation, slope, intercept = regression_statistics(xs, ys)
+    for row in range(len(xs)):
+        expected_slope, expected_intercept = np.polyfit(xs[row], ys[row], 1)
+        assert np.isclose(slope[row], expected_slope)
+        assert np.isclose(intercept[row], expected_intercept)
+        assert np.isclose(correlation[row], np.corrcoef(xs[row], ys[row])[0, 1])
+
+
+def test_intervals_contain_the_estimate():
+    result = bootstrap_regression(*survey(), resamples=500)
+    assert len(result.slopes) == len(result.intercepts) == 500
+    for interval in (result.correlation, result.r_squared, result.slope, result.intercept):
+        assert interval.low <= interval.estimate <= interval.high
+    low, high = trend_band(result, np.linspace(0, 5000, 11))
+    assert np.all(low <= high)
+
+
+def test_same_result_with_and_without_the_pool(monkeypatch):
+    x, y = survey()
+    # Small chunks so the pool gets several of them
+    monkeypatch.setattr(bootstrap, 'CHUNK_ELEMENTS', 200 * 50)
+    monkeypatch.setattr(bootstrap, 'PARALLEL_MIN_ELEMENTS', 0)
+    serial = bootstrap_regression(x, y, resamples=300)
+    pooled = bootstrap_regression(x, y, resamples=300, workers=2)
+    assert np.array_equal(serial.slopes, pooled.slopes)
+    assert np.array_equal(serial.intercepts, pooled.intercepts)
+    assert serial.correlation == pooled.correlation
+    assert not np.array_equal(serial.slopes, bootstrap_regression(x, y, resamples=300, seed=7).slopes)
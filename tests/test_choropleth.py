@@ -0,0 +1,25 @@
+from dashboard1_graphs.choropleth import SELECTED_STYLE, cached_choropleth, styled_features
+
+
+def district(name, x):
+    return {'type': 'Feature', 'properties': {'NOMBRE': name},
+            'geometry': {'type': 'Polygon', 'coordinates': [[[x, 40], [x + 1, 40], [x + 1, 41], [x, 40]]]}}
+
+
+GEOJSON = {'type': 'FeatureCollection', 'features': [district('Centro', -4), district('Retiro', -3)]}
+
+
+def test_styles_are_stored_in_the_features():
+    styled = styled_features(GEOJSON, {'Centro': '#ff0000'}, selected=['Retiro'])
+    centro, retiro = (feature['properties']['style'] for feature in styled['features'])
+    assert centro['fillColor'] == '#ff0000'
+    assert retiro['weight'] == SELECTED_STYLE['weight']
+    assert 'style' not in GEOJSON['features'][0]['properties']
+
+
+def test_maps_are_reused_until_an_input_changes():
+    colors = {'Centro': '#ff0000', 'Retiro': '#00ff00'}
+    m = cached_choropleth(GEOJSON, colors, selected=['Centro'])
+    assert cached_choropleth(GEOJSON, dict(colors), selected=('Centro',)) is m
+    assert cached_choropleth(GEOJSON, colors, selected=['Retiro']) is not m
+    assert cached_choropleth(GEOJSON, dict(colors, Retiro='#0000ff'), selected=['Centro']) is not m
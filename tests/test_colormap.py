@@ -0,0 +1,34 @@
+import numpy as np
+
+from dashboard1_graphs.colormap import build_color_scale, class_breaks, legend_stops, map_colors
+
+
+def get_color_d1(val, min_val, max_val):
+    # Per-district color of the original map
+    norm = (val - min_val) / (max_val - min_val) if max_val > min_val else 0
+    return f"#{int(norm * 255):02x}0000"
+
+
+def test_linear_scale_matches_the_original_colors():
+    values = np.random.default_rng(4).uniform(9, 22, 200)
+    scale = build_color_scale(values, 'linear')
+    expected = [get_color_d1(value, values.min(), values.max()) for value in values]
+    assert map_colors(values, scale).tolist() == expected
+    # Constant data maps to the lowest color instead of dividing by zero
+    assert map_colors([5.0, 5.0], build_color_scale([5.0, 5.0], 'linear')).tolist() == ['#000000', '#000000']
+
+
+def test_quantile_classes_hold_the_same_number_of_values():
+    values = np.arange(100.0)
+    scale = build_color_scale(values, 'quantile', classes=4)
+    _, counts = np.unique(map_colors(values, scale), return_counts=True)
+    assert counts.tolist() == [25, 25, 25, 25]
+    assert len(legend_stops(scale)) == 4
+
+
+def test_jenks_classes_are_the_clusters():
+    values = np.concatenate([np.linspace(1, 2, 20), np.linspace(10, 11, 20), np.linspace(30, 31, 20)])
+    assert class_breaks(values, 'jenks', classes=3).tolist() == [1, 10, 30, 31]
+    colors = map_colors(values, build_color_scale(values, 'jenks', classes=3))
+    assert [len(set(colors[i:i + 20])) for i in (0, 20, 40)] == [1, 1, 1]
+    assert len(set(colors)) == 3
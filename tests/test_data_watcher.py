@@ -0,0 +1,27 @@
+from dashboard1_graphs import data_loader, data_watcher
+
+
+def test_notify_change_only_bumps_on_new_content(tmp_path):
+    path = tmp_path / 'youth.csv'
+    path.write_text("Year,Average_Youth_Salary,Average_Monthly_Rent\n2020,1000,700\n", encoding='utf-8')
+    assert data_loader.load_youth_salary(str(path))['Average_Monthly_Rent'].tolist() == [700]
+
+    assert data_watcher.notify_change(str(path))
+    version = data_watcher.dataset_version(str(path))
+    assert version == data_watcher.dataset_version() > 0
+    # Same content (e.g. a save without edits): nothing to invalidate
+    assert not data_watcher.notify_change(str(path))
+    assert data_watcher.dataset_version(str(path)) == version
+
+    path.write_text("Year,Average_Youth_Salary,Average_Monthly_Rent\n2020,1000,750\n", encoding='utf-8')
+    assert data_watcher.notify_change(str(path))
+    assert data_watcher.dataset_version(str(path)) > version
+    assert not any(key[1] == str(path) for key in data_loader._cache)
+    assert data_loader.load_youth_salary(str(path))['Average_Monthly_Rent'].tolist() == [750]
+
+
+def test_snapshots_and_temporary_files_are_not_data(tmp_path):
+    directory = str(tmp_path)
+    assert data_watcher._is_data_file(str(tmp_path / 'prices.csv'), directory)
+    assert not data_watcher._is_data_file(str(tmp_path / '.snapshots' / 'prices.manifest.json'), directory)
+    assert not data_watcher._is_data_file(str(tmp_path / 'prices.csv.tmp'), directory)
@@ -0,0 +1,44 @@
+import threading
+
+import pytest
+
+from dashboard1_graphs.figure_tasks import FigureTask, run_tasks
+
+
+def test_figures_are_built_once_per_inputs():
+    calls = []
+
+    def build(data, n):
+        calls.append(n)
+        return {'data': data, 'n': n}
+
+    first = run_tasks([FigureTask('a', build, 'd', (1,)), FigureTask('b', build, 'd', (2,))])
+    assert first == {'a': {'data': 'd', 'n': 1}, 'b': {'data': 'd', 'n': 2}}
+    again = run_tasks([FigureTask('b', build, 'd', (2,)), FigureTask('c', build, 'd', (3,))])
+    assert again['b'] is first['b']
+    assert sorted(calls) == [1, 2, 3]
+
+
+def test_tasks_run_concurrently():
+    # Both builders wait for each other: this only finishes if they run at the same time
+    barrier = threading.Barrier(2, timeout=10)
+
+    def build(n):
+        barrier.wait()
+        return n
+
+    assert run_tasks([FigureTask('x', build, None, ('x',)), FigureTask('y', build, None, ('y',))]) == {'x': 'x', 'y': 'y'}
+
+
+def test_failed_builds_are_retried():
+    attempts = []
+
+    def build():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ValueError("no data yet")
+        return 'ok'
+
+    with pytest.raises(ValueError):
+        run_tasks([FigureTask('f', build, None, ())])
+    assert run_tasks([FigureTask('f', build, None, ())]) == {'f': 'ok'}
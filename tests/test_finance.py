@@ -0,0 +1,40 @@
+import numpy as np
+
+from dashboard3.finance import PROJECTION_YEARS, cumulative_gain, solve_payback
+
+
+def legacy_payback(investment, revenue_diff):
+    # Year-by-year interpolation the page used before solve_payback (None past the projection)
+    cumulative = np.cumsum(revenue_diff)
+    year = np.searchsorted(cumulative, investment)
+    if year >= len(cumulative):
+        return None
+    previous = cumulative[year - 1] if year > 0 else 0
+    return year + (investment - previous) / (cumulative[year] - previous)
+
+
+def test_solve_payback_matches_legacy_within_projection():
+    for investment in (5.0, 20.0, 27.8, 40.0):
+        for growth_without in (0.01, 0.02, 0.03):
+            for growth_with in (0.035, 0.04, 0.05):
+                revenue_diff = [500 * ((1 + growth_with) ** t - (1 + growth_without) ** t)
+                                for t in range(PROJECTION_YEARS)]
+                expected = legacy_payback(investment, revenue_diff)
+                if expected is None:
+                    continue
+                actual = solve_payback(investment, cumulative_gain(growth_without, growth_with))
+                assert np.isclose(actual, expected, rtol=1e-9)
+
+
+def test_solve_payback_is_batched():
+    investment = np.array([10.0, 27.8, 60.0])
+    cumulative = cumulative_gain(0.02, 0.04)
+    expected = [solve_payback(value, cumulative) for value in investment]
+    assert np.allclose(solve_payback(investment, cumulative), expected)
+
+
+def test_solve_payback_past_horizon_is_inf():
+    cumulative = cumulative_gain(0.02, 0.0201, horizon=10)
+    assert solve_payback(1e6, cumulative) == np.inf
+    # Same growth with and without the program: it never pays back
+    assert np.isinf(solve_payback(27.8, cumulative_gain(0.02, 0.02)))
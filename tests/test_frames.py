@@ -0,0 +1,49 @@
+import base64
+
+import numpy as np
+import pandas as pd
+
+from dashboard1_graphs.colormap import map_colors
+from dashboard1_graphs.frames import NO_DATA, build_rent_frames, build_yoy_frames, frames_payload, reorder_frames
+from dashboard1_graphs.utils import build_rent_matrix
+
+
+def rent_matrix():
+    months = pd.date_range('2020-01-01', periods=24, freq='MS')
+    rows = [(date, district, 10 + d * 2 + i * 0.1) for d, district in enumerate(['Centro', 'Retiro'])
+            for i, date in enumerate(months) if not (district == 'Retiro' and i == 5)]
+    return build_rent_matrix(pd.DataFrame(rows, columns=['Date', 'District', 'Rent_Price']))
+
+
+def test_rent_frames_use_one_scale_for_the_whole_history():
+    matrix = rent_matrix()
+    frames = build_rent_frames(matrix)
+    assert frames.indices.shape == (24, 2) and frames.indices.dtype == np.uint8
+    assert frames.indices[5, 1] == NO_DATA
+    values = matrix.values.T.astype(np.float64)
+    shown = frames.palette[frames.indices]
+    known = np.isfinite(values)
+    assert (shown[known] == map_colors(values[known], frames.scale)).all()
+    assert shown[0, 0] == frames.palette[0] and shown[-1, 1] == frames.palette[NO_DATA - 1]
+
+
+def test_yoy_frames_start_after_a_year():
+    frames = build_yoy_frames(rent_matrix())
+    assert (frames.indices[:12] == NO_DATA).all()
+    assert (frames.indices[12:, 0] != NO_DATA).all()
+    # Rising rents are on the red half of the symmetric scale
+    assert (frames.indices[12:, 0] > NO_DATA // 2).all()
+
+
+def test_reorder_and_payload():
+    frames = build_rent_frames(rent_matrix())
+    reordered = reorder_frames(frames, ['Retiro', 'Unknown', 'Centro'])
+    assert (reordered.indices[:, 0] == frames.indices[:, 1]).all()
+    assert (reordered.indices[:, 1] == NO_DATA).all()
+    assert (reordered.indices[:, 2] == frames.indices[:, 0]).all()
+
+    payload = frames_payload(reordered, 'low', 'high')
+    decoded = np.frombuffer(base64.b64decode(payload['indices']), dtype=np.uint8).reshape(24, payload['districts'])
+    assert (decoded == reordered.indices).all()
+    assert payload['months'][0] == '2020-01' and len(payload['palette']) == NO_DATA + 1
+    assert payload['key'] != frames_payload(frames, 'low', 'high')['key']
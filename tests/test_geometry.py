@@ -0,0 +1,61 @@
+import json
+import os
+from itertools import combinations
+
+from dashboard1_graphs.geometry import TIERS, build_geometry_tiers, tier_for_zoom
+
+GEOJSON_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data',
+                            'DistritosMadrid.geojson')
+
+
+def districts():
+    with open(GEOJSON_PATH, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def rings(geometry):
+    polygons = [geometry['coordinates']] if geometry['type'] == 'Polygon' else geometry['coordinates']
+    return [ring for polygon in polygons for ring in polygon]
+
+
+def edges(feature):
+    found = set()
+    for ring in rings(feature['geometry']):
+        for a, b in zip(ring, ring[1:]):
+            found.add(tuple(sorted((tuple(a), tuple(b)))))
+    return found
+
+
+def test_tiers_keep_shared_borders_identical():
+    geojson = districts()
+    tiers = build_geometry_tiers(geojson)
+    assert list(tiers) == list(TIERS)
+    neighbours = None
+    sizes = []
+    for name, tier in tiers.items():
+        assert [f['properties'] for f in tier.geojson['features']] == [f['properties'] for f in geojson['features']]
+        feature_edges = [edges(feature) for feature in tier.geojson['features']]
+        # Every border is drawn by both districts with the same vertices: no gaps or overlaps
+        shared = {(i, j) for i, j in combinations(range(len(feature_edges)), 2)
+                  if feature_edges[i] & feature_edges[j]}
+        neighbours = shared if neighbours is None else neighbours
+        assert shared == neighbours, name
+        for ring in (ring for feature in tier.geojson['features'] for ring in rings(feature['geometry'])):
+            assert ring[0] == ring[-1] and len(ring) >= 4
+        sizes.append(sum(len(e) for e in feature_edges))
+    assert neighbours
+    assert sizes == sorted(sizes) and sizes[0] < sizes[-1]
+
+
+def test_leaflet_positions_are_lat_lon():
+    tier = build_geometry_tiers(districts())['medium']
+    for feature, positions in zip(tier.geojson['features'], tier.positions):
+        if feature['geometry']['type'] == 'Polygon' and len(feature['geometry']['coordinates']) == 1:
+            assert positions == [[lat, lon] for lon, lat in feature['geometry']['coordinates'][0]]
+
+
+def test_tier_for_zoom_gets_finer_when_zooming_in():
+    names = list(TIERS)
+    chosen = [names.index(tier_for_zoom(zoom)) for zoom in range(8, 19)]
+    assert chosen == sorted(chosen)
+    assert tier_for_zoom(8) == 'low' and tier_for_zoom(18) == 'full'
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard1_graphs import incremental, snapshot
+
+
+def write_prices(path):
+    months = pd.date_range('2020-01-01', periods=6, freq='MS')
+    rows = [(date.strftime('%Y-%m-%d'), district, code, 10.0 + code + i * 0.5)
+            for i, date in enumerate(months) for code, district in enumerate(['Centre', 'Gracia', 'Sants'], 1)]
+    rows[4] = rows[4][:3] + (float('nan'),)
+    pd.DataFrame(rows, columns=['Date', 'District', 'COD_DIS', 'Rent_Price']).to_csv(path, index=False)
+
+
+def month(date, districts, prices):
+    return {
+        'Date': np.array([date] * len(districts), dtype='datetime64[ns]'),
+        'District': np.array(districts, dtype=object),
+        'COD_DIS': np.arange(1, len(districts) + 1),
+        'Rent_Price': np.array(prices, dtype=np.float64),
+    }
+
+
+def test_append_month_stays_consistent(tmp_path):
+    csv_path = str(tmp_path / 'prices.csv')
+    snapshot_dir = str(tmp_path / 'snapshots')
+    write_prices(csv_path)
+    snapshot.build_snapshot(csv_path, snapshot_dir)
+
+    incremental.append_month(csv_path, month('2020-07-01', ['Centre', 'Gracia', 'Sants'], [14.0, 15.0, 16.0]),
+                             snapshot_dir)
+    assert incremental.check_consistency(csv_path, snapshot_dir) == []
+
+    # Stored aggregates: extended in place, including a month with a missing price
+    running = incremental.append_month(csv_path, month('2020-08-01', ['Centre', 'Sants'], [14.5, np.nan]),
+                                       snapshot_dir)
+    assert incremental.check_consistency(csv_path, snapshot_dir) == []
+    assert len(running.months) == 8
+
+    # A new district rewrites the stored aggregates
+    running = incremental.append_month(csv_path, month('2020-09-01', ['Centre', 'Poblenou'], [15.0, 13.0]),
+                                       snapshot_dir)
+    assert incremental.check_consistency(csv_path, snapshot_dir) == []
+    assert list(running.districts) == ['Centre', 'Gracia', 'Poblenou', 'Sants']
+
+
+def test_append_month_rejects_old_months(tmp_path):
+    csv_path = str(tmp_path / 'prices.csv')
+    snapshot_dir = str(tmp_path / 'snapshots')
+    write_prices(csv_path)
+    with pytest.raises(ValueError):
+        incremental.append_month(csv_path, month('2020-03-01', ['Centre'], [20.0]), snapshot_dir)
+
+
+def test_same_file_name_in_different_folders(tmp_path):
+    snapshot_dir = str(tmp_path / 'snapshots')
+    paths = []
+    for folder in ('a', 'b'):
+        (tmp_path / folder).mkdir()
+        paths.append(str(tmp_path / folder / 'prices.csv'))
+        write_prices(paths[-1])
+    assert incremental.aggregates_path(paths[0], snapshot_dir) != incremental.aggregates_path(paths[1], snapshot_dir)
+
+    incremental.append_month(paths[0], month('2020-07-01', ['Centre'], [14.0]), snapshot_dir)
+    incremental.append_month(paths[1], month('2020-07-01', ['Sants'], [16.0]), snapshot_dir)
+    for path in paths:
+        assert incremental.check_consistency(path, snapshot_dir) == []
+    assert incremental.load_running_aggregates(paths[0], snapshot_dir).district_rows.tolist() == [7, 6, 6]
+    assert incremental.load_running_aggregates(paths[1], snapshot_dir).district_rows.tolist() == [6, 6, 7]
@@ -0,0 +1,43 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from dashboard1_graphs import ingest
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+WIDE_PATH = os.path.join(DATA_DIR, 'rent_prices.csv')
+PRICES_PATH = os.path.join(DATA_DIR, 'prices.csv')
+
+
+def sorted_prices(df):
+    return df.sort_values(['Date', 'District']).reset_index(drop=True)
+
+
+def test_wide_export_converts_to_prices_csv(tmp_path):
+    out_path = str(tmp_path / 'prices.csv')
+    rows = ingest.wide_to_long_csv(WIDE_PATH, out_path)
+
+    expected = pd.read_csv(PRICES_PATH)
+    assert rows == len(expected)
+    pd.testing.assert_frame_equal(sorted_prices(pd.read_csv(out_path)), sorted_prices(expected))
+
+
+def test_wide_columns_match_the_long_csv():
+    columns = ingest.read_wide_columns(WIDE_PATH)
+    actual = sorted_prices(pd.DataFrame({
+        'Date': pd.to_datetime(columns['Date']),
+        'District': columns['District'].astype(str),
+        'COD_DIS': columns['COD_DIS'].astype(np.int64),
+        'Rent_Price': columns['Rent_Price'],
+    }))
+    expected = pd.read_csv(PRICES_PATH)
+    expected['Date'] = pd.to_datetime(expected['Date'])
+    pd.testing.assert_frame_equal(actual, sorted_prices(expected), check_dtype=False)
+
+
+def test_parse_value_and_label():
+    assert ingest.parse_value('24,98') == 24.98
+    assert ingest.parse_value('1.024,5') == 1024.5
+    assert np.isnan(ingest.parse_value('..'))
+    assert ingest.parse_district_label('08. Fuencarral-El Pardo') == (8, 'Fuencarral - El Pardo')
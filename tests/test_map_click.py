@@ -0,0 +1,49 @@
+import os
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from dashboard1_graphs import choropleth
+from dashboard1_graphs.choropleth import clicked_district
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def click(name, lat, count):
+    # What st_folium returns after a click on a district (the popup is the NOMBRE field)
+    return {'last_object_clicked': {'lat': lat, 'lng': -3.7}, 'last_object_clicked_count': count,
+            'last_object_clicked_popup': f"\n   {name}\n", 'last_object_clicked_tooltip': f"District: {name}"}
+
+
+def test_a_click_is_handled_once():
+    state = {}
+    assert clicked_district(None, state, 'last') is None
+    assert clicked_district({'last_object_clicked_popup': None}, state, 'last') is None
+    assert clicked_district(click('Centro', 40.41, 1), state, 'last') == 'Centro'
+    # The same result comes back on the rerun
+    assert clicked_district(click('Centro', 40.41, 1), state, 'last') is None
+    assert clicked_district(click('Centro', 40.41, 2), state, 'last') == 'Centro'
+    assert clicked_district(click('Retiro', 40.40, 3), state, 'last') == 'Retiro'
+
+
+@pytest.mark.parametrize('script, page', [('combined_dashboard.py', 'dashboard1'),
+                                          (os.path.join('dashboard1_graphs', 'dashboard1.py'), None)])
+def test_clicking_the_map_toggles_the_district(monkeypatch, script, page):
+    monkeypatch.chdir(ROOT)
+    result = {}
+    monkeypatch.setattr(choropleth, 'st_folium', lambda m, **kwargs: result.get('value'))
+
+    at = AppTest.from_file(os.path.join(ROOT, script), default_timeout=120)
+    if page:
+        at.session_state.page = page
+    at.run()
+    assert not at.exception
+    assert list(at.session_state.selected_districts) == []
+
+    for value, expected in ((click('Centro', 40.41, 1), ['Centro']),
+                            (click('Retiro', 40.40, 2), ['Centro', 'Retiro']),
+                            (click('Centro', 40.42, 3), ['Retiro'])):
+        result['value'] = value
+        at.run()
+        assert not at.exception
+        assert list(at.session_state.selected_districts) == expected
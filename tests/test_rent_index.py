@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from dashboard1_graphs.rent_index import (build_rent_index, default_kpi_window, window_cagr, window_kpi_table,
+                                          window_max, window_mean)
+from dashboard1_graphs.utils import bucket_1, build_rent_matrix, compute_kpi_table
+
+
+def rent_table():
+    rng = np.random.default_rng(2)
+    months = pd.date_range('2010-01-01', '2016-12-01', freq='MS')
+    rows = [(date, district, 8 + d + i * 0.04 + rng.normal(0, 0.3))
+            for d, district in enumerate(['Centro', 'Retiro', 'Salamanca'])
+            for i, date in enumerate(months) if (i * (d + 1)) % 11 != 3]
+    return pd.DataFrame(rows, columns=['Date', 'District', 'Rent_Price'])
+
+
+def test_default_window_gives_the_all_time_kpis():
+    matrix = build_rent_matrix(rent_table())
+    index = build_rent_index(matrix)
+    pd.testing.assert_frame_equal(window_kpi_table(index, *default_kpi_window(index)), compute_kpi_table(matrix))
+
+
+def test_window_queries_match_a_rescan():
+    df = rent_table()
+    matrix = build_rent_matrix(df)
+    index = build_rent_index(matrix)
+    rng = np.random.default_rng(3)
+    for _ in range(30):
+        start, end = sorted(rng.choice(len(matrix.months), size=2, replace=False))
+        start_date, end_date = pd.Timestamp(matrix.months[start]), pd.Timestamp(matrix.months[end])
+        window = matrix.values[:, start:end + 1].astype(np.float64)
+        for district, row in matrix.index.items():
+            assert np.isclose(window_mean(index, district, start_date, end_date), np.nanmean(window[row]))
+            assert np.isclose(window_max(index, district, start_date, end_date), np.nanmax(window[row]))
+        assert np.isclose(window_mean(index, "All", start_date, end_date), np.nanmean(window))
+
+        # CAGR like bucket_1 on the rows of the window
+        in_window = df[(df['Date'] >= start_date) & (df['Date'] <= end_date)]
+        expected = bucket_1(in_window, 'Retiro')
+        actual = window_cagr(index, 'Retiro', start_date, end_date)
+        if expected == "N/A":
+            assert np.isnan(actual)
+        else:
+            assert np.isclose(actual, expected, atol=0.01)
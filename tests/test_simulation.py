@@ -0,0 +1,43 @@
+import numpy as np
+
+from dashboard3.finance import PROJECTION_YEARS, cumulative_gain, revenue_projection, solve_payback
+from dashboard3.simulation import PAYBACK_BINS, PERCENTILES, Distributions, simulate, simulate_chunk
+
+PATHS = 2_000
+
+
+def test_without_spread_matches_deterministic_model():
+    # No shocks and a (practically) fixed participation: every path is the sidebar scenario
+    fixed = Distributions(growth_sd=0.0, uplift_sd=0.0, budget_sd=0.0, participation=0.7,
+                          participation_concentration=1e12)
+    result = simulate(27.8, 0.02, 0.04, paths=PATHS, distributions=fixed)
+    gain = cumulative_gain(0.02, 0.04, horizon=PROJECTION_YEARS)
+    for band in result.revenue_with:
+        assert np.allclose(band, revenue_projection(0.04), rtol=1e-5)
+    for band in result.cumulative_gain:
+        assert np.allclose(band, gain, rtol=1e-4)
+    assert np.allclose(result.roi, gain[-1] / 27.8 * 100, rtol=1e-4)
+    assert np.allclose(result.payback, solve_payback(27.8, gain), rtol=1e-5)
+    assert result.prob_payback == 1.0
+
+
+def test_same_seed_same_draws():
+    # simulate() is cached, so compare the draws themselves
+    first = simulate_chunk(np.random.default_rng(7), PATHS, 27.8, 0.02, 0.04)
+    again = simulate_chunk(np.random.default_rng(7), PATHS, 27.8, 0.02, 0.04)
+    other = simulate_chunk(np.random.default_rng(8), PATHS, 27.8, 0.02, 0.04)
+    for a, b in zip(first, again):
+        assert np.array_equal(a, b)
+    assert not np.array_equal(first[2], other[2])
+    assert simulate(27.8, 0.02, 0.04, paths=PATHS, seed=7) is simulate(27.8, 0.02, 0.04, paths=PATHS, seed=7)
+
+
+def test_bands_are_ordered_and_histogram_adds_up():
+    result = simulate(27.8, 0.02, 0.03, paths=PATHS)
+    assert result.percentiles == PERCENTILES
+    assert np.all(np.diff(result.revenue_with, axis=0) >= 0)
+    assert np.all(np.diff(result.roi) >= 0)
+    assert len(result.payback_histogram) == len(PAYBACK_BINS) - 1
+    # Paths that do not pay back within the projection are left out of the histogram
+    assert np.isclose(result.payback_histogram.sum(), result.prob_payback)
+    assert 0.0 < result.prob_payback < 1.0
@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from dashboard1_graphs import snapshot
+
+
+def write_prices(path, offset=0.0):
+    pd.DataFrame({
+        'Date': ['2020-01-01', '2020-01-01', '2020-02-01', '2020-02-01'],
+        'District': ['Centre', 'Gracia', 'Centre', 'Gracia'],
+        'COD_DIS': [1, 2, 1, 2],
+        'Rent_Price': [10.0 + offset, 11.0 + offset, np.nan, 11.5 + offset],
+    }).to_csv(path, index=False)
+
+
+def test_snapshot_round_trip(tmp_path):
+    csv_path = str(tmp_path / 'prices.csv')
+    snapshot_dir = str(tmp_path / 'snapshots')
+    write_prices(csv_path)
+
+    columns = snapshot.load_snapshot(csv_path, snapshot_dir)
+    expected = snapshot.read_prices_columns(csv_path)
+    assert snapshot.is_fresh(csv_path, snapshot_dir)
+    assert list(columns['District']) == list(expected['District'])
+    assert (columns['Date'] == expected['Date']).all()
+    np.testing.assert_array_equal(columns['Rent_Price'], expected['Rent_Price'])
+
+
+def test_append_then_reload(tmp_path):
+    csv_path = str(tmp_path / 'prices.csv')
+    snapshot_dir = str(tmp_path / 'snapshots')
+    write_prices(csv_path)
+    snapshot.build_snapshot(csv_path, snapshot_dir)
+
+    new = {
+        'Date': np.array(['2020-03-01', '2020-03-01'], dtype='datetime64[ns]'),
+        'District': np.array(['Centre', 'Sants'], dtype=object),
+        'COD_DIS': np.array([1, 3]),
+        'Rent_Price': np.array([12.0, 9.5]),
+    }
+    with open(csv_path, 'a', encoding='utf-8') as f:
+        f.write("2020-03-01,Centre,1,12.0\n2020-03-01,Sants,3,9.5\n")
+    manifest = snapshot.append_snapshot(new, csv_path, snapshot_dir)
+    assert manifest['rows'] == 6
+    assert snapshot.is_fresh(csv_path, snapshot_dir)
+
+    columns = snapshot.load_snapshot(csv_path, snapshot_dir, rebuild=False)
+    expected = snapshot.read_prices_columns(csv_path)
+    assert list(columns['District']) == list(expected['District'])
+    assert (columns['Date'] == expected['Date']).all()
+    np.testing.assert_array_equal(columns['COD_DIS'], expected['COD_DIS'])
+    np.testing.assert_array_equal(columns['Rent_Price'], expected['Rent_Price'])
+
+
+def test_same_file_name_in_different_folders(tmp_path):
+    snapshot_dir = str(tmp_path / 'snapshots')
+    paths = []
+    for folder, offset in (('a', 0.0), ('b', 100.0)):
+        os.makedirs(tmp_path / folder)
+        paths.append(str(tmp_path / folder / 'prices.csv'))
+        write_prices(paths[-1], offset)
+        snapshot.build_snapshot(paths[-1], snapshot_dir)
+
+    assert snapshot.manifest_path(paths[0], snapshot_dir) != snapshot.manifest_path(paths[1], snapshot_dir)
+    # Both snapshots survive each other's builds
+    for path, offset in zip(paths, (0.0, 100.0)):
+        assert snapshot.is_fresh(path, snapshot_dir)
+        assert snapshot.load_snapshot(path, snapshot_dir, rebuild=False)['Rent_Price'][0] == 10.0 + offset
+
+
+def test_key_and_directory_do_not_depend_on_the_working_directory(tmp_path, monkeypatch):
+    csv_path = tmp_path / 'prices.csv'
+    key, snapshot_dir = snapshot.snapshot_key(str(csv_path)), snapshot.SNAPSHOT_DIR
+    monkeypatch.chdir(tmp_path)
+    assert snapshot.snapshot_key('prices.csv') == key
+    assert os.path.isabs(snapshot_dir)
+    assert '.' not in key
@@ -0,0 +1,28 @@
+import numpy as np
+
+from dashboard3.survey import chunk_moments, fit_line, merge_moments
+
+
+def test_merge_moments_matches_polyfit_and_corrcoef():
+    rng = np.random.default_rng(0)
+    x = rng.uniform(0, 10000, 10_000)
+    y = 20 + 0.004 * x + rng.normal(0, 10, len(x))
+
+    moments = chunk_moments(x[:0], y[:0])
+    for start in range(0, len(x), 1234):
+        moments = merge_moments(moments, chunk_moments(x[start:start + 1234], y[start:start + 1234]))
+    fit = fit_line(moments)
+
+    slope, intercept = np.polyfit(x, y, 1)
+    assert moments.count == len(x)
+    assert np.isclose(fit.slope, slope, rtol=1e-9)
+    assert np.isclose(fit.intercept, intercept, rtol=1e-9)
+    assert np.isclose(fit.correlation, np.corrcoef(x, y)[0, 1], rtol=1e-9)
+    assert fit.correlation_low < fit.correlation < fit.correlation_high
+
+
+def test_merge_moments_with_empty():
+    moments = chunk_moments(np.arange(5.0), np.arange(5.0) * 2)
+    empty = chunk_moments(np.array([]), np.array([]))
+    assert merge_moments(empty, moments) == moments
+    assert merge_moments(moments, empty) == moments
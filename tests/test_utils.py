@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+from dashboard1_graphs.utils import bucket_1, bucket_2, bucket_3, bucket_4, build_rent_matrix, compute_kpi_table, kpi_value
+
+
+def rent_table():
+    # One row per district and month, with gaps and months before CAGR_START
+    rng = np.random.default_rng(1)
+    months = pd.date_range('2010-01-01', '2015-12-01', freq='MS')
+    rows = []
+    for d, district in enumerate(['Ciutat Vella', 'Eixample', 'Gracia', 'Sant Marti']):
+        for i, date in enumerate(months):
+            if (i + d) % 7 == 0:
+                continue
+            rows.append((date, district, 8 + d + i * 0.05 + rng.normal(0, 0.3)))
+    return pd.DataFrame(rows, columns=['Date', 'District', 'Rent_Price'])
+
+
+def test_kpi_table_matches_buckets():
+    df = rent_table()
+    table = compute_kpi_table(build_rent_matrix(df))
+    buckets = {'CAGR': bucket_1, 'Max_Rent': bucket_2, 'Rank': bucket_3, 'Avg_Rent': bucket_4}
+    for district in list(df['District'].unique()) + ["All"]:
+        for kpi, bucket in buckets.items():
+            expected = bucket(df, district)
+            actual = kpi_value(table, district, kpi)
+            if expected == "N/A":
+                assert actual == "N/A", (district, kpi)
+            else:
+                # The matrix is float32
+                assert np.isclose(actual, expected, atol=0.011), (district, kpi, actual, expected)
+
+
+def test_kpi_table_of_empty_table():
+    table = compute_kpi_table(build_rent_matrix(pd.DataFrame({'Date': [], 'District': [], 'Rent_Price': []})))
+    assert kpi_value(table, "All", 'Avg_Rent') == "N/A"